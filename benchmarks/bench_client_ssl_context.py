@@ -0,0 +1,121 @@
+"""
+Per-call cost of obtaining the client SSLContext, isolated and under load.
+
+Compares the pre-cache behaviour (build a fresh context and round-trip the SVID
+through /dev/shm on every call) with the generation-keyed cache in SpiffeHelper.
+The load phase drives real mTLS requests against a local aiohttp server.
+
+    python -m benchmarks.bench_client_ssl_context [--requests 400] [--concurrency 32]
+"""
+import argparse
+import asyncio
+import os
+import ssl
+import tempfile
+import time
+
+import aiohttp
+from aiohttp import web
+from cryptography.hazmat.primitives import serialization
+
+from benchmarks.common import print_table, summarize, time_calls
+from src.common.spiffe import SpiffeHelper
+from tests.spiffe_fixtures import FRONTEND_ID, RESEARCHER_ID, FakeX509Source, LocalCA
+
+
+def legacy_client_ssl_context(helper: SpiffeHelper) -> ssl.SSLContext:
+    """The uncached implementation: new context + temp-file SVID load per call."""
+    context = ssl.create_default_context(ssl.Purpose.SERVER_AUTH)
+    context.check_hostname = False
+    pem_out = b""
+    for bundle in helper.source.bundles:
+        for authority in bundle.x509_authorities:
+            pem_out += authority.public_bytes(serialization.Encoding.PEM)
+    context.load_verify_locations(cadata=pem_out.decode("utf-8"))
+
+    svid = helper.source.svid
+    tmp_dir = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+    cert_path = os.path.join(tmp_dir, "bench_client_svid.crt")
+    key_path = os.path.join(tmp_dir, "bench_client_svid.key")
+    with open(cert_path, "wb") as f:
+        for cert in svid.cert_chain:
+            f.write(cert.public_bytes(serialization.Encoding.PEM))
+    with open(key_path, "wb") as f:
+        f.write(svid.private_key.private_bytes(
+            encoding=serialization.Encoding.PEM,
+            format=serialization.PrivateFormat.PKCS8,
+            encryption_algorithm=serialization.NoEncryption()
+        ))
+    context.load_cert_chain(certfile=cert_path, keyfile=key_path)
+    return context
+
+
+async def drive_load(port, get_context, total, concurrency):
+    """Issues `total` requests (one session per call, like the agents) and times each."""
+    samples = []
+    sem = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with sem:
+            start = time.perf_counter()
+            ssl_context = get_context()
+            async with aiohttp.ClientSession() as session:
+                async with session.get(f"https://127.0.0.1:{port}/health", ssl=ssl_context) as resp:
+                    await resp.read()
+            samples.append(time.perf_counter() - start)
+
+    await asyncio.gather(*(one() for _ in range(total)))
+    return samples
+
+
+async def run_load(server_helper, client_helper, total, concurrency):
+    app = web.Application()
+
+    async def health(request):
+        return web.json_response({"status": "healthy"})
+
+    app.router.add_get("/health", health)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0, ssl_context=server_helper.get_server_ssl_context())
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    try:
+        legacy = await drive_load(port, lambda: legacy_client_ssl_context(client_helper), total, concurrency)
+        cached = await drive_load(port, client_helper.get_client_ssl_context, total, concurrency)
+    finally:
+        await runner.cleanup()
+    return legacy, cached
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--iterations", type=int, default=500)
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=32)
+    args = parser.parse_args()
+
+    ca = LocalCA()
+    server_helper = SpiffeHelper(source=FakeX509Source(RESEARCHER_ID, ca))
+    client_helper = SpiffeHelper(source=FakeX509Source(FRONTEND_ID, ca))
+    server_helper.start()
+    client_helper.start()
+
+    print_table("Context acquisition (isolated)", {
+        "legacy (rebuild + /dev/shm)": summarize(time_calls(lambda: legacy_client_ssl_context(client_helper), args.iterations)),
+        "rebuild (in-memory load)": summarize(time_calls(client_helper._build_client_ssl_context, args.iterations)),
+        "cached per generation": summarize(time_calls(client_helper.get_client_ssl_context, args.iterations)),
+    })
+
+    legacy, cached = asyncio.run(run_load(server_helper, client_helper, args.requests, args.concurrency))
+    legacy_s, cached_s = summarize(legacy), summarize(cached)
+    print_table(f"Outbound mTLS call latency ({args.requests} req, concurrency {args.concurrency})", {
+        "legacy context per call": legacy_s,
+        "cached context": cached_s,
+    })
+    print(f"\nSaving per outbound call: p50 {legacy_s['p50_ms'] - cached_s['p50_ms']:.3f} ms, "
+          f"p99 {legacy_s['p99_ms'] - cached_s['p99_ms']:.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
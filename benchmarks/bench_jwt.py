@@ -0,0 +1,62 @@
+"""
+JWTManager sign / verify / JWKS export: per-call PEM parsing vs pre-parsed keys.
+
+"before" replays the PEM-string implementation (key parsed on every call);
+"after" is the current JWTManager. Verification is measured with the
+verified-token cache cleared each call, so both sides do the full RSA check.
+
+    python -m benchmarks.bench_jwt [--iterations 300]
+"""
+import argparse
+import time
+import warnings
+
+from authlib.jose import jwk, jwt
+
+from benchmarks.common import print_table, summarize, time_calls
+from src.common.auth import JWTManager
+
+warnings.simplefilter("ignore", DeprecationWarning)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--iterations", type=int, default=300)
+    args = parser.parse_args()
+    n = args.iterations
+
+    priv, pub = JWTManager.generate_keypair()
+    mgr = JWTManager(private_key_pem=priv, public_key_pem=pub)
+    token = mgr.create_token("user_alice", "alice@example.org")
+
+    now = int(time.time())
+    header = {"alg": "RS256", "typ": "JWT", "kid": "mesh-key-1"}
+    payload = {"iss": mgr.issuer, "sub": "user_alice", "aud": mgr.audience,
+               "iat": now, "exp": now + 3600, "email": "alice@example.org", "scope": "mesh:all"}
+
+    def legacy_verify():
+        claims = jwt.decode(token, pub)
+        claims.validate()
+
+    def current_verify():
+        mgr.token_cache.clear()
+        mgr.verify_token(token)
+
+    def legacy_jwks():
+        key = jwk.dumps(pub, kty="RSA")
+        key.update(kid="mesh-key-1", use="sig", alg="RS256")
+        return {"keys": [key]}
+
+    print_table("JWTManager hot paths (RS256)", {
+        "sign   before (PEM per call)": summarize(time_calls(lambda: jwt.encode(header, payload, priv), max(n // 10, 10))),
+        "sign   after (loaded key)": summarize(time_calls(lambda: mgr.create_token("user_alice", "alice@example.org"), n)),
+        "verify before (PEM per call)": summarize(time_calls(legacy_verify, n)),
+        "verify after (loaded key)": summarize(time_calls(current_verify, n)),
+        "verify after (cache hit)": summarize(time_calls(lambda: mgr.verify_token(token), n)),
+        "jwks   before (PEM -> JWK)": summarize(time_calls(legacy_jwks, n)),
+        "jwks   after (precomputed)": summarize(time_calls(mgr.get_jwks, n)),
+    })
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""
+User-token sign / verify cost per algorithm: RS256 vs ES256 vs EdDSA.
+
+Each algorithm gets its own JWTManager (loaded keys, as in production) and an
+agent-side verifier built from the published JWKS. Verification clears the
+verified-token cache every call so the full signature check is measured.
+
+    python -m benchmarks.bench_jwt_algorithms [--iterations 1000]
+"""
+import argparse
+import warnings
+
+from authlib.jose import JsonWebKey
+
+from benchmarks.common import print_table, summarize, time_calls
+from src.common.auth import SUPPORTED_ALGORITHMS, JWTManager
+
+warnings.simplefilter("ignore", DeprecationWarning)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--iterations", type=int, default=1000)
+    args = parser.parse_args()
+    n = args.iterations
+
+    rows, throughput = {}, {}
+    for alg in SUPPORTED_ALGORITHMS:
+        priv, pub = JWTManager.generate_keypair(alg)
+        signer = JWTManager(private_key_pem=priv, public_key_pem=pub, alg=alg)
+        verifier = JWTManager()
+        verifier.set_public_keys({k["kid"]: JsonWebKey.import_key(k) for k in signer.get_jwks()["keys"]})
+        token = signer.create_token("user_alice", "alice@example.org")
+
+        def verify():
+            verifier.token_cache.clear()
+            verifier.verify_token(token)
+
+        sign_s = summarize(time_calls(lambda: signer.create_token("user_alice", "alice@example.org"), n))
+        verify_s = summarize(time_calls(verify, n))
+        rows[f"sign   {alg}"] = sign_s
+        rows[f"verify {alg}"] = verify_s
+        throughput[alg] = (1000 / sign_s["mean_ms"], 1000 / verify_s["mean_ms"], len(token))
+
+    print_table("User-token signature algorithms", rows)
+    print(f"\n{'alg':<8}{'sign/s':>12}{'verify/s':>12}{'token bytes':>14}")
+    for alg, (sign_ops, verify_ops, size) in throughput.items():
+        print(f"{alg:<8}{sign_ops:>12.0f}{verify_ops:>12.0f}{size:>14}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Authorization decision cost vs. number of identities: compiled policy table vs. list scan.
+
+The compiled table (PolicyEngine) answers with one dict lookup on (method, route) plus one
+frozenset membership test; the old per-handler check was `peer_id not in ALLOWED_CALLERS`,
+a linear scan. Each policy lists N caller SPIFFE IDs on N routes; the caller probed is the
+last one listed (worst case for the scan). Timings are per batch of 1000 decisions.
+
+    python -m benchmarks.bench_policy [--iterations 200]
+"""
+import argparse
+import json
+import os
+import tempfile
+import warnings
+
+from benchmarks.common import print_table, summarize, time_calls
+from src.common.policy import PolicyEngine
+
+warnings.simplefilter("ignore", DeprecationWarning)
+
+BATCH = 1000
+SIZES = (10, 100, 1000, 5000)
+
+
+def _policy_file(n):
+    callers = [f"spiffe://example.org/ns/tenants/sa/workload-{i}" for i in range(n)]
+    routes = [f"POST /tenant/{i}/ask" for i in range(n)]
+    document = {"services": {"researcher": [
+        {"routes": routes, "callers": callers, "scopes": ["mesh:all"]},
+    ]}}
+    fd, path = tempfile.mkstemp(suffix=".json")
+    with os.fdopen(fd, "w") as f:
+        json.dump(document, f)
+    return path, callers
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+
+    rows, per_decision = {}, {}
+    for n in SIZES:
+        path, callers = _policy_file(n)
+        try:
+            engine = PolicyEngine("researcher", path=path)
+        finally:
+            os.unlink(path)
+        caller, route = callers[-1], f"/tenant/{n - 1}/ask"
+
+        def compiled():
+            for _ in range(BATCH):
+                rule = engine.lookup("POST", route)
+                rule.allows_caller(caller)
+
+        def list_scan():
+            for _ in range(BATCH):
+                caller not in callers
+
+        compiled_s = summarize(time_calls(compiled, args.iterations, warmup=5))
+        scan_s = summarize(time_calls(list_scan, args.iterations, warmup=5))
+        rows[f"compiled  {n:>5} ids, {n} routes"] = compiled_s
+        rows[f"list scan {n:>5} ids"] = scan_s
+        per_decision[n] = (compiled_s["p50_ms"] * 1e6 / BATCH, scan_s["p50_ms"] * 1e6 / BATCH)
+
+    print_table(f"Authorization decisions (per batch of {BATCH})", rows)
+    print(f"\n{'identities':<12}{'compiled ns':>14}{'list scan ns':>15}")
+    for n, (compiled_ns, scan_ns) in per_decision.items():
+        print(f"{n:<12}{compiled_ns:>14.0f}{scan_ns:>15.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+sign_response cost: per-call header/key preparation vs the per-generation SVIDSigner.
+
+"before" replays the original implementation (import, chain -> PEM, algorithm
+lookup and header encoding on every response, payload embedded in the JWS);
+"compact" is SVIDSigner with the embedded payload; "detached" is the current
+HTTP path (RFC 7797 signature over canonical bytes reused for the body).
+
+    python -m benchmarks.bench_sign_response [--iterations 1000] [--size 4096]
+"""
+import argparse
+import json
+import warnings
+
+from authlib.jose import JsonWebSignature
+
+from benchmarks.common import print_table, summarize, time_calls
+from src.common.jws import SVIDSigner
+from src.common.server import AgentServer
+from src.common.spiffe import SpiffeHelper
+from tests.spiffe_fixtures import WRITER_ID, FakeX509Source
+
+warnings.simplefilter("ignore", DeprecationWarning)
+
+
+def legacy_sign(helper, data):
+    jws = JsonWebSignature()
+    payload = json.dumps(data).encode("utf-8")
+    header = {
+        "alg": helper.get_x509_algorithm(),
+        "kid": helper.get_spiffe_id(),
+        "x5c": helper.get_cert_chain_pems(),
+    }
+    return jws.serialize_compact(header, payload, helper.get_private_key())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--iterations", type=int, default=1000)
+    parser.add_argument("--size", type=int, default=4096, help="article length in characters")
+    args = parser.parse_args()
+
+    helper = SpiffeHelper(source=FakeX509Source(WRITER_ID))
+    helper.start()
+    server = AgentServer("writer", spiffe_helper=helper)
+    signer = SVIDSigner(helper)
+    data = {"result": "x" * args.size}
+
+    def legacy_body():
+        return json.dumps({"status": "success", "content": data, "signature": legacy_sign(helper, data).decode()})
+
+    def compact_body():
+        token = signer.sign_compact(json.dumps(data).encode("utf-8"))
+        return json.dumps({"status": "success", "content": data, "signature": token})
+
+    print_table(f"sign_response + body serialization ({args.size}-char article)", {
+        "before (prepare per call)": summarize(time_calls(legacy_body, args.iterations)),
+        "compact (per generation)": summarize(time_calls(compact_body, args.iterations)),
+        "detached (signed bytes = body)": summarize(time_calls(
+            lambda: server.signed_json_response(data), args.iterations)),
+    })
+    print(f"\nResponse body: compact {len(compact_body())} B, "
+          f"detached {len(server.signed_json_response(data).body)} B")
+
+
+if __name__ == "__main__":
+    main()
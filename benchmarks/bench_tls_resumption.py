@@ -0,0 +1,75 @@
+"""
+Full vs resumed mTLS handshake between two mesh agents.
+
+Each iteration opens a new TCP connection, completes the handshake, reads a
+2-byte greeting (which also delivers the TLS 1.3 ticket) and closes. Latency is
+wall-clock per connection; CPU is process time (client + server share the process).
+
+    python -m benchmarks.bench_tls_resumption [--connections 300]
+"""
+import argparse
+import asyncio
+import time
+
+from benchmarks.common import print_table, summarize
+from src.common.spiffe import SpiffeHelper
+from tests.spiffe_fixtures import RESEARCHER_ID, WRITER_ID, FakeX509Source, LocalCA
+
+
+async def measure(port, context, connections, resume):
+    wall, cpu = [], []
+    for _ in range(connections):
+        if not resume:
+            context.sessions.clear()
+        start_wall, start_cpu = time.perf_counter(), time.process_time()
+        reader, writer = await asyncio.open_connection("127.0.0.1", port, ssl=context, server_hostname="writer")
+        await reader.readexactly(2)
+        wall.append(time.perf_counter() - start_wall)
+        cpu.append(time.process_time() - start_cpu)
+        writer.close()
+        await writer.wait_closed()
+    return wall, cpu
+
+
+async def run(connections):
+    ca = LocalCA()
+    server = SpiffeHelper(source=FakeX509Source(WRITER_ID, ca))
+    client = SpiffeHelper(source=FakeX509Source(RESEARCHER_ID, ca))
+
+    async def greet(reader, writer):
+        writer.write(b"ok")
+        await writer.drain()
+        writer.close()
+
+    listener = await asyncio.start_server(greet, "127.0.0.1", 0, ssl=server.get_server_ssl_context())
+    port = listener.sockets[0].getsockname()[1]
+    context = client.get_client_ssl_context()
+    try:
+        full = await measure(port, context, connections, resume=False)
+        context.handshakes.update(full=0, resumed=0)
+        resumed = await measure(port, context, connections, resume=True)
+    finally:
+        listener.close()
+        await listener.wait_closed()
+    return full, resumed, dict(context.handshakes)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--connections", type=int, default=300)
+    args = parser.parse_args()
+
+    (full_wall, full_cpu), (res_wall, res_cpu), handshakes = asyncio.run(run(args.connections))
+    print_table("Handshake latency per connection (wall)", {
+        "full handshake": summarize(full_wall),
+        "resumed (session ticket)": summarize(res_wall),
+    })
+    print_table("Handshake CPU per connection (process time)", {
+        "full handshake": summarize(full_cpu),
+        "resumed (session ticket)": summarize(res_cpu),
+    })
+    print(f"\nResumed-phase handshakes: {handshakes}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Per-request tracing overhead: no span processor (before) vs. the OTLP export pipeline.
+
+A simulated request is one SERVER span with two CLIENT children (search + writer call),
+a few attributes each - what the aiohttp instrumentations record per hop. Exported spans
+go over OTLP/HTTP JSON to a local collector stand-in; exporting happens on the batch
+processor's worker thread, so the timings are what the request path (event loop) pays.
+
+    python -m benchmarks.bench_tracing [--iterations 5000]
+"""
+import argparse
+import warnings
+
+from opentelemetry.sdk.resources import Resource
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import BatchSpanProcessor
+from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
+from opentelemetry.trace import SpanKind
+
+from benchmarks.common import print_table, summarize, time_calls
+from src.common.span_export import OTLPJsonSpanExporter, build_span_processor
+from tests.otlp_stub import StubCollector
+
+warnings.simplefilter("ignore", DeprecationWarning)
+
+RESOURCE = Resource.create({"service.name": "researcher"})
+
+
+def _request(tracer):
+    def run():
+        with tracer.start_as_current_span("POST /ask", kind=SpanKind.SERVER,
+                                          attributes={"http.method": "POST", "http.route": "/ask"}):
+            with tracer.start_as_current_span("POST", kind=SpanKind.CLIENT,
+                                              attributes={"http.url": "https://api.tavily.com/search"}):
+                pass
+            with tracer.start_as_current_span("POST", kind=SpanKind.CLIENT,
+                                              attributes={"http.url": "https://writer:8080/process"}) as span:
+                span.set_attribute("http.status_code", 200)
+    return run
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--iterations", type=int, default=5000)
+    args = parser.parse_args()
+
+    with StubCollector() as collector:
+        configs = {
+            "no processor (before)": (TracerProvider(resource=RESOURCE), None),
+            "head 10%, batch export": (
+                TracerProvider(resource=RESOURCE, sampler=ParentBased(TraceIdRatioBased(0.1))),
+                BatchSpanProcessor(OTLPJsonSpanExporter(collector.url))),
+            "tail 10% + slow/error": (
+                TracerProvider(resource=RESOURCE),
+                build_span_processor(OTLPJsonSpanExporter(collector.url), ratio=0.1, slow_threshold=0.5)),
+            "tail 100% (export all)": (
+                TracerProvider(resource=RESOURCE),
+                build_span_processor(OTLPJsonSpanExporter(collector.url), ratio=1.0, slow_threshold=0.5)),
+        }
+
+        rows, exported = {}, {}
+        for name, (provider, processor) in configs.items():
+            if processor is not None:
+                provider.add_span_processor(processor)
+            before = len(collector.spans)
+            rows[name] = summarize(time_calls(_request(provider.get_tracer("bench")), args.iterations))
+            provider.force_flush()
+            provider.shutdown()
+            exported[name] = len(collector.spans) - before
+
+    print_table("Tracing cost per simulated request (3 spans)", rows)
+    baseline = rows["no processor (before)"]["mean_ms"]
+    print(f"\n{'config':<26}{'overhead us':>13}{'spans exported':>16}")
+    for name, s in rows.items():
+        print(f"{name:<26}{(s['mean_ms'] - baseline) * 1000:>13.1f}{exported[name]:>16}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""
+Shared helpers for the offline benchmarks.
+Run any benchmark from the repository root, e.g. `python -m benchmarks.bench_client_ssl_context`.
+"""
+import statistics
+import time
+
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of a list of numbers."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(0, min(len(ordered) - 1, int(round(pct / 100.0 * len(ordered))) - 1))
+    return ordered[rank]
+
+
+def summarize(samples_s):
+    """Summarizes a list of durations (seconds) as milliseconds."""
+    return {
+        "n": len(samples_s),
+        "mean_ms": statistics.fmean(samples_s) * 1000 if samples_s else 0.0,
+        "p50_ms": percentile(samples_s, 50) * 1000,
+        "p95_ms": percentile(samples_s, 95) * 1000,
+        "p99_ms": percentile(samples_s, 99) * 1000,
+    }
+
+
+def time_calls(fn, iterations=1000, warmup=20):
+    """Times `fn()` individually and returns the list of durations in seconds."""
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def print_table(title, rows):
+    """Prints {name: summary} rows as a fixed-width table."""
+    print(f"\n{title}")
+    print(f"{'case':<34}{'n':>7}{'p50 ms':>11}{'p95 ms':>11}{'p99 ms':>11}")
+    for name, s in rows.items():
+        print(f"{name:<34}{s['n']:>7}{s['p50_ms']:>11.3f}{s['p95_ms']:>11.3f}{s['p99_ms']:>11.3f}")
@@ -0,0 +1,387 @@
+"""
+Offline load test of the full mesh: frontend -> researcher -> writer over real mTLS.
+
+The researcher and writer agents (their real modules, routes and middleware) and the
+metadata (JWKS) server run in this process, each listening on a loopback port with its
+own SVID from a local test CA standing in for SPIRE, delivered in memory or, with
+`--workload-api`, through a stub SPIFFE Workload API (gRPC on a unix socket) read by the
+production X509Source. Tavily and Gemini are replaced by
+local stubs with configurable latency distributions. The load generator plays the
+frontend: pooled mTLS sessions presenting the frontend SVID plus a user JWT per request.
+
+Arrivals are closed-loop (`--concurrency` users sending back to back) or open-loop
+(`--rps` arrivals per second, uniform or Poisson, latency measured from the scheduled
+send time so a slow mesh cannot hide queueing). The report gives throughput, error rate
+and p50/p95/p99 per hop: exact client-side numbers for the frontend hop, and
+bucket-interpolated ones (fine 10% buckets) from each agent's /metrics histograms.
+
+Latency specs (seconds): 0.2 | uniform:0.1:0.3 | exp:0.2 (mean) | lognormal:0.2:0.5 (median, sigma)
+
+    python -m benchmarks.load_mesh [--mode closed|open] [--concurrency 16] [--rps 20]
+        [--duration 10] [--search-latency lognormal:0.3:0.4] [--llm-latency lognormal:1.5:0.5]
+        [--stream] [--workload-api] [--output load.json]
+"""
+import argparse
+import asyncio
+import importlib
+import json
+import logging
+import math
+import os
+import random
+import socket
+import tempfile
+import time
+import warnings
+
+import aiohttp
+from aiohttp import web
+
+from benchmarks.common import print_table, summarize
+from src.common.auth import JWTManager
+from src.common.metrics import MetricsRegistry
+from src.common.pool import MeshSessionPool
+from src.common.spiffe import SpiffeHelper
+from src.common.streaming import iter_sse
+from tests.gemini_stub import StubGeminiServer
+from tests.search_stub import StubSearchServer
+from tests.spiffe_fixtures import FRONTEND_ID, RESEARCHER_ID, WRITER_ID, FakeX509Source, LocalCA
+from tests.workload_api_stub import StubWorkloadAPI
+
+warnings.simplefilter("ignore", DeprecationWarning)
+
+# 0.1 ms .. ~60 s in 10% steps, so interpolated percentiles are within a few percent
+LOAD_BUCKETS = tuple(1e-4 * 1.1 ** i for i in range(141))
+
+TOPICS = ("SPIFFE federation", "mTLS at scale", "zero trust agents", "JWT key rotation",
+          "workload identity", "service mesh latency", "SVID rotation", "policy engines")
+
+
+def parse_latency(spec, rng=random):
+    """A latency spec (see module docstring) -> zero-arg callable returning seconds."""
+    kind, _, rest = spec.partition(":")
+    if not rest:
+        value = float(kind)
+        return lambda: value
+    args = [float(a) for a in rest.split(":")]
+    if kind == "const":
+        return lambda: args[0]
+    if kind == "uniform":
+        return lambda: rng.uniform(args[0], args[1])
+    if kind == "exp":
+        return lambda: rng.expovariate(1 / args[0])
+    if kind == "lognormal":
+        return lambda: rng.lognormvariate(math.log(args[0]), args[1])
+    raise ValueError(f"Unknown latency distribution: {spec!r}")
+
+
+def _bind():
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind(("127.0.0.1", 0))
+    return sock
+
+
+class InProcessMesh:
+    """
+    Researcher, writer and metadata server in one process, over mTLS with a local CA.
+
+    The agent modules read their upstream URLs from the environment at import time, so
+    listening sockets are bound first and the modules imported afterwards (once per process).
+    `sources` holds each workload's SVID provider, for driving rotations with `rotate()`:
+    a FakeX509Source, or with `workload_api` a StubWorkloadAPI that the workload's real
+    X509Source watches, so rotations take the production Workload API reload path.
+    """
+
+    def __init__(self, search_latency=0.0, llm_latency=0.0, stream_chunks=4, rate_limits=False, workload_api=False):
+        self.ca = LocalCA()
+        self.search = StubSearchServer(latency=search_latency)
+        self.gemini = StubGeminiServer(latency=llm_latency, chunks=stream_chunks)
+        self.rate_limits = rate_limits
+        self.workload_api = workload_api
+        self.issuer = None
+        self.sources = {}
+        self._helpers = []
+        self.servers = {}
+        self.urls = {}
+        self._runners = []
+        self._tmp = tempfile.TemporaryDirectory(prefix="mesh-load-")
+
+    async def start(self):
+        await self.search.start()
+        await self.gemini.start()
+        socks = {name: _bind() for name in ("metadata", "writer", "researcher")}
+        self.urls = {name: f"https://127.0.0.1:{sock.getsockname()[1]}" for name, sock in socks.items()}
+
+        os.environ.update({
+            "MESH_JWKS_URL": f"{self.urls['metadata']}/debug/jwks",
+            "WRITER_URL": self.urls["writer"],
+            "TAVILY_API_URL": self.search.url,
+            "TAVILY_API_KEY": self.search.api_key,
+            "GEMINI_API_URL": self.gemini.url,
+            "GOOGLE_API_KEY": "stub-key",
+            "ARTICLE_STORE_PATH": os.path.join(self._tmp.name, "articles.db"),
+        })
+        if not self.rate_limits:
+            # Measure the mesh, not the per-user / per-caller token buckets
+            os.environ.update({"RATE_LIMIT_USER_RPS": "1e6", "RATE_LIMIT_USER_BURST": "1e6",
+                               "RATE_LIMIT_CALLER_RPS": "1e6", "RATE_LIMIT_CALLER_BURST": "1e6"})
+
+        from src.frontend.metadata_server import create_app
+        agents = {name: importlib.import_module(f"src.agents.{name}").server for name in ("writer", "researcher")}
+        logging.getLogger().setLevel(logging.WARNING)  # per-request INFO lines would dominate
+
+        # Metadata (JWKS) server: runs as the frontend workload, like in docker-compose
+        priv, pub = JWTManager.generate_keypair()
+        self.issuer = JWTManager(private_key_pem=priv, public_key_pem=pub)
+        metadata_spiffe = self.attach(SpiffeHelper(), "frontend", FRONTEND_ID)
+        await self._serve(create_app(self.issuer), socks["metadata"], metadata_spiffe)
+
+        # Writer before researcher: the researcher pre-connects to it on startup
+        for name, spiffe_id in (("writer", WRITER_ID), ("researcher", RESEARCHER_ID)):
+            server = agents[name]
+            self.attach(server.spiffe, name, spiffe_id)
+            server.metrics = MetricsRegistry(buckets=LOAD_BUCKETS)
+            server.app.add_routes(server.routes)
+            self.servers[name] = server
+            await self._serve(server.app, socks[name], server.spiffe)
+        return self
+
+    def attach(self, helper, name, spiffe_id):
+        """Starts `helper` on an SVID for `spiffe_id` from this mesh's CA, registered as `sources[name]`."""
+        if self.workload_api:
+            self.sources[name] = StubWorkloadAPI(spiffe_id, self.ca, self._tmp.name).start()
+            helper.socket_path = self.sources[name].socket_path
+        else:
+            self.sources[name] = helper.source = FakeX509Source(spiffe_id, self.ca)  # injected (see SpiffeHelper)
+        helper.start()
+        self._helpers.append(helper)
+        return helper
+
+    async def _serve(self, app, sock, spiffe):
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        await web.SockSite(runner, sock, ssl_context=spiffe.get_server_ssl_context()).start()
+        self._runners.append(runner)
+
+    def reset_metrics(self):
+        for server in self.servers.values():
+            server.metrics = MetricsRegistry(buckets=LOAD_BUCKETS)
+
+    async def stop(self):
+        for runner in reversed(self._runners):
+            await runner.cleanup()
+        await self.gemini.stop()
+        await self.search.stop()
+        if self.workload_api:
+            for helper in self._helpers:
+                helper.source.close()
+            for source in self.sources.values():
+                source.stop()
+        self._tmp.cleanup()
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, *exc):
+        await self.stop()
+
+
+class LoadGenerator:
+    """The frontend side: one pooled mTLS client, a JWT per simulated user, outcome per request."""
+
+    def __init__(self, mesh, users=50, stream=False, timeout=30.0, distinct_queries=0, limit_per_host=None):
+        self.mesh = mesh
+        self.stream = stream
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.distinct_queries = distinct_queries  # 0: every query unique (no search / article cache hits)
+        self.spiffe = mesh.attach(SpiffeHelper(), "client", FRONTEND_ID)
+        self.pool = MeshSessionPool(self.spiffe, limit_per_host=limit_per_host)
+        self.tokens = [mesh.issuer.create_token(f"user_{i}", f"user{i}@example.org") for i in range(users)]
+        self.url = mesh.urls["researcher"] + ("/ask/stream" if stream else "/ask")
+        self.started = []  # send time of each entry in `latencies` (perf_counter)
+        self.latencies = []
+        self.first_bytes = []
+        self.outcomes = {}
+        self._sent = 0
+
+    def reset(self):
+        self.started, self.latencies, self.first_bytes, self.outcomes = [], [], [], {}
+
+    def _query(self, i):
+        n = i % self.distinct_queries if self.distinct_queries else i
+        return f"{TOPICS[n % len(TOPICS)]} #{n}"
+
+    async def request(self, start=None):
+        """One /ask round-trip; `start` is the scheduled send time (open loop), else now."""
+        i, self._sent = self._sent, self._sent + 1
+        start = start or time.perf_counter()
+        headers = {"Authorization": f"Bearer {self.tokens[i % len(self.tokens)]}"}
+        try:
+            async with self.pool.post(self.url, json={"query": self._query(i)}, headers=headers,
+                                      timeout=self.timeout) as resp:
+                if resp.status != 200:
+                    await resp.read()
+                    outcome = f"http_{resp.status}"
+                elif self.stream:
+                    outcome = await self._read_stream(resp, start)
+                else:
+                    body = await resp.json()
+                    # The researcher answers 200 with an unsigned error text when the writer hop fails
+                    outcome = "ok" if body.get("content", {}).get("writer_signature") else "writer_error"
+        except asyncio.TimeoutError:
+            outcome = "timeout"
+        except aiohttp.ClientError as e:
+            outcome = type(e).__name__
+        self.started.append(start)
+        self.latencies.append(time.perf_counter() - start)
+        self.outcomes[outcome] = self.outcomes.get(outcome, 0) + 1
+        return outcome
+
+    async def _read_stream(self, resp, start):
+        outcome, first = "stream_incomplete", True
+        async for event, _ in iter_sse(resp.content):
+            if event == "chunk" and first:
+                self.first_bytes.append(time.perf_counter() - start)
+                first = False
+            elif event == "error":
+                outcome = "stream_error"
+            elif event == "end" and outcome != "stream_error":
+                outcome = "ok"
+        return outcome
+
+    async def closed_loop(self, concurrency, duration, think=0.0):
+        deadline = time.perf_counter() + duration
+
+        async def user():
+            while time.perf_counter() < deadline:
+                await self.request()
+                if think:
+                    await asyncio.sleep(think)
+
+        await asyncio.gather(*(user() for _ in range(concurrency)))
+
+    async def open_loop(self, rps, duration, max_outstanding, poisson=True, rng=random):
+        """Sends at `rps` regardless of responses; arrivals over `max_outstanding` are shed client-side."""
+        loop_start = time.perf_counter()
+        next_send, tasks, outstanding = loop_start, set(), [0]
+
+        async def send(scheduled):
+            outstanding[0] += 1
+            try:
+                await self.request(start=scheduled)
+            finally:
+                outstanding[0] -= 1
+
+        while next_send < loop_start + duration:
+            delay = next_send - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            if outstanding[0] >= max_outstanding:
+                self.outcomes["client_shed"] = self.outcomes.get("client_shed", 0) + 1
+            else:
+                task = asyncio.ensure_future(send(next_send))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            next_send += rng.expovariate(rps) if poisson else 1 / rps
+        if tasks:
+            await asyncio.gather(*tasks)
+
+    async def close(self):
+        await self.pool.close()
+
+
+def _histogram_row(histogram, **match):
+    n = sum(histogram.merged(**match))
+    quantile = lambda q: (histogram.quantile(q, **match) or 0.0) * 1000
+    return {"n": n, "p50_ms": quantile(0.5), "p95_ms": quantile(0.95), "p99_ms": quantile(0.99)}
+
+
+def hop_report(generator, mesh):
+    """{hop: summary}: client-side exact rows first, then the agents' histogram rows."""
+    researcher, writer = mesh.servers["researcher"].metrics, mesh.servers["writer"].metrics
+    ask, process = ("/ask/stream", "/process/stream") if generator.stream else ("/ask", "/process")
+    rows = {"frontend -> researcher (client)": summarize(generator.latencies)}
+    if generator.stream:
+        rows["  first chunk (client)"] = summarize(generator.first_bytes)
+    rows.update({
+        "researcher request": _histogram_row(researcher.request_seconds, route=ask),
+        "  verify_token": _histogram_row(researcher.stage_seconds, stage="verify_token", route=ask),
+        "  search (Tavily stub)": _histogram_row(researcher.stage_seconds, stage="search"),
+        "  researcher -> writer": _histogram_row(researcher.stage_seconds, stage="writer_hop"),
+        "writer request": _histogram_row(writer.request_seconds, route=process),
+        "  verify_token ": _histogram_row(writer.stage_seconds, stage="verify_token", route=process),
+        "  llm (Gemini stub)": _histogram_row(writer.stage_seconds, stage="llm"),
+        "  sign": _histogram_row(writer.stage_seconds, stage="sign"),
+        "tls_handshake (researcher)": _histogram_row(researcher.stage_seconds, stage="tls_handshake"),
+        "tls_handshake (writer)": _histogram_row(writer.stage_seconds, stage="tls_handshake"),
+    })
+    return rows
+
+
+def print_outcomes(generator, elapsed):
+    total = sum(generator.outcomes.values())
+    ok = generator.outcomes.get("ok", 0)
+    print(f"\nthroughput {ok / elapsed:.1f} req/s ok ({total} requests in {elapsed:.1f} s), "
+          f"error rate {(total - ok) / max(total, 1) * 100:.2f}%")
+    print("outcomes: " + ", ".join(f"{k}={v}" for k, v in sorted(generator.outcomes.items())))
+
+
+async def run(args):
+    rng = random.Random(args.seed)
+    async with InProcessMesh(parse_latency(args.search_latency, rng), parse_latency(args.llm_latency, rng),
+                             rate_limits=args.rate_limits, workload_api=args.workload_api) as mesh:
+        generator = LoadGenerator(mesh, users=args.users, stream=args.stream, timeout=args.timeout,
+                                  distinct_queries=args.distinct_queries, limit_per_host=args.concurrency)
+        try:
+            await asyncio.gather(*(generator.request() for _ in range(min(args.concurrency, 8))))  # warm-up
+            generator.reset()
+            mesh.reset_metrics()
+
+            start = time.perf_counter()
+            if args.mode == "closed":
+                await generator.closed_loop(args.concurrency, args.duration, args.think)
+            else:
+                await generator.open_loop(args.rps, args.duration, args.concurrency, poisson=not args.uniform, rng=rng)
+            elapsed = time.perf_counter() - start
+            rows = hop_report(generator, mesh)
+        finally:
+            await generator.close()
+
+    load = f"{args.concurrency} users" if args.mode == "closed" else f"{args.rps} rps, <= {args.concurrency} outstanding"
+    print_table(f"Per-hop latency ({args.mode} loop, {load}, {'/ask/stream' if args.stream else '/ask'})", rows)
+    print_outcomes(generator, elapsed)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"args": vars(args), "elapsed_s": elapsed, "outcomes": generator.outcomes, "hops": rows}, f, indent=2)
+        print(f"Saved to {args.output}")
+
+
+def add_load_arguments(parser):
+    parser.add_argument("--mode", choices=("closed", "open"), default="closed")
+    parser.add_argument("--concurrency", type=int, default=16, help="closed: users; open: max outstanding")
+    parser.add_argument("--rps", type=float, default=20.0, help="open loop arrival rate")
+    parser.add_argument("--uniform", action="store_true", help="open loop: evenly spaced instead of Poisson arrivals")
+    parser.add_argument("--think", type=float, default=0.0, help="closed loop: pause between a user's requests (s)")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds of measured load")
+    parser.add_argument("--users", type=int, default=50, help="distinct user JWTs")
+    parser.add_argument("--search-latency", default="lognormal:0.3:0.4")
+    parser.add_argument("--llm-latency", default="lognormal:1.5:0.5")
+    parser.add_argument("--distinct-queries", type=int, default=0, help="0: all unique (cold caches)")
+    parser.add_argument("--stream", action="store_true", help="drive /ask/stream instead of /ask")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--rate-limits", action="store_true", help="keep the production rate limits")
+    parser.add_argument("--workload-api", action="store_true",
+                        help="deliver SVIDs through a stub SPIFFE Workload API (gRPC) instead of in memory")
+    parser.add_argument("--seed", type=int, default=1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    add_load_arguments(parser)
+    parser.add_argument("--output", help="also save the report as JSON")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+"""
+p99 under an SVID rotation storm: the full mesh under sustained load while every workload rotates.
+
+Runs the in-process mesh from benchmarks.load_mesh (researcher, writer, JWKS server and the
+frontend load generator over real mTLS). Every workload gets its SVIDs from its own stub
+SPIFFE Workload API (gRPC `FetchX509SVID` on a unix socket, tests/workload_api_stub.py)
+through the production X509Source, as from a SPIRE agent. A background thread plays the
+SPIRE side and pushes a new SVID to every workload every `--interval` seconds, so each
+rotation takes the real path: X509Source watcher thread -> SpiffeHelper -> context rebuild
+with memfd SVID loading. `--in-memory-source` swaps in FakeX509Source instead (no gRPC;
+isolates the TLS side). The run has two phases of `--duration` seconds each: a baseline
+without rotations, then the storm. The report covers:
+
+- latency: baseline vs storm, with storm requests split into those that overlapped a
+  rotation and those that did not;
+- failures: client outcomes (handshake / connection errors, failed writer hops);
+- rotations actually seen: SVID generation per workload, and each agent's signing key;
+- resources: RSS, open file descriptors, /dev/shm entries and live SSLContext objects,
+  before the storm and after a `--settle` period once it ends, so leaks show as growth.
+
+`--max-p99-ms` / `--max-error-rate` turn it into a check: the exit status is 1 when the
+storm breaks either bound.
+
+    python -m benchmarks.rotation_storm [--interval 1] [--duration 20] [--concurrency 16] [--max-p99-ms 5000]
+        [--in-memory-source]
+"""
+import argparse
+import asyncio
+import bisect
+import gc
+import os
+import resource
+import ssl
+import sys
+import threading
+import time
+import warnings
+
+from benchmarks.common import print_table, summarize
+from benchmarks.load_mesh import InProcessMesh, LoadGenerator, add_load_arguments, parse_latency, print_outcomes
+
+warnings.simplefilter("ignore", DeprecationWarning)
+
+
+class RotationStorm:
+    """Re-issues every workload's SVID every `interval` seconds on a background thread (SPIRE's role)."""
+
+    def __init__(self, sources, interval):
+        self.sources = sources  # name -> StubWorkloadAPI / FakeX509Source
+        self.interval = interval
+        self.times = []  # perf_counter at the start of each rotation round
+        self.errors = []
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="rotation-storm", daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.times.append(time.perf_counter())
+            for name, source in self.sources.items():
+                try:
+                    source.rotate()
+                except Exception as e:
+                    self.errors.append(f"{name}: {e!r}")
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+
+def snapshot():
+    """Process resources that a leaking rotation path would grow."""
+    gc.collect()
+    try:
+        with open("/proc/self/statm") as f:
+            rss_mb = int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except OSError:  # non-Linux: peak RSS is the best available
+        rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    return {
+        "rss_mb": rss_mb,
+        "open_fds": len(os.listdir("/proc/self/fd")) if os.path.isdir("/proc/self/fd") else None,
+        "shm_files": len(os.listdir("/dev/shm")) if os.path.isdir("/dev/shm") else None,
+        "ssl_contexts": sum(isinstance(o, ssl.SSLContext) for o in gc.get_objects()),
+    }
+
+
+def split_by_rotation(started, latencies, rotations):
+    """(overlapping a rotation, not overlapping) latency lists."""
+    during, between = [], []
+    for start, latency in zip(started, latencies):
+        i = bisect.bisect_left(rotations, start)
+        (during if i < len(rotations) and rotations[i] <= start + latency else between).append(latency)
+    return during, between
+
+
+async def run(args):
+    async with InProcessMesh(parse_latency(args.search_latency), parse_latency(args.llm_latency),
+                             rate_limits=args.rate_limits, workload_api=args.workload_api) as mesh:
+        generator = LoadGenerator(mesh, users=args.users, stream=args.stream, timeout=args.timeout,
+                                  distinct_queries=args.distinct_queries, limit_per_host=args.concurrency)
+
+        async def load():
+            generator.reset()
+            start = time.perf_counter()
+            if args.mode == "closed":
+                await generator.closed_loop(args.concurrency, args.duration, args.think)
+            else:
+                await generator.open_loop(args.rps, args.duration, args.concurrency, poisson=not args.uniform)
+            return (time.perf_counter() - start, dict(generator.outcomes),
+                    list(generator.started), list(generator.latencies))
+
+        try:
+            await asyncio.gather(*(generator.request() for _ in range(min(args.concurrency, 8))))  # warm-up
+            baseline = await load()
+            before = snapshot()
+
+            sources = dict(mesh.sources)
+            storm = RotationStorm(sources, args.interval).start()
+            try:
+                stormy = await load()
+            finally:
+                storm.stop()
+            await asyncio.sleep(args.settle)  # let draining sessions of old generations close
+            after = snapshot()
+            generations = {name: server.spiffe.generation for name, server in mesh.servers.items()}
+            generations["client"] = generator.spiffe.generation
+            signing_keys = {name: server.signer.fingerprint for name, server in mesh.servers.items()}
+        finally:
+            await generator.close()
+
+    elapsed, outcomes, started, latencies = stormy
+    during, between = split_by_rotation(started, latencies, storm.times)
+    rows = {
+        "baseline (no rotation)": summarize(baseline[3]),
+        f"storm (every {args.interval:g} s)": summarize(latencies),
+        "  overlapping a rotation": summarize(during),
+        "  between rotations": summarize(between),
+    }
+    print_table(f"Client latency, {args.mode} loop, {len(storm.times)} rotation rounds x {len(sources)} workloads", rows)
+
+    generator.outcomes = outcomes
+    print_outcomes(generator, elapsed)
+    if storm.errors:
+        print(f"rotation errors: {storm.errors[:5]}")
+    print("SVID generations seen: " + ", ".join(f"{k}={v}" for k, v in generations.items()))
+    print("signing key now: " + ", ".join(f"{k}={v[:12]}" for k, v in signing_keys.items() if v))
+
+    rounds = max(len(storm.times), 1)
+    print(f"\n{'resource':<16}{'before':>12}{'after':>12}{'per rotation':>14}")
+    for key in before:
+        if before[key] is None:
+            continue
+        growth = (after[key] - before[key]) / rounds
+        print(f"{key:<16}{before[key]:>12.1f}{after[key]:>12.1f}{growth:>14.3f}")
+
+    total = sum(outcomes.values())
+    error_rate = (total - outcomes.get("ok", 0)) / max(total, 1)
+    p99 = rows[f"storm (every {args.interval:g} s)"]["p99_ms"]
+    violations = []
+    if args.max_p99_ms is not None and p99 > args.max_p99_ms:
+        violations.append(f"storm p99 {p99:.1f} ms > {args.max_p99_ms:g} ms")
+    if args.max_error_rate is not None and error_rate > args.max_error_rate:
+        violations.append(f"error rate {error_rate:.2%} > {args.max_error_rate:.2%}")
+    if any(generation < len(storm.times) for generation in generations.values()):
+        violations.append(f"a workload missed rotations: {generations}")
+    for violation in violations:
+        print(f"FAIL: {violation}")
+    return 1 if violations else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    add_load_arguments(parser)
+    parser.add_argument("--interval", type=float, default=1.0, help="seconds between rotation rounds")
+    parser.add_argument("--settle", type=float, default=2.0, help="seconds after the storm before measuring resources")
+    parser.add_argument("--max-p99-ms", type=float, help="fail when the storm's p99 exceeds this")
+    parser.add_argument("--max-error-rate", type=float, help="fail when the storm's error rate exceeds this (0..1)")
+    parser.add_argument("--in-memory-source", dest="workload_api", action="store_false",
+                        help="rotate through FakeX509Source instead of the stub Workload API")
+    parser.set_defaults(workload_api=True, duration=20.0, search_latency="0.05", llm_latency="lognormal:0.2:0.5")
+    sys.exit(asyncio.run(run(parser.parse_args())))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+"""
+Offline microbenchmark suite for the crypto and identity hot paths, saved as JSON.
+
+Everything runs in-process: SVIDs come from a local SPIFFE CA through the in-memory
+X509Source stand-in (tests/spiffe_fixtures.py), so no SPIRE agent, mesh or network is
+needed. Each case is timed call by call; the report records p50/p95/p99 per case plus
+the environment (Python, OpenSSL, crypto library versions, git commit), and
+`--compare` prints the p50 change against an earlier report (e.g. the last release).
+
+    python -m benchmarks.suite [--iterations 500] [--output bench-results.json] [--compare old.json]
+"""
+import argparse
+import datetime
+import json
+import platform
+import ssl
+import subprocess
+import sys
+import warnings
+from importlib import metadata
+
+from benchmarks.common import print_table, summarize, time_calls
+from src.common.auth import JWTManager
+from src.common.jws import verify_signature
+from src.common.server import AgentServer
+from src.common.spiffe import SpiffeHelper
+from tests.spiffe_fixtures import FRONTEND_ID, WRITER_ID, FakeX509Source, LocalCA
+
+warnings.simplefilter("ignore", DeprecationWarning)
+
+SCHEMA_VERSION = 1
+PACKAGES = ("authlib", "cryptography", "spiffe", "aiohttp")
+
+
+def memory_handshake(server_context, client_context):
+    """One full mTLS handshake over in-memory BIOs (no sockets): the per-connection TLS cost."""
+    server_in, server_out, client_in, client_out = (ssl.MemoryBIO() for _ in range(4))
+    server = server_context.wrap_bio(server_in, server_out, server_side=True)
+    client = client_context.wrap_bio(client_in, client_out, server_hostname="writer")
+    pending = [client, server]
+    while pending:
+        for side in list(pending):
+            try:
+                side.do_handshake()
+                pending.remove(side)
+            except ssl.SSLWantReadError:
+                pass
+        server_in.write(client_out.read())
+        client_in.write(server_out.read())
+    return server.peer_identity
+
+
+def build_cases():
+    """{case name: (zero-arg callable, iteration scale)}; scale < 1 for the slow, context-building cases."""
+    ca = LocalCA()
+    priv, pub = JWTManager.generate_keypair()
+    issuer = JWTManager(private_key_pem=priv, public_key_pem=pub)
+    verifier = JWTManager(public_key_pem=pub)
+    token = issuer.create_token("user_alice", "alice@example.org")
+
+    writer = AgentServer("writer", spiffe_helper=SpiffeHelper(source=FakeX509Source(WRITER_ID, ca)))
+    writer.spiffe.start()
+    article = {"result": "# Article\n\n" + "lorem ipsum " * 340}  # ~4 KB, a typical writer response
+    envelope = writer.sign_response(article)
+
+    frontend = SpiffeHelper(source=FakeX509Source(FRONTEND_ID, ca))
+    frontend.start()
+
+    def verify_cold():
+        verifier.token_cache.clear()
+        return verifier.verify_token(token)
+
+    def client_context_rebuild():
+        frontend._client_context = None  # what the first call after an SVID rotation pays
+        return frontend.get_client_ssl_context()
+
+    listener = writer.spiffe.get_server_ssl_context()
+    client_context = frontend.get_client_ssl_context()  # tickets are only kept on read: always a full handshake
+
+    def server_context_rebuild():
+        writer.spiffe._refresh_server_context()  # the per-rotation rebuild behind the listener
+
+    return {
+        "jwt.create_token": (lambda: issuer.create_token("user_alice", "alice@example.org"), 1),
+        "jwt.verify_token (cold)": (verify_cold, 1),
+        "jwt.verify_token (cache hit)": (lambda: verifier.verify_token(token), 1),
+        "jwt.get_jwks": (issuer.get_jwks, 1),
+        "server.sign_response (4 KB)": (lambda: writer.sign_response(article), 1),
+        "frontend.verify_jws (4 KB)": (lambda: verify_signature(envelope["signature"], envelope["content"]), 1),
+        "spiffe.client_ctx (cached)": (frontend.get_client_ssl_context, 1),
+        "spiffe.client_ctx (rebuild)": (client_context_rebuild, 0.1),
+        "spiffe.mtls_handshake (listener)": (lambda: memory_handshake(listener, client_context), 0.2),
+        "spiffe.server_ctx (rebuild)": (server_context_rebuild, 0.1),
+        "spiffe._bundle_to_pem": (lambda: frontend._bundle_to_pem(frontend.source.bundles), 1),
+    }
+
+
+def environment():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    versions = {}
+    for package in PACKAGES:
+        try:
+            versions[package] = metadata.version(package)
+        except metadata.PackageNotFoundError:
+            versions[package] = None
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "openssl": ssl.OPENSSL_VERSION,
+        "packages": versions,
+        "git_commit": commit,
+    }
+
+
+def run(iterations):
+    results = {}
+    for name, (fn, scale) in build_cases().items():
+        n = max(int(iterations * scale), 10)
+        results[name] = summarize(time_calls(fn, n, warmup=min(20, n)))
+    return results
+
+
+def compare(results, baseline):
+    """Prints p50 per case against a previous report; cases missing on either side are listed as such."""
+    old = baseline.get("results", {})
+    print(f"\nvs. {baseline.get('environment', {}).get('git_commit')} ({baseline.get('timestamp')})")
+    print(f"{'case':<34}{'old p50 ms':>12}{'new p50 ms':>12}{'change':>10}")
+    for name in list(results) + [n for n in old if n not in results]:
+        before, after = old.get(name, {}).get("p50_ms"), results.get(name, {}).get("p50_ms")
+        if before is None or after is None:
+            print(f"{name:<34}{'-' if before is None else f'{before:.4f}':>12}"
+                  f"{'-' if after is None else f'{after:.4f}':>12}{'n/a':>10}")
+            continue
+        change = (after - before) / before * 100 if before else 0.0
+        print(f"{name:<34}{before:>12.4f}{after:>12.4f}{change:>+9.1f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--iterations", type=int, default=500)
+    parser.add_argument("--output", default="bench-results.json", help="JSON report path ('-' for stdout)")
+    parser.add_argument("--compare", help="earlier JSON report to diff p50 against")
+    args = parser.parse_args()
+
+    results = run(args.iterations)
+    report = {
+        "schema": SCHEMA_VERSION,
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "iterations": args.iterations,
+        "environment": environment(),
+        "results": results,
+    }
+    if args.output == "-":  # machine-readable only
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    else:
+        print_table("Crypto / identity hot paths", results)
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nSaved {len(results)} cases to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(results, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
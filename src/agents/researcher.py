@@ -1,33 +1,51 @@
 import logging
 import sys
-import aiohttp
 from aiohttp import web
 from src.common.server import AgentServer
+from src.common.search import SearchCache, TavilySearch, format_results
+from src.common.streaming import StreamVerifier, iter_sse, sse_event
 
 # Configure Logging
 logger = logging.getLogger("researcher-agent")
 
 import os 
-from langchain_community.tools.tavily_search import TavilySearchResults
-from langchain_core.messages import HumanMessage, SystemMessage
 
 # ... (Logging setup same)
 
-# Define Allowed Callers (Authorization Policy)
-ALLOWED_CALLERS = [
-    "spiffe://example.org/ns/ui/sa/frontend"
-]
+# Allowed callers and scopes per route: see the "researcher" section of policy.json
+# (enforced by AgentServer's policy middleware, hot-reloaded on change)
 
-server = AgentServer("researcher", port=8080)
-# Initialize Tavily
-try:
-    search_tool = TavilySearchResults(max_results=3)
-except Exception as e:
-    logger.error(f"Failed Tavily init: {e}")
-    search_tool = None
+WRITER_BASE_URL = os.getenv("WRITER_URL", "https://writer:8080")
+
+server = AgentServer("researcher", port=8080, peers=[WRITER_BASE_URL])
+# Initialize Tavily (async client on the pooled upstream session; never blocks the loop)
+# behind a TTL/LRU cache that coalesces concurrent identical queries
+search_client = TavilySearch(server.pool, max_results=3)
+search_tool = SearchCache(search_client)
+server.stats_providers["search"] = search_client.stats
+server.stats_providers["search_cache"] = search_tool.stats
+if not search_tool.api_key:
+    logger.error("TAVILY_API_KEY NOT FOUND in environment!")
+
+async def run_search(query):
+    logger.info("Executing Tavily Search...")
+    if search_tool.api_key:
+        with server.stage("search"):
+            search_results = format_results(await search_tool.search(query))
+    else:
+        search_results = "Search tool unavailable."
+    logger.info("Search Complete.")
+    return search_results
+
+def build_writer_payload(query, search_results, user_id):
+    return {
+        "content": f"Topic: {query}\n\nsearch Results:\n{search_results}",
+        "original_user": user_id
+    }
 
 @server.routes.post('/ask')
-@server.require_user_context(allowed_callers=ALLOWED_CALLERS)
+@server.rate_limit()
+@server.admission_control()
 async def ask_agent(request):
     data = await request.json()
     query = data.get('query')
@@ -35,26 +53,18 @@ async def ask_agent(request):
     user_id = user_context.get('sub')
     caller_id = request.get('caller_id')
     
-    logger.info(f"RESEARCH REQUEST | Caller: {caller_id} | User: {user_id} | Query: {query}")
+    logger.info("RESEARCH REQUEST | Caller: %s | User: %s | Query: %s", caller_id, user_id, query)
     
     try:
         # 1. Perform Real Search
-        logger.info("Executing Tavily Search...")
-        if search_tool:
-            search_results = search_tool.invoke({"query": query})
-        else:
-            search_results = "Search tool unavailable."
-        logger.info("Search Complete.")
+        search_results = await run_search(query)
         
         # 2. Call Writer Agent (Agent-to-Agent mTLS)
         # We need to act as a Client now.
-        writer_url = "https://writer:8080/process"
+        writer_url = f"{WRITER_BASE_URL}/process"
         
         # Prepare Payload for Writer
-        writer_payload = {
-            "content": f"Topic: {query}\n\nsearch Results:\n{search_results}",
-            "original_user": user_id
-        }
+        writer_payload = build_writer_payload(query, search_results, user_id)
         
         # Identity Propagation: We use OUR SVID (researcher) to call Writer,
         # BUT we MUST forward the User's JWT (Bearer token) to satisfy Writer's requirement.
@@ -62,12 +72,10 @@ async def ask_agent(request):
             "Authorization": request.headers.get("Authorization")
         }
         
-        # Get Client SSL Context
-        ssl_context = server.spiffe.get_client_ssl_context()
-        
-        logger.info(f"Calling Writer Agent at {writer_url} with User Context...")
-        async with aiohttp.ClientSession() as session:
-            async with session.post(writer_url, json=writer_payload, ssl=ssl_context, headers=headers) as resp:
+        # Pooled mTLS session (presents our SVID, reuses warm connections)
+        logger.info("Calling Writer Agent at %s with User Context...", writer_url)
+        with server.stage("writer_hop"):
+            async with server.pool.post(writer_url, json=writer_payload, headers=headers) as resp:
                 if resp.status == 200:
                     writer_resp = await resp.json()
                     # writer_resp is now { "status": "success", "content": { "result": "..." }, "signature": "..." }
@@ -78,17 +86,63 @@ async def ask_agent(request):
                     logger.error(f"Writer call failed: {resp.status} - {error_text}")
                     final_article = f"Error generating article. Search results: {search_results[:200]}..."
 
-        return web.json_response(server.sign_response({
+        return server.signed_json_response({
             "answer": final_article,
             "writer_signature": writer_signature if 'writer_signature' in locals() else None,
             "verified_caller": caller_id
-        }))
+        })
         
     except Exception as e:
         logger.error(f"Error during research: {e}")
         return web.json_response({"status": "error", "message": str(e)}, status=500)
 
 
+@server.routes.post('/ask/stream')
+@server.rate_limit()
+@server.admission_control()
+async def ask_agent_stream(request):
+    """
+    Streaming variant of /ask: relays the Writer's signed SSE events byte-for-byte as they
+    arrive (verifying each one on the way), then appends our own signed `end` event that
+    attests to the Writer stream's final chain digest.
+    """
+    data = await request.json()
+    query = data.get('query')
+    user_id = request.get('user_context').get('sub')
+    caller_id = request.get('caller_id')
+    
+    logger.info("RESEARCH STREAM REQUEST | Caller: %s | User: %s | Query: %s", caller_id, user_id, query)
+    
+    response, stream = await server.open_signed_stream(request)
+    try:
+        search_results = await run_search(query)
+        writer_payload = build_writer_payload(query, search_results, user_id)
+        headers = {
+            "Authorization": request.headers.get("Authorization")
+        }
+        
+        verifier = StreamVerifier()
+        writer_stream = None
+        with server.stage("writer_hop"):
+            async with server.pool.post(f"{WRITER_BASE_URL}/process/stream", json=writer_payload, headers=headers) as resp:
+                if resp.status != 200:
+                    logger.error(f"Writer stream failed: {resp.status} - {await resp.text()}")
+                    await response.write(stream.error(f"Writer call failed: {resp.status}"))
+                    return response
+                async for event, event_data in iter_sse(resp.content):
+                    writer_stream = verifier.feed(event, event_data)["stream"]
+                    await response.write(sse_event(event, event_data))
+        verifier.finish()
+        
+        await response.write(stream.end(
+            verified_caller=caller_id,
+            upstream={"stream": writer_stream, "digest": verifier.digest(writer_stream)} if writer_stream else None
+        ))
+    except Exception as e:
+        logger.error(f"Error during streamed research: {e}")
+        await response.write(stream.error(str(e)))
+    return response
+
 
 if __name__ == "__main__":
     server.run()
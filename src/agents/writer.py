@@ -1,7 +1,9 @@
+import json
 import logging
-import aiohttp
 from aiohttp import web
 from src.common.server import AgentServer
+from src.common.store import ArticleStore
+from src.common.streaming import iter_sse
 
 logger = logging.getLogger("writer-agent")
 
@@ -9,24 +11,75 @@ import os
 
 # ... (Logging setup same)
 
-ALLOWED_CALLERS = [
-    "spiffe://example.org/ns/ui/sa/frontend",
-    "spiffe://example.org/ns/agents/sa/researcher" # Authorized for Phase 2
-]
+# Allowed callers (frontend, and researcher for Phase 2) and scopes per route: see the
+# "writer" section of policy.json (enforced by AgentServer's policy middleware)
 
 server = AgentServer("writer", port=8080)
 
+# Generated articles (and their signed envelopes), keyed by prompt inputs; survives restarts
+article_store = ArticleStore()
+server.stats_providers["article_store"] = article_store.stats
+
 # Gemini API Configuration
 GEMINI_API_KEY = os.getenv("GOOGLE_API_KEY")
-GEMINI_URL = "https://generativelanguage.googleapis.com/v1beta/models/gemini-2.0-flash:generateContent"
+GEMINI_API_URL = os.getenv("GEMINI_API_URL", "https://generativelanguage.googleapis.com").rstrip("/")
+GEMINI_URL = f"{GEMINI_API_URL}/v1beta/models/gemini-2.0-flash:generateContent"
+GEMINI_STREAM_URL = f"{GEMINI_API_URL}/v1beta/models/gemini-2.0-flash:streamGenerateContent?alt=sse"
+# Concurrent Gemini generations per route; excess requests queue fairly per caller (see AdmissionController)
+WRITER_MAX_IN_FLIGHT = int(os.getenv("WRITER_MAX_IN_FLIGHT", "4"))
 
 if GEMINI_API_KEY:
     logger.info(f"Google API Key found (starts with: {GEMINI_API_KEY[:8]}...)")
 else:
     logger.error("GOOGLE_API_KEY NOT FOUND in environment!")
 
+def build_gemini_request(content):
+    """Returns the Gemini request body and headers for the given research notes."""
+    # Prompt Engineering
+    prompt_text = f"""You are an expert technical writer. 
+    Based on the following research notes, write a concise, engaging blog post.
+    
+    Notes:
+    {content}
+    
+    Format: Markdown.
+    """
+    
+    # Prepare Payload for Gemini (as per user's working curl)
+    gemini_payload = {
+        "contents": [
+            {
+                "parts": [
+                    {"text": prompt_text}
+                ]
+            }
+        ]
+    }
+    
+    headers = {
+        "Content-Type": "application/json",
+        "X-goog-api-key": GEMINI_API_KEY
+    }
+    return gemini_payload, headers
+
+async def signed_article_response(key, article, stored=None, store=True):
+    """
+    Returns the signed envelope for `article`, reusing the stored one while it was signed by
+    the current SVID, and re-signing (and re-storing) it otherwise. `store=False` signs
+    without storing (an incomplete generation).
+    """
+    # Read before signing: a rotation in between only causes one extra re-sign later.
+    fingerprint = server.signer.fingerprint
+    if stored is not None and stored.fingerprint == fingerprint:
+        return web.Response(body=stored.body, content_type="application/json")
+    body = server.signed_json_body({"result": article})
+    if store:
+        await article_store.put(key, article, body, fingerprint)
+    return web.Response(body=body, content_type="application/json")
+
 @server.routes.post('/process')
-@server.require_user_context(allowed_callers=ALLOWED_CALLERS)
+@server.rate_limit()
+@server.admission_control(max_in_flight=WRITER_MAX_IN_FLIGHT)
 async def process_content(request):
     data = await request.json()
     content = data.get('content')
@@ -34,50 +87,36 @@ async def process_content(request):
     user_context = request.get('user_context')
     user_id = user_context.get('sub')
     
-    logger.info(f"Writer Request from {caller_id} for User {user_id}")
+    logger.info("Writer Request from %s for User %s", caller_id, user_id)
     
     if not GEMINI_API_KEY:
          return web.json_response({"status": "error", "message": "Writer API Key not configured."})
          
     try:
-        # Prompt Engineering
-        prompt_text = f"""You are an expert technical writer. 
-        Based on the following research notes, write a concise, engaging blog post.
-        
-        Notes:
-        {content}
-        
-        Format: Markdown.
-        """
+        gemini_payload, headers = build_gemini_request(content)
         
-        # Prepare Payload for Gemini (as per user's working curl)
-        gemini_payload = {
-            "contents": [
-                {
-                    "parts": [
-                        {"text": prompt_text}
-                    ]
-                }
-            ]
-        }
-        
-        headers = {
-            "Content-Type": "application/json",
-            "X-goog-api-key": GEMINI_API_KEY
-        }
+        key = ArticleStore.key_for(GEMINI_URL, gemini_payload)
+        stored = await article_store.get(key)
+        if stored is not None:
+            logger.info("Serving stored article (no LLM call).")
+            return await signed_article_response(key, stored.article, stored)
         
         logger.info("Invoking Gemini Writer via Direct REST API...")
-        async with aiohttp.ClientSession() as session:
-            async with session.post(GEMINI_URL, json=gemini_payload, headers=headers) as resp:
+        # Pooled upstream session (public TLS, not mTLS)
+        with server.stage("llm"):
+            async with server.pool.post(GEMINI_URL, mtls=False, json=gemini_payload, headers=headers) as resp:
                 if resp.status == 200:
                     resp_json = await resp.json()
                     # Extract text from response candidate
                     try:
-                        article = resp_json['candidates'][0]['content']['parts'][0]['text']
+                        candidate = resp_json['candidates'][0]
+                        article = candidate['content']['parts'][0]['text']
                         logger.info("Writing Complete.")
-                        return web.json_response(server.sign_response({
-                            "result": article
-                        }))
+                        # As for streams: a SAFETY / MAX_TOKENS stop is served but never stored
+                        finish_reason = candidate.get('finishReason')
+                        if finish_reason != "STOP":
+                            logger.warning("Not storing article: response ended with finishReason %s", finish_reason)
+                        return await signed_article_response(key, article, store=finish_reason == "STOP")
                     except (KeyError, IndexError) as e:
                         logger.error(f"Malformed Gemini response: {resp_json}")
                         return web.json_response({"status": "error", "message": "Refused to generate or malformed response"})
@@ -91,6 +130,67 @@ async def process_content(request):
         return web.json_response({"status": "error", "message": str(e)}, status=500)
 
 
+@server.routes.post('/process/stream')
+@server.rate_limit()
+@server.admission_control(max_in_flight=WRITER_MAX_IN_FLIGHT)
+async def process_content_stream(request):
+    """
+    Streaming variant of /process: relays Gemini's SSE chunks as they are generated,
+    each one signed and hash-chained (see SignedStream).
+    """
+    data = await request.json()
+    content = data.get('content')
+    caller_id = request.get('caller_id')
+    user_id = request.get('user_context').get('sub')
+    
+    logger.info("Writer Stream Request from %s for User %s", caller_id, user_id)
+    
+    if not GEMINI_API_KEY:
+         return web.json_response({"status": "error", "message": "Writer API Key not configured."})
+
+    response, stream = await server.open_signed_stream(request)
+    gemini_payload, headers = build_gemini_request(content)
+    key = ArticleStore.key_for(GEMINI_URL, gemini_payload)
+    try:
+        stored = await article_store.get(key)
+        if stored is not None:
+            logger.info("Streaming stored article (no LLM call).")
+            await response.write(stream.chunk(stored.article))
+            await response.write(stream.end())
+            return response
+
+        parts, finish_reason = [], None
+        logger.info("Invoking Gemini Writer via Streaming REST API...")
+        with server.stage("llm"):
+            async with server.pool.post(GEMINI_STREAM_URL, mtls=False, json=gemini_payload, headers=headers) as resp:
+                if resp.status != 200:
+                    logger.error(f"Gemini API Error {resp.status}: {await resp.text()}")
+                    await response.write(stream.error(f"Gemini API Error: {resp.status}"))
+                    return response
+                async for _, event_data in iter_sse(resp.content):
+                    try:
+                        candidate = json.loads(event_data)['candidates'][0]
+                        finish_reason = candidate.get('finishReason', finish_reason)
+                        text = candidate['content']['parts'][0]['text']
+                    except (ValueError, KeyError, IndexError):
+                        continue  # e.g. a final chunk carrying only finishReason / usage
+                    parts.append(text)
+                    await response.write(stream.chunk(text))
+        await response.write(stream.end())
+        logger.info("Writing Complete (%s chunks streamed).", stream.seq - 1)
+        # Only a complete generation is stored: a SAFETY / MAX_TOKENS stop or a truncated
+        # stream would otherwise be replayed for every later identical request.
+        if finish_reason != "STOP":
+            logger.warning("Not storing article: stream ended with finishReason %s", finish_reason)
+        elif parts:
+            article = "".join(parts)
+            fingerprint = server.signer.fingerprint  # before signing, as in signed_article_response
+            await article_store.put(key, article, server.signed_json_body({"result": article}), fingerprint)
+    except Exception as e:
+        logger.error(f"Streaming failed: {e}")
+        await response.write(stream.error(str(e)))
+    return response
+
 
 if __name__ == "__main__":
     server.run()
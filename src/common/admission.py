@@ -0,0 +1,177 @@
+import os
+import math
+import heapq
+import asyncio
+import logging
+import itertools
+
+logger = logging.getLogger(__name__)
+
+
+class AdmissionRejected(Exception):
+    """A request was not admitted; `status` is 429 (caller over its share) or 503 (saturated)."""
+
+    def __init__(self, status, retry_after, reason):
+        super().__init__(reason)
+        self.status = status
+        self.retry_after = retry_after
+        self.reason = reason
+
+
+class _Waiter:
+    __slots__ = ("caller", "future", "tag", "active")
+
+    def __init__(self, caller, future, tag):
+        self.caller = caller
+        self.future = future
+        self.tag = tag
+        self.active = True
+
+
+class AdmissionController:
+    """
+    Bounds concurrent work for one route.
+
+    - At most `max_in_flight` requests run at once; up to `max_queue` more may wait, each for
+      at most `queue_timeout` seconds (then 503 + Retry-After).
+    - Waiters are dispatched by weighted fair queueing on the caller's SPIFFE ID (start-time
+      tags: every request of a caller advances that caller's virtual clock by 1/weight), so a
+      busy caller cannot starve a quiet one.
+    - When the queue is full, the caller with the most queued requests per unit of weight gives
+      up its newest slot (429); if that caller is not above the newcomer's own, the newcomer is
+      refused with 429.
+
+    All state is confined to the event loop; no locking needed.
+    """
+
+    def __init__(self, max_in_flight=None, max_queue=None, queue_timeout=None, weights=None):
+        self.max_in_flight = max_in_flight or int(os.getenv("ADMISSION_MAX_IN_FLIGHT", "16"))
+        self.max_queue = max_queue if max_queue is not None else int(os.getenv("ADMISSION_MAX_QUEUE", "64"))
+        self.queue_timeout = queue_timeout or float(os.getenv("ADMISSION_QUEUE_TIMEOUT_S", "5"))
+        self.weights = dict(weights or {})
+
+        self.in_flight = 0
+        self._heap = []  # (tag, seq, _Waiter)
+        self._queued = {}  # caller -> [_Waiter, ...] (enqueue order)
+        self._finish_tags = {}  # caller -> last virtual finish tag
+        self._vtime = 0.0
+        self._seq = itertools.count()
+        self._service_time = 0.1  # EWMA seconds, for Retry-After hints
+
+        self.admitted = 0
+        self.queued_total = 0
+        self.rejected_429 = 0
+        self.rejected_503 = 0
+
+    @property
+    def queue_length(self):
+        return sum(len(q) for q in self._queued.values())
+
+    # --- Acquire / release ---
+
+    async def acquire(self, caller):
+        """Waits for an in-flight slot for `caller`; raises AdmissionRejected instead of waiting too long."""
+        if self.in_flight < self.max_in_flight and not self._queued:
+            self.in_flight += 1
+            self.admitted += 1
+            return
+
+        if self.queue_length >= self.max_queue:
+            self._make_room(caller)
+
+        waiter = self._enqueue(caller)
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter.future), self.queue_timeout)
+        except asyncio.TimeoutError:
+            if not waiter.future.done():
+                self._dequeue(waiter)
+                self.rejected_503 += 1
+                raise AdmissionRejected(503, self.retry_after(), "Queue deadline exceeded")
+        except asyncio.CancelledError:
+            if waiter.future.done() and not waiter.future.cancelled() and waiter.future.exception() is None:
+                self.release()  # slot was handed over just as the caller went away
+            else:
+                self._dequeue(waiter)
+            raise
+        waiter.future.result()  # re-raises AdmissionRejected if pushed out of the queue
+
+    def release(self, service_time=None):
+        """Frees a slot (handing it to the next fair-queued waiter); `service_time` feeds Retry-After."""
+        if service_time is not None:
+            self._service_time = 0.8 * self._service_time + 0.2 * service_time
+        self.in_flight -= 1
+        while self._heap:
+            tag, _, waiter = heapq.heappop(self._heap)
+            if not waiter.active:
+                continue
+            self._remove_queued(waiter)
+            self._vtime = tag
+            self.in_flight += 1
+            self.admitted += 1
+            waiter.future.set_result(None)
+            return
+
+    # --- Queue bookkeeping ---
+
+    def _enqueue(self, caller):
+        weight = self.weights.get(caller, 1.0)
+        tag = max(self._vtime, self._finish_tags.get(caller, 0.0)) + 1.0 / weight
+        self._finish_tags[caller] = tag
+        waiter = _Waiter(caller, asyncio.get_running_loop().create_future(), tag)
+        heapq.heappush(self._heap, (tag, next(self._seq), waiter))
+        self._queued.setdefault(caller, []).append(waiter)
+        self.queued_total += 1
+        return waiter
+
+    def _dequeue(self, waiter):
+        if waiter.active:
+            waiter.active = False
+            self._remove_queued(waiter)
+            # Give back the virtual time this request had reserved.
+            if self._finish_tags.get(waiter.caller) == waiter.tag:
+                self._finish_tags[waiter.caller] -= 1.0 / self.weights.get(waiter.caller, 1.0)
+
+    def _remove_queued(self, waiter):
+        waiter.active = False
+        queue = self._queued.get(waiter.caller)
+        if queue is not None:
+            queue.remove(waiter)
+            if not queue:
+                del self._queued[waiter.caller]
+
+    def _share(self, caller):
+        """Queued requests of `caller` per unit of weight (what fair queueing equalizes)."""
+        return len(self._queued.get(caller, ())) / self.weights.get(caller, 1.0)
+
+    def _make_room(self, caller):
+        """Queue full: push out the newest request of the caller most over its weighted share, or refuse."""
+        if not self._queued:
+            self.rejected_503 += 1
+            raise AdmissionRejected(503, self.retry_after(), "Server saturated")
+        hog = max(self._queued, key=self._share)
+        if hog == caller or self._share(hog) <= self._share(caller):
+            self.rejected_429 += 1
+            raise AdmissionRejected(429, self.retry_after(), "Caller queue share exceeded")
+        victim = self._queued[hog][-1]
+        self._dequeue(victim)
+        self.rejected_429 += 1
+        logger.info(f"Displaced queued request from {hog} in favour of {caller}")
+        victim.future.set_exception(AdmissionRejected(429, self.retry_after(), "Displaced by fair queueing"))
+
+    def retry_after(self) -> int:
+        """Seconds until a slot is likely free (queue drained at the observed service rate)."""
+        backlog = self.queue_length + 1
+        return max(1, math.ceil(self._service_time * backlog / self.max_in_flight))
+
+    def stats(self):
+        return {
+            "in_flight": self.in_flight,
+            "max_in_flight": self.max_in_flight,
+            "queued": self.queue_length,
+            "max_queue": self.max_queue,
+            "admitted": self.admitted,
+            "queued_total": self.queued_total,
+            "rejected_429": self.rejected_429,
+            "rejected_503": self.rejected_503,
+            "service_time_ms": round(self._service_time * 1000, 1),
+        }
@@ -1,28 +1,181 @@
+import os
 import time
+import hashlib
 import logging
-from authlib.jose import jwt, jwk
+import threading
+from collections import OrderedDict
+from authlib.jose import jwt, JsonWebKey
+from authlib.jose.rfc7517 import Key
 from cryptography.hazmat.primitives import serialization
-from cryptography.hazmat.primitives.asymmetric import rsa
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519, rsa
 
 logger = logging.getLogger(__name__)
 
+# User-token signature algorithms the mesh accepts (RFC 7518 / RFC 8037 names).
+SUPPORTED_ALGORITHMS = ("RS256", "ES256", "EdDSA")
+
+class VerifiedTokenCache:
+    """
+    Bounded LRU of already-verified token claims, keyed by SHA-256 of the token.
+    An entry is served until the token's `exp`; the whole cache is dropped when
+    the verification key set changes.
+    """
+    def __init__(self, max_size=None):
+        self.max_size = max_size or int(os.getenv("JWT_CACHE_SIZE", "1024"))
+        self._entries = OrderedDict()  # digest -> (claims, exp)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def digest(token):
+        return hashlib.sha256(token.encode() if isinstance(token, str) else token).digest()
+
+    def get(self, digest):
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is not None:
+                if time.time() <= entry[1]:
+                    self._entries.move_to_end(digest)
+                    self.hits += 1
+                    return entry[0]
+                del self._entries[digest]
+            self.misses += 1
+            return None
+
+    def put(self, digest, claims):
+        exp = claims.get("exp")
+        if not exp:
+            return  # Never cache tokens without an expiry
+        with self._lock:
+            self._entries[digest] = (claims, exp)
+            self._entries.move_to_end(digest)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+class UnknownKeyError(PermissionError):
+    """Raised when a token's `kid` is not in the current verification key set."""
+    def __init__(self, kid):
+        super().__init__(f"Unknown signing key: {kid}")
+        self.kid = kid
+
+
 class JWTManager:
     """
     Handles JWT Creation (Signing) and Verification.
+    Verification keys are indexed by `kid` so a key rollover can publish old and new keys side by side.
+    Keys are parsed once when set; signing, verification and JWKS export reuse the loaded objects.
+    The signing algorithm (RS256, ES256 or EdDSA) follows the key type unless given explicitly;
+    each verification key only accepts tokens whose header `alg` matches its own key type.
     """
-    def __init__(self, private_key_pem=None, public_key_pem=None):
+    def __init__(self, private_key_pem=None, public_key_pem=None, kid="mesh-key-1", alg=None):
+        self.token_cache = VerifiedTokenCache()
+        self.kid = kid
+        self.public_keys = {}  # kid -> loaded public key (authlib JsonWebKey)
+        self._key_algs = {}  # kid -> the only `alg` accepted for that key
+        self._thumbprints = {}
+        self._jwks = None
         self.private_key = private_key_pem
+        self.alg = alg or (self.algorithm_for_key(self._signing_key) if self._signing_key else "RS256")
+        if self.alg not in SUPPORTED_ALGORITHMS:
+            raise ValueError(f"Unsupported JWT algorithm: {self.alg}")
+        if self._signing_key is not None and self.algorithm_for_key(self._signing_key) != self.alg:
+            raise ValueError(f"Private key type does not match algorithm {self.alg}")
         self.public_key = public_key_pem
         self.issuer = "frontend.mesh.local"
         self.audience = "ai-agent-mesh"
 
+    @property
+    def private_key(self):
+        return self._private_key_pem
+
+    @private_key.setter
+    def private_key(self, value):
+        self._private_key_pem = value
+        self._signing_key = JsonWebKey.import_key(value) if value else None
+
+    @property
+    def public_key(self):
+        """Our own verification key as PEM (or the only/first known key on a pure verifier)."""
+        key = self.public_keys.get(self.kid)
+        if key is None and self.public_keys:
+            key = next(iter(self.public_keys.values()))
+        return key.as_pem().decode() if key is not None else None
+
+    @public_key.setter
+    def public_key(self, value):
+        self.set_public_keys({self.kid: value} if value else {})
+
+    def set_public_keys(self, keys):
+        """Replaces the verification key set ({kid: PEM or JsonWebKey}) and rebuilds the JWKS document."""
+        loaded = {
+            kid: key if isinstance(key, Key) else JsonWebKey.import_key(key)
+            for kid, key in keys.items()
+        }
+        thumbprints = {kid: key.thumbprint() for kid, key in loaded.items()}
+
+        # A new key set invalidates everything verified with the old one.
+        if thumbprints != self._thumbprints:
+            self.token_cache.clear()
+        self._thumbprints = thumbprints
+        self.public_keys = loaded
+        self._key_algs = {kid: self.algorithm_for_key(key) for kid, key in loaded.items()}
+        self._jwks = self._build_jwks(loaded, self._key_algs) if loaded else None
+
+    @staticmethod
+    def _build_jwks(keys, algs):
+        jwks = []
+        for kid, key in keys.items():
+            entry = key.as_dict(is_private=False)  # kty/crv/x/y or kty/n/e per key type
+            entry['kid'] = kid
+            entry['use'] = 'sig'
+            entry['alg'] = algs[kid]
+            jwks.append(entry)
+        return {"keys": jwks}
+
+    @staticmethod
+    def algorithm_for_key(key):
+        """Maps a loaded JsonWebKey to its JWS algorithm (RSA -> RS256, P-256 -> ES256, Ed25519 -> EdDSA)."""
+        params = key.as_dict(is_private=False)
+        kty, crv = params.get("kty"), params.get("crv")
+        if kty == "RSA":
+            return "RS256"
+        if kty == "EC" and crv == "P-256":
+            return "ES256"
+        if kty == "OKP" and crv == "Ed25519":
+            return "EdDSA"
+        raise ValueError(f"Unsupported key type for mesh tokens: {kty} {crv or ''}".rstrip())
+
     @classmethod
-    def generate_keypair(cls):
-        """Generates a new RSA keypair for the Mesh."""
-        private_key = rsa.generate_private_key(
-            public_exponent=65537,
-            key_size=2048,
-        )
+    def generate_keypair(cls, alg="RS256"):
+        """Generates a new keypair for the Mesh: RSA-2048 (RS256), EC P-256 (ES256) or Ed25519 (EdDSA)."""
+        if alg == "RS256":
+            private_key = rsa.generate_private_key(
+                public_exponent=65537,
+                key_size=2048,
+            )
+        elif alg == "ES256":
+            private_key = ec.generate_private_key(ec.SECP256R1())
+        elif alg == "EdDSA":
+            private_key = ed25519.Ed25519PrivateKey.generate()
+        else:
+            raise ValueError(f"Unsupported JWT algorithm: {alg}")
         private_pem = private_key.private_bytes(
             encoding=serialization.Encoding.PEM,
             format=serialization.PrivateFormat.PKCS8,
@@ -36,7 +189,7 @@ class JWTManager:
 
     def create_token(self, user_id, email, scope="mesh:all"):
         """Signs a 1-hour JWT for the given user."""
-        if not self.private_key:
+        if self._signing_key is None:
             raise ValueError("Private key required for signing")
 
         now = int(time.time())
@@ -49,34 +202,56 @@ class JWTManager:
             "email": email,
             "scope": scope
         }
-        header = {"alg": "RS256", "typ": "JWT", "kid": "mesh-key-1"}
+        header = {"alg": self.alg, "typ": "JWT", "kid": self.kid}
         
-        token = jwt.encode(header, payload, self.private_key)
+        token = jwt.encode(header, payload, self._signing_key)
         return token.decode() if isinstance(token, bytes) else token
 
     def get_jwks(self):
-        """Returns the public key in JWKS format."""
-        if not self.public_key:
+        """Returns the public keys in JWKS format (precomputed; treat as read-only)."""
+        if self._jwks is None:
             raise ValueError("Public key required for JWKS")
-        
-        # Create a JWK from the PEM
-        key = jwk.dumps(self.public_key, kty='RSA')
-        key['kid'] = "mesh-key-1"
-        key['use'] = 'sig'
-        key['alg'] = 'RS256'
-        
-        return {"keys": [key]}
+        return self._jwks
+
+    def _find_public_key(self, header, payload):
+        """
+        Key resolver for jwt.decode: selects the verification key by the token header's `kid`
+        and rejects any `alg` other than the one that key was published for.
+        """
+        kid = header.get("kid")
+        key = self.public_keys.get(kid)
+        if key is None and kid is None and len(self.public_keys) == 1:
+            kid, key = next(iter(self.public_keys.items()))
+        if key is None:
+            raise UnknownKeyError(kid)
+        if header.get("alg") != self._key_algs[kid]:
+            raise PermissionError(f"Algorithm {header.get('alg')} not allowed for key {kid}")
+        return key
 
     def verify_token(self, token, public_key_pem=None):
-        """Verifies the JWT signature and claims."""
-        key = public_key_pem or self.public_key
-        if not key:
-            raise ValueError("Public key required for verification")
+        """
+        Verifies the JWT signature and claims.
+        Without an explicit key, the key is looked up by `kid` (UnknownKeyError if absent)
+        and tokens already verified are served from the token cache.
+        """
+        digest = None
+        if public_key_pem is None:
+            key = self._find_public_key
+            digest = VerifiedTokenCache.digest(token)
+            claims = self.token_cache.get(digest)
+            if claims is not None:
+                return claims
+        else:
+            key = public_key_pem
 
         try:
             claims = jwt.decode(token, key)
             claims.validate()
+            if digest is not None:
+                self.token_cache.put(digest, claims)
             return claims
+        except UnknownKeyError:
+            raise
         except Exception as e:
             logger.error(f"JWT Verification failed: {e}")
             raise PermissionError(f"Invalid Token: {e}")
@@ -0,0 +1,141 @@
+import os
+import re
+import time
+import asyncio
+import logging
+from authlib.jose import JsonWebKey
+
+logger = logging.getLogger(__name__)
+
+_MAX_AGE = re.compile(r"max-age=(\d+)")
+
+
+class JWKSStore:
+    """
+    Keeps a JWTManager's verification keys in sync with the Identity Provider's JWKS.
+
+    - Keys are indexed by `kid`; every published key is loaded (key rollover safe).
+    - A background task refreshes periodically, honouring `Cache-Control: max-age`
+      and revalidating with `If-None-Match` / `ETag` (a 304 keeps the current set).
+    - An unknown `kid` triggers an on-demand refetch that is single-flight (concurrent
+      callers share one fetch) and rate limited by a minimum refetch interval.
+    """
+
+    def __init__(self, url, pool, jwt_manager, refresh_interval=None, min_refetch_interval=None):
+        self.url = url
+        self.pool = pool
+        self.jwt_manager = jwt_manager
+        self.refresh_interval = refresh_interval or float(os.getenv("JWKS_REFRESH_INTERVAL_S", "300"))
+        self.min_refetch_interval = min_refetch_interval or float(os.getenv("JWKS_MIN_REFETCH_S", "10"))
+
+        self.etag = None
+        self.max_age = None
+        self.last_fetch = 0.0
+        self.last_ok = False
+        self.fetches = 0
+        self._inflight = None
+        self._task = None
+
+    # --- Lookup ---
+
+    async def ensure_kid(self, kid) -> bool:
+        """
+        Makes sure `kid` is loaded, refetching at most once per `min_refetch_interval`.
+        Returns True if the key is available afterwards.
+        """
+        if kid in self.jwt_manager.public_keys:
+            return True
+        if self._inflight is None and time.monotonic() - self.last_fetch < self.min_refetch_interval:
+            return False
+        await self.refresh()
+        return kid in self.jwt_manager.public_keys or (kid is None and len(self.jwt_manager.public_keys) == 1)
+
+    # --- Fetching ---
+
+    async def refresh(self) -> bool:
+        """Fetches the JWKS; concurrent callers await the same in-flight request."""
+        if self._inflight is None:
+            self._inflight = asyncio.ensure_future(self._fetch())
+            self._inflight.add_done_callback(self._clear_inflight)
+        return await asyncio.shield(self._inflight)
+
+    def _clear_inflight(self, future):
+        self._inflight = None
+
+    async def _fetch(self) -> bool:
+        self.last_ok = await self._fetch_once()
+        return self.last_ok
+
+    async def _fetch_once(self) -> bool:
+        logger.info(f"Refreshing JWKS from {self.url}...")
+        self.last_fetch = time.monotonic()
+        self.fetches += 1
+        headers = {"If-None-Match": self.etag} if self.etag else {}
+        try:
+            async with self.pool.get(self.url, headers=headers) as resp:
+                if resp.status == 304:
+                    self._read_cache_headers(resp)
+                    logger.info("JWKS unchanged (304).")
+                    return True
+                if resp.status != 200:
+                    logger.error(f"Failed to fetch JWKS: {resp.status} {await resp.text()}")
+                    return False
+                self._read_cache_headers(resp)
+                jwks = await resp.json()
+        except Exception as e:
+            logger.error(f"Error fetching JWKS: {e}")
+            return False
+
+        keys = {}
+        for entry in jwks.get("keys", []):
+            try:
+                keys[entry.get("kid")] = JsonWebKey.import_key(entry)
+            except Exception as e:
+                logger.warning(f"Skipping unusable JWK {entry.get('kid')}: {e}")
+        if not keys:
+            logger.error("JWKS contained no usable keys; keeping current key set.")
+            return False
+
+        self.jwt_manager.set_public_keys(keys)
+        logger.info(f"✓ JWKS refreshed: {len(keys)} key(s) cached ({', '.join(map(str, keys))}).")
+        return True
+
+    def _read_cache_headers(self, resp):
+        self.etag = resp.headers.get("ETag", self.etag)
+        match = _MAX_AGE.search(resp.headers.get("Cache-Control", ""))
+        self.max_age = int(match.group(1)) if match else None
+
+    # --- Background refresh ---
+
+    def next_refresh_delay(self) -> float:
+        if not self.last_ok:
+            return self.min_refetch_interval  # retry failed fetches sooner
+        if self.max_age is not None:
+            return max(self.min_refetch_interval, float(self.max_age))
+        return self.refresh_interval
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._refresh_loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _refresh_loop(self):
+        while True:
+            await asyncio.sleep(self.next_refresh_delay())
+            await self.refresh()
+
+    def stats(self):
+        return {
+            "kids": list(self.jwt_manager.public_keys),
+            "fetches": self.fetches,
+            "etag": self.etag,
+            "max_age": self.max_age,
+        }
@@ -0,0 +1,159 @@
+import json
+import hashlib
+import logging
+import functools
+import threading
+import orjson
+from authlib.common.encoding import urlsafe_b64decode, urlsafe_b64encode
+from authlib.jose import JsonWebSignature
+from cryptography.hazmat.primitives import serialization
+
+logger = logging.getLogger(__name__)
+
+
+def canonical_json(data) -> bytes:
+    """
+    Deterministic JSON encoding used as the signed payload: sorted keys, no whitespace, UTF-8.
+    Signer and verifier both re-derive these bytes, so they are independent of how the
+    envelope itself was serialized on the wire.
+
+    orjson is required, not an optional accelerator: the stdlib encoder formats some floats
+    differently (`1e-07` vs `1e-7`), which would break verification between hosts.
+    """
+    return orjson.dumps(data, option=orjson.OPT_SORT_KEYS)
+
+
+class _SigningState:
+    """Everything about a JWS that depends only on the SVID, prepared once per generation."""
+    __slots__ = ("generation", "protected_segment", "detached_segment", "algorithm", "key", "spiffe_id",
+                 "fingerprint")
+
+    def __init__(self, generation, protected_segment, detached_segment, algorithm, key, spiffe_id):
+        self.generation = generation
+        self.protected_segment = protected_segment
+        self.detached_segment = detached_segment
+        self.algorithm = algorithm
+        self.key = key
+        self.spiffe_id = spiffe_id
+        # Stable across restarts (unlike `generation`): changes whenever the SVID chain does.
+        self.fingerprint = hashlib.sha256(protected_segment).hexdigest()[:32]
+
+
+class SVIDSigner:
+    """
+    Signs response payloads as JWS with the workload's X.509-SVID (compact, or RFC 7797 detached).
+
+    The protected header (alg, kid = SPIFFE ID, x5c = certificate chain) is encoded and the
+    signing key is loaded once per SVID generation, so a response only pays for the payload
+    encoding and one signature. The state is rebuilt on rotation (on the Workload API thread)
+    and lazily if a stale generation is ever observed.
+    """
+
+    def __init__(self, spiffe):
+        self.spiffe = spiffe
+        self._lock = threading.Lock()
+        self._state = None
+        spiffe.add_rotation_listener(self._on_rotation)
+
+    def sign_compact(self, payload: bytes) -> str:
+        """Returns `BASE64URL(header).BASE64URL(payload).BASE64URL(signature)`."""
+        state = self._current()
+        signing_input = state.protected_segment + b"." + urlsafe_b64encode(payload)
+        signature = urlsafe_b64encode(state.algorithm.sign(signing_input, state.key))
+        return (signing_input + b"." + signature).decode("ascii")
+
+    def sign_detached(self, payload: bytes) -> str:
+        """
+        RFC 7797 detached, unencoded-payload JWS: `BASE64URL(header)..BASE64URL(signature)`.
+        The payload is signed as raw bytes (no base64) and travels separately.
+        """
+        state = self._current()
+        signing_input = state.detached_segment + b"." + payload
+        signature = urlsafe_b64encode(state.algorithm.sign(signing_input, state.key))
+        return (state.detached_segment + b".." + signature).decode("ascii")
+
+    @property
+    def fingerprint(self) -> str:
+        """Identifies the SVID (key + chain) signatures are currently made with."""
+        return self._current().fingerprint
+
+    def _current(self) -> _SigningState:
+        state = self._state
+        if state is not None and state.generation == self.spiffe.generation:
+            return state
+        with self._lock:
+            state = self._state
+            if state is None or state.generation != self.spiffe.generation:
+                state = self._state = self._build()
+            return state
+
+    def _build(self) -> _SigningState:
+        # Read the generation before the SVID: a concurrent rotation can only make the
+        # snapshot newer than its tag, which triggers one extra rebuild, never a stale signature.
+        generation = self.spiffe.generation
+        svid = self.spiffe.get_svid()
+        alg = self.spiffe.x509_algorithm(svid.private_key)
+        header = {
+            "alg": alg,
+            "kid": str(svid.spiffe_id),
+            "x5c": [cert.public_bytes(serialization.Encoding.PEM).decode() for cert in svid.cert_chain],
+        }
+        detached = dict(header, b64=False, crit=["b64"])
+        algorithm = JsonWebSignature.ALGORITHMS_REGISTRY[alg]
+        return _SigningState(
+            generation,
+            urlsafe_b64encode(json.dumps(header, separators=(",", ":")).encode("utf-8")),
+            urlsafe_b64encode(json.dumps(detached, separators=(",", ":")).encode("utf-8")),
+            algorithm,
+            algorithm.prepare_key(svid.private_key),
+            header["kid"],
+        )
+
+    def _on_rotation(self):
+        try:
+            with self._lock:
+                self._state = self._build()
+        except Exception as e:
+            logger.error(f"Failed to prepare response signer after rotation: {e}")
+
+
+@functools.lru_cache(maxsize=64)
+def _x5c_key(alg, cert_pem):
+    """Verification key from the leaf certificate (agents reuse one SVID per generation)."""
+    return JsonWebSignature.ALGORITHMS_REGISTRY[alg].prepare_key(cert_pem)
+
+
+def verify_signature(token: str, content=None) -> dict:
+    """
+    Verifies a response signature against the leaf certificate in its `x5c` header and returns
+    the protected header. Accepts detached (`b64: false`) signatures over `canonical_json(content)`
+    as well as the older compact form with an embedded payload.
+    Raises ValueError on any failure.
+    """
+    try:
+        header_segment, payload_segment, signature_segment = token.encode("ascii").split(b".")
+        header = json.loads(urlsafe_b64decode(header_segment))
+        signature = urlsafe_b64decode(signature_segment)
+    except Exception as e:
+        raise ValueError(f"Malformed JWS: {e}")
+
+    alg = header.get("alg")
+    x5c = header.get("x5c")
+    if not x5c:
+        raise ValueError("Missing certificate chain")
+    if alg not in ("RS256", "ES256"):
+        raise ValueError(f"Unsupported algorithm: {alg}")
+
+    if header.get("b64") is False:
+        if "b64" not in header.get("crit", []) or payload_segment:
+            raise ValueError("Malformed detached JWS")
+        if content is None:
+            raise ValueError("Detached signature requires the signed content")
+        signing_input = header_segment + b"." + canonical_json(content)
+    else:
+        signing_input = header_segment + b"." + payload_segment
+
+    key = _x5c_key(alg, x5c[0])
+    if not JsonWebSignature.ALGORITHMS_REGISTRY[alg].verify(signing_input, signature, key):
+        raise ValueError("Bad signature")
+    return header
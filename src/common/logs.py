@@ -0,0 +1,217 @@
+import os
+import sys
+import queue
+import atexit
+import logging
+import datetime
+import contextvars
+import orjson
+from logging.handlers import QueueHandler, QueueListener
+
+# Per-request fields (caller SPIFFE ID, user sub) attached to every record emitted while
+# handling the request; set by AgentServer's authorize middleware.
+_log_context = contextvars.ContextVar("mesh_log_context", default=None)
+
+TEXT_FORMAT = (
+    "%(asctime)s %(levelname)s [service.name=%(service_name)s] "
+    "[trace_id=%(otelTraceID)s span_id=%(otelSpanID)s] "
+    "[%(name)s] %(message)s"
+)
+
+_pipeline = None
+_exception_formatter = logging.Formatter()
+
+
+def bind_log_context(**fields):
+    """Adds fields (e.g. caller=..., user=...) to the log context of the current request task."""
+    current = _log_context.get()
+    _log_context.set({**current, **fields} if current else fields)
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: timestamp, level, service, logger, message, trace and request fields."""
+
+    def __init__(self, service_name):
+        super().__init__()
+        self.service_name = service_name
+
+    def format(self, record):
+        entry = {
+            "ts": datetime.datetime.fromtimestamp(record.created, datetime.timezone.utc).isoformat(),
+            "level": record.levelname,
+            "service": self.service_name,
+            "logger": record.name,
+            "msg": record.getMessage(),
+            "trace_id": getattr(record, "otelTraceID", "0"),
+            "span_id": getattr(record, "otelSpanID", "0"),
+        }
+        context = getattr(record, "context", None)
+        if context:
+            entry.update(context)
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return orjson.dumps(entry, default=str).decode("utf-8")
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keeps a fraction of the sub-WARNING records of selected loggers (hot-path lines).
+    `rates` maps logger-name prefixes to keep ratios, e.g. {"researcher-agent": 0.1};
+    sampling is deterministic (every 1/rate-th record), warnings and errors are never dropped.
+    """
+
+    def __init__(self, rates):
+        super().__init__()
+        self.rates = dict(rates)
+        self._credit = {}
+        self._rate_for = {}
+        self.sampled_out = 0
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING or not self.rates:
+            return True
+        name = record.name
+        rate = self._rate_for.get(name)
+        if rate is None:
+            rate = self._rate_for[name] = self._match(name)
+        if rate >= 1.0:
+            return True
+        # First record of a logger is kept, then every 1/rate-th (epsilon absorbs float drift)
+        credit = self._credit.get(name, 1.0 - rate) + rate
+        if credit >= 1.0 - 1e-9:
+            self._credit[name] = credit - 1.0
+            return True
+        self._credit[name] = credit
+        self.sampled_out += 1
+        return False
+
+    def _match(self, name):
+        best = None
+        for prefix in self.rates:
+            if (name == prefix or name.startswith(prefix + ".")) and (best is None or len(prefix) > len(best)):
+                best = prefix
+        return self.rates[best] if best is not None else 1.0
+
+    @staticmethod
+    def parse(spec):
+        """Parses `LOG_SAMPLE_RATES` ("researcher-agent=0.1,src.common=0.5")."""
+        rates = {}
+        for item in filter(None, (part.strip() for part in (spec or "").split(","))):
+            name, _, rate = item.partition("=")
+            rates[name.strip()] = min(1.0, max(0.0, float(rate)))
+        return rates
+
+
+class BoundedQueueHandler(QueueHandler):
+    """
+    Enqueues records without blocking; when the queue is full the record is dropped and counted.
+    The message and any traceback are rendered to strings here, while `args` and the exception
+    are still what the caller logged; only JSON / text formatting runs on the listener thread.
+    """
+
+    def __init__(self, record_queue):
+        super().__init__(record_queue)
+        self.dropped = 0
+        self.enqueued = 0
+
+    def prepare(self, record):
+        # Capture the request context now (context variables are per task)
+        context = _log_context.get()
+        if context:
+            record.context = context
+        # Like QueueHandler.prepare: nothing mutable (args, traceback frames) crosses threads
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            if not record.exc_text:
+                record.exc_text = _exception_formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+            self.enqueued += 1
+        except queue.Full:
+            self.dropped += 1
+
+
+class _Listener(QueueListener):
+    def enqueue_sentinel(self):
+        # Blocking put: on shutdown the writer drains a full queue instead of losing the sentinel
+        self.queue.put(self._sentinel)
+
+
+class LogPipeline:
+    """Root-logger setup: bounded queue + sampling on the caller's side, formatting/writing on a thread."""
+
+    def __init__(self, service_name, fmt=None, queue_size=None, sample_rates=None):
+        self.service_name = service_name
+        self.fmt = fmt or os.getenv("LOG_FORMAT", "json")
+        self.queue_size = queue_size or int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+        self.sampler = SamplingFilter(
+            sample_rates if sample_rates is not None else SamplingFilter.parse(os.getenv("LOG_SAMPLE_RATES")))
+        self.handler = BoundedQueueHandler(queue.Queue(self.queue_size))
+        self.handler.addFilter(self.sampler)
+        self.listener = None
+        self.outputs = []
+
+    def formatter(self):
+        if self.fmt == "json":
+            return JsonFormatter(self.service_name)
+        # Records that never passed through the instrumented factory lack the injected fields
+        defaults = {"otelTraceID": "0", "otelSpanID": "0", "service_name": self.service_name}
+        return logging.Formatter(TEXT_FORMAT, defaults=defaults)
+
+    def install(self, root=None):
+        """
+        Moves the root logger's console handlers (or a new stderr handler) behind the queue.
+        Other handlers (e.g. test log capture) are left attached directly.
+        """
+        root = root or logging.getLogger()
+        self.outputs = [h for h in root.handlers if type(h) is logging.StreamHandler]
+        if not root.handlers:
+            root.setLevel(logging.INFO)
+        for h in self.outputs:
+            root.removeHandler(h)
+        if not self.outputs:
+            self.outputs = [logging.StreamHandler(sys.stderr)]
+        formatter = self.formatter()
+        for h in self.outputs:
+            h.setFormatter(formatter)
+
+        self.listener = _Listener(self.handler.queue, *self.outputs, respect_handler_level=True)
+        self.listener.start()
+        root.addHandler(self.handler)
+        atexit.register(self.stop)
+        return self
+
+    def stop(self):
+        """Flushes queued records and stops the writer thread."""
+        if self.listener is not None:
+            self.listener.stop()
+            self.listener = None
+
+    def stats(self):
+        return {
+            "format": self.fmt,
+            "queued": self.handler.queue.qsize(),
+            "max_queue": self.queue_size,
+            "enqueued": self.handler.enqueued,
+            "dropped": self.handler.dropped,
+            "sampled_out": self.sampler.sampled_out,
+        }
+
+
+def setup_logging(service_name):
+    """Installs the process-wide logging pipeline once; returns it."""
+    global _pipeline
+    if _pipeline is None:
+        _pipeline = LogPipeline(service_name).install()
+    return _pipeline
+
+
+def logging_stats():
+    return _pipeline.stats() if _pipeline is not None else {}
@@ -0,0 +1,198 @@
+import time
+import bisect
+import contextvars
+
+# Default latency buckets (seconds): sub-millisecond crypto up to multi-second LLM calls
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# (route, caller) of the request being handled; set once per request by AgentServer's
+# instrument middleware so stage timings deep in the call stack need no request object.
+_request_labels = contextvars.ContextVar("metrics_request_labels", default=("", ""))
+
+
+def set_request_labels(route, caller):
+    _request_labels.set((route, caller))
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _label_text(names, values, extra=""):
+    pairs = ",".join(f'{n}="{_escape(v)}"' for n, v in zip(names, values))
+    if extra:
+        pairs = f"{pairs},{extra}" if pairs else extra
+    return "{" + pairs + "}" if pairs else ""
+
+
+def _number(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonic counter per label-value tuple. `inc` is one dict lookup and an add."""
+
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+
+    def inc(self, *labels, amount=1):
+        values = self._values
+        values[labels] = values.get(labels, 0) + amount
+
+    def value(self, *labels):
+        return self._values.get(labels, 0)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for labels, value in self._values.items():
+            lines.append(f"{self.name}{_label_text(self.labelnames, labels)} {_number(value)}")
+        return lines
+
+
+class _HistogramChild:
+    __slots__ = ("counts", "sum")
+
+    def __init__(self, size):
+        self.counts = [0] * size  # per bucket (not cumulative); last slot is +Inf
+        self.sum = 0.0
+
+
+class Histogram:
+    """
+    Fixed-bucket histogram per label-value tuple. `observe` is a dict lookup, a bisect over
+    the bucket bounds and two adds; cumulative bucket counts are only computed on render.
+    """
+
+    def __init__(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._children = {}
+
+    def observe(self, value, *labels):
+        child = self._children.get(labels)
+        if child is None:
+            child = self._children[labels] = _HistogramChild(len(self.buckets) + 1)
+        child.counts[bisect.bisect_left(self.buckets, value)] += 1
+        child.sum += value
+
+    def count(self, *labels):
+        child = self._children.get(labels)
+        return sum(child.counts) if child else 0
+
+    def merged(self, **match):
+        """Bucket counts summed over every child whose labels equal `match` (e.g. stage="llm")."""
+        positions = [(self.labelnames.index(name), value) for name, value in match.items()]
+        counts = [0] * (len(self.buckets) + 1)
+        for labels, child in self._children.items():
+            if all(labels[i] == value for i, value in positions):
+                counts = [a + b for a, b in zip(counts, child.counts)]
+        return counts
+
+    def quantile(self, q, **match):
+        """
+        Estimated q-quantile (0..1) of the matching observations, interpolated linearly within
+        the bucket it falls in (as PromQL's histogram_quantile does); None without observations.
+        """
+        counts = self.merged(**match)
+        total = sum(counts)
+        if not total:
+            return None
+        rank = q * total
+        cumulative, lower = 0, 0.0
+        for upper, count in zip(self.buckets, counts):
+            if count and cumulative + count >= rank:
+                return lower + (upper - lower) * (rank - cumulative) / count
+            cumulative += count
+            lower = upper
+        return self.buckets[-1]  # in the +Inf bucket: the largest finite bound is all we know
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        bounds = [_number(float(b)) for b in self.buckets] + ["+Inf"]
+        for labels, child in self._children.items():
+            cumulative = 0
+            for bound, count in zip(bounds, child.counts):
+                cumulative += count
+                le = f'le="{bound}"'
+                lines.append(f"{self.name}_bucket{_label_text(self.labelnames, labels, le)} {cumulative}")
+            label_text = _label_text(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_text} {_number(child.sum)}")
+            lines.append(f"{self.name}_count{label_text} {cumulative}")
+        return lines
+
+
+class _StageTimer:
+    """Context manager behind `MetricsRegistry.stage` (a plain class: about half the cost of @contextmanager)."""
+    __slots__ = ("registry", "stage", "start")
+
+    def __init__(self, registry, stage):
+        self.registry = registry
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.registry.observe_stage(self.stage, time.perf_counter() - self.start)
+        return False
+
+
+class MetricsRegistry:
+    """
+    Minimal Prometheus-style registry (text exposition format 0.0.4).
+
+    Observations happen on the event loop thread only, so no locking is needed.
+    """
+
+    CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+    def __init__(self, namespace="mesh", buckets=DEFAULT_BUCKETS):
+        self.namespace = namespace
+        self._metrics = []
+
+        self.requests = self.counter(
+            "requests_total", "Requests handled, by route, caller SPIFFE ID and status.",
+            ("route", "caller", "status"))
+        self.request_seconds = self.histogram(
+            "request_duration_seconds", "Request latency, by route and caller SPIFFE ID.", ("route", "caller"),
+            buckets)
+        self.stage_seconds = self.histogram(
+            "stage_duration_seconds",
+            "Latency of hot-path stages (tls_handshake, verify_token, search, llm, writer_hop, sign).",
+            ("stage", "route", "caller"), buckets)
+
+    def counter(self, name, help_text, labelnames=()):
+        metric = Counter(f"{self.namespace}_{name}", help_text, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+        metric = Histogram(f"{self.namespace}_{name}", help_text, labelnames, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def observe_stage(self, stage, seconds, route=None, caller=None):
+        """Records a stage timing, labelled with the current request's route / caller by default."""
+        if route is None or caller is None:
+            current_route, current_caller = _request_labels.get()
+            route = current_route if route is None else route
+            caller = current_caller if caller is None else caller
+        self.stage_seconds.observe(seconds, stage, route, caller)
+
+    def stage(self, stage):
+        """`with metrics.stage("search"): ...` times the block (awaits inside included)."""
+        return _StageTimer(self, stage)
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,161 @@
+import os
+import json
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_POLICY_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "agents", "policy.json")
+
+ANY_CALLER = "*"
+
+
+class PolicyRule:
+    """Compiled decision for one (method, route): who may call it and which user scopes it needs."""
+    __slots__ = ("callers", "scopes", "user")
+
+    def __init__(self, callers, scopes, user):
+        self.callers = callers  # frozenset of SPIFFE IDs, or None for any authenticated workload
+        self.scopes = scopes  # frozenset of scopes the user token must all carry
+        self.user = user  # whether a user context (JWT) is required at all
+
+    def allows_caller(self, caller_id) -> bool:
+        return self.callers is None or caller_id in self.callers
+
+    def missing_scopes(self, user_context):
+        """Scopes required by the rule that the token's space-separated `scope` claim lacks."""
+        if not self.scopes:
+            return frozenset()
+        return self.scopes.difference((user_context.get("scope") or "").split())
+
+
+def compile_policy(document, service_name):
+    """
+    Compiles the policy document's section for `service_name` into a decision table:
+    `{(METHOD, route path): PolicyRule}`. Raises ValueError on malformed or conflicting rules.
+
+    Document format (JSON):
+
+        {"services": {"writer": [
+            {"routes": ["POST /process"], "callers": ["spiffe://..."], "scopes": ["mesh:all"]},
+            {"routes": ["GET /health"], "callers": "*", "user": false}
+        ]}}
+    """
+    rules = document.get("services", {}).get(service_name)
+    if rules is None:
+        raise ValueError(f"Policy has no section for service '{service_name}'")
+
+    table = {}
+    for entry in rules:
+        callers = entry.get("callers", [])
+        if callers == ANY_CALLER:
+            callers = None
+        elif isinstance(callers, list) and all(isinstance(c, str) and c.startswith("spiffe://") for c in callers):
+            callers = frozenset(callers)
+        else:
+            raise ValueError(f"Invalid callers in policy rule {entry.get('routes')}: {callers!r}")
+        rule = PolicyRule(callers, frozenset(entry.get("scopes", ())), bool(entry.get("user", True)))
+
+        for route in entry.get("routes", ()):
+            method, _, path = route.partition(" ")
+            method = method.upper()
+            if not path.startswith("/"):
+                raise ValueError(f"Invalid route in policy: {route!r} (expected 'METHOD /path')")
+            # aiohttp registers HEAD alongside every GET route
+            for key in [(method, path)] + ([("HEAD", path)] if method == "GET" else []):
+                if key in table:
+                    raise ValueError(f"Route {key[0]} {key[1]} appears in more than one policy rule")
+                table[key] = rule
+    return table
+
+
+class PolicyEngine:
+    """
+    Authorization decisions for one service, from a declarative policy file.
+
+    - The file is compiled into a hash-indexed table, so a decision is one dict lookup plus one
+      set membership test, independent of how many identities or routes the policy lists.
+    - A background task polls the file's mtime and swaps in a freshly compiled table when it
+      changes; a file that fails to parse or compile is logged and the previous table is kept.
+    """
+
+    def __init__(self, service_name, path=None, reload_interval=None):
+        self.service_name = service_name
+        self.path = path or os.getenv("MESH_POLICY_PATH", DEFAULT_POLICY_PATH)
+        self.reload_interval = reload_interval or float(os.getenv("MESH_POLICY_RELOAD_S", "2"))
+        self.table = {}
+        self.mtime = None
+        self.loads = 0
+        self.load_errors = 0
+        self.allowed = 0
+        self.denied = 0
+        self._task = None
+        self.load()
+
+    def lookup(self, method, path):
+        """The rule for a matched route, or None (deny: the route is not in the policy)."""
+        return self.table.get((method, path))
+
+    def record(self, allowed):
+        if allowed:
+            self.allowed += 1
+        else:
+            self.denied += 1
+
+    # --- Loading ---
+
+    def load(self) -> bool:
+        """(Re)compiles the policy file; keeps the current table if it is missing or invalid."""
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+            with open(self.path, "r", encoding="utf-8") as f:
+                table = compile_policy(json.load(f), self.service_name)
+        except (OSError, ValueError) as e:
+            self.load_errors += 1
+            logger.error(f"Failed to load authorization policy {self.path}: {e}; keeping {len(self.table)} route(s).")
+            return False
+        self.table = table
+        self.mtime = mtime
+        self.loads += 1
+        logger.info(f"✓ Authorization policy loaded: {len(table)} route(s) for '{self.service_name}'.")
+        return True
+
+    def reload_if_changed(self) -> bool:
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except OSError:
+            return False
+        if mtime == self.mtime:
+            return False
+        self.mtime = mtime  # don't retry a broken file until it changes again
+        return self.load()
+
+    # --- Background reload ---
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._reload_loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _reload_loop(self):
+        while True:
+            await asyncio.sleep(self.reload_interval)
+            self.reload_if_changed()
+
+    def stats(self):
+        return {
+            "path": self.path,
+            "routes": len(self.table),
+            "loads": self.loads,
+            "load_errors": self.load_errors,
+            "allowed": self.allowed,
+            "denied": self.denied,
+        }
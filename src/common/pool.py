@@ -0,0 +1,176 @@
+import os
+import asyncio
+import logging
+import aiohttp
+from yarl import URL
+
+logger = logging.getLogger(__name__)
+
+
+class _PeerSession:
+    """A long-lived ClientSession for one peer origin, tagged with the SVID generation it was built for."""
+    __slots__ = ("session", "generation", "in_flight")
+
+    def __init__(self, session, generation):
+        self.session = session
+        self.generation = generation
+        self.in_flight = 0
+
+
+class _PooledRequest:
+    """Async context manager mirroring `session.request(...)` while tracking in-flight use."""
+
+    def __init__(self, pool, method, url, mtls, kwargs):
+        self._pool = pool
+        self._method = method
+        self._url = url
+        self._mtls = mtls
+        self._kwargs = kwargs
+        self._peer = None
+        self._resp = None
+
+    async def __aenter__(self) -> aiohttp.ClientResponse:
+        self._peer = self._pool._acquire(self._url, self._mtls)
+        self._peer.in_flight += 1
+        try:
+            self._resp = await self._peer.session.request(self._method, self._url, **self._kwargs)
+        except BaseException:
+            self._peer.in_flight -= 1
+            raise
+        return self._resp
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self._resp.release()
+        self._peer.in_flight -= 1
+
+
+class MeshSessionPool:
+    """
+    Owns long-lived, keep-alive aiohttp sessions, one per peer origin.
+
+    - Mesh peers (`mtls=True`) present the current SVID via SpiffeHelper's cached client context.
+    - Upstream APIs (`mtls=False`, e.g. Gemini/Tavily) use the default public trust store.
+    - Each session has its own connector with a per-host connection limit and a DNS cache.
+    - When the SVID rotates, mesh sessions are swapped for fresh ones and the old ones are
+      drained (closed once their in-flight requests finish), then warmed peers are re-warmed.
+
+    Sessions are bound to the event loop they were first used on.
+    """
+
+    def __init__(self, spiffe=None, limit_per_host=None, keepalive_timeout=None, dns_ttl=None, drain_timeout=None):
+        self.spiffe = spiffe
+        self.limit_per_host = limit_per_host or int(os.getenv("MESH_POOL_LIMIT_PER_HOST", "32"))
+        self.keepalive_timeout = keepalive_timeout or float(os.getenv("MESH_POOL_KEEPALIVE_S", "60"))
+        self.dns_ttl = dns_ttl or int(os.getenv("MESH_POOL_DNS_TTL_S", "300"))
+        self.drain_timeout = drain_timeout or float(os.getenv("MESH_POOL_DRAIN_TIMEOUT_S", "30"))
+
+        self._peers = {}  # (origin, mtls) -> _PeerSession
+        self._warm = {}  # origin -> connections to keep warm
+        self._draining = set()
+        self._background = set()
+        self._loop = None
+
+        if spiffe is not None:
+            spiffe.add_rotation_listener(self._on_rotation)
+
+    # --- Request API (same shape as aiohttp.ClientSession) ---
+
+    def request(self, method, url, mtls=True, **kwargs) -> _PooledRequest:
+        return _PooledRequest(self, method, url, mtls, kwargs)
+
+    def get(self, url, mtls=True, **kwargs) -> _PooledRequest:
+        return self.request("GET", url, mtls=mtls, **kwargs)
+
+    def post(self, url, mtls=True, **kwargs) -> _PooledRequest:
+        return self.request("POST", url, mtls=mtls, **kwargs)
+
+    # --- Lifecycle ---
+
+    async def warm_up(self, peers, connections=2):
+        """
+        Pre-establishes `connections` mTLS connections to each peer origin (via its /health route)
+        so the first real request does not pay the TCP+TLS handshake. Failures are non-fatal.
+        """
+        origins = {str(URL(peer).origin()): connections for peer in peers}
+        self._warm.update(origins)
+        await self._warm_origins(origins)
+
+    async def _warm_origins(self, origins):
+        async def touch(origin):
+            try:
+                async with self.get(f"{origin}/health") as resp:
+                    await resp.read()
+            except Exception as e:
+                logger.warning(f"Warm-up of {origin} failed: {e}")
+
+        await asyncio.gather(*(touch(o) for o, n in origins.items() for _ in range(n)))
+        if origins:
+            logger.info(f"Connection pool warmed: {', '.join(origins)}")
+
+    async def close(self):
+        """Closes every pooled session immediately (application shutdown)."""
+        peers, self._peers = list(self._peers.values()) + list(self._draining), {}
+        self._draining.clear()
+        for task in list(self._background):
+            task.cancel()
+        for peer in peers:
+            await peer.session.close()
+
+    # --- Internals ---
+
+    def _acquire(self, url, mtls) -> _PeerSession:
+        if self._loop is None:
+            self._loop = asyncio.get_running_loop()
+
+        key = (str(URL(url).origin()), mtls)
+        generation = self.spiffe.generation if mtls else 0
+        peer = self._peers.get(key)
+        if peer is not None and peer.generation == generation and not peer.session.closed:
+            return peer
+
+        if peer is not None:
+            self._drain(peer)
+        peer = _PeerSession(self._new_session(mtls), generation)
+        self._peers[key] = peer
+        return peer
+
+    def _new_session(self, mtls) -> aiohttp.ClientSession:
+        connector = aiohttp.TCPConnector(
+            ssl=self.spiffe.get_client_ssl_context() if mtls else True,
+            limit=0,
+            limit_per_host=self.limit_per_host,
+            keepalive_timeout=self.keepalive_timeout,
+            use_dns_cache=True,
+            ttl_dns_cache=self.dns_ttl,
+        )
+        return aiohttp.ClientSession(connector=connector)
+
+    def _drain(self, peer):
+        self._draining.add(peer)
+        task = asyncio.get_running_loop().create_task(self._close_when_idle(peer))
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
+    async def _close_when_idle(self, peer):
+        deadline = self._loop.time() + self.drain_timeout
+        while peer.in_flight > 0 and self._loop.time() < deadline:
+            await asyncio.sleep(0.05)
+        self._draining.discard(peer)
+        await peer.session.close()
+
+    def _on_rotation(self):
+        """SpiffeHelper rotation listener (Workload API thread): hand over to the event loop."""
+        if self._loop is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._recycle)
+
+    def _recycle(self):
+        generation = self.spiffe.generation
+        stale = [key for key, peer in self._peers.items() if key[1] and peer.generation != generation]
+        for key in stale:
+            self._drain(self._peers.pop(key))
+        if stale:
+            logger.info(f"SVID rotated: draining {len(stale)} pooled mTLS session(s)")
+        if self._warm:
+            task = self._loop.create_task(self._warm_origins(dict(self._warm)))
+            self._background.add(task)
+            task.add_done_callback(self._background.discard)
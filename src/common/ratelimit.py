@@ -0,0 +1,79 @@
+import time
+import logging
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+# Retry-After hint (seconds) from a bucket that never refills (rate 0, e.g. a blocked route)
+NO_REFILL_RETRY_AFTER = 60.0
+
+
+class TokenBuckets:
+    """
+    In-memory token buckets, one per key (a user `sub` or a caller SPIFFE ID).
+
+    - Each bucket holds up to `burst` tokens and refills at `rate` tokens per second.
+    - `take(key)` is O(1): one dict lookup, one refill computation, one LRU move.
+    - Memory is bounded: buckets idle for longer than `idle_ttl` are evicted from the LRU head
+      as new keys arrive (an evicted bucket was full again anyway once idle for burst / rate),
+      and never more than `max_keys` buckets are kept.
+    """
+
+    def __init__(self, rate, burst, idle_ttl=None, max_keys=100_000, clock=time.monotonic):
+        self.rate = float(rate)
+        self.burst = float(burst)
+        # Idle this long means the bucket has refilled completely: forgetting it is lossless.
+        # A bucket that never refills is only dropped by the `max_keys` bound.
+        self.idle_ttl = idle_ttl or (max(60.0, self.burst / self.rate) if self.rate else float("inf"))
+        self.max_keys = max_keys
+        self._clock = clock
+        self._buckets = OrderedDict()  # key -> [tokens, last_refill]
+
+        self.allowed = 0
+        self.limited = 0
+        self.evictions = 0
+
+    def take(self, key) -> float:
+        """Consumes one token for `key`; returns 0.0 on success, otherwise seconds until one is available."""
+        now = self._clock()
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            self._evict_idle(now)
+            bucket = self._buckets[key] = [self.burst, now]
+        else:
+            bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+            bucket[1] = now
+            self._buckets.move_to_end(key)
+
+        if bucket[0] >= 1.0:
+            bucket[0] -= 1.0
+            self.allowed += 1
+            return 0.0
+        self.limited += 1
+        return (1.0 - bucket[0]) / self.rate if self.rate else NO_REFILL_RETRY_AFTER
+
+    def give_back(self, key):
+        """Returns a token taken by `take` (e.g. when another limit rejected the same request)."""
+        bucket = self._buckets.get(key)
+        if bucket is not None:
+            bucket[0] = min(self.burst, bucket[0] + 1.0)
+            self.allowed -= 1
+
+    def _evict_idle(self, now):
+        # The LRU head is the least recently used bucket; stop at the first one still active.
+        while self._buckets:
+            key, (_, last) = next(iter(self._buckets.items()))
+            if now - last < self.idle_ttl and len(self._buckets) < self.max_keys:
+                break
+            del self._buckets[key]
+            self.evictions += 1
+
+    def stats(self):
+        return {
+            "keys": len(self._buckets),
+            "rate": self.rate,
+            "burst": self.burst,
+            "allowed": self.allowed,
+            "limited": self.limited,
+            "evictions": self.evictions,
+        }
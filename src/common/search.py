@@ -0,0 +1,206 @@
+import os
+import re
+import time
+import asyncio
+import logging
+import unicodedata
+from collections import OrderedDict
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+
+class SearchError(Exception):
+    """Raised when the search API fails, times out or returns an unusable response."""
+
+
+class SearchResult:
+    """One web search hit."""
+    __slots__ = ("title", "url", "content", "score")
+
+    def __init__(self, title, url, content, score=None):
+        self.title = title
+        self.url = url
+        self.content = content
+        self.score = score
+
+    def as_dict(self):
+        return {"title": self.title, "url": self.url, "content": self.content, "score": self.score}
+
+    def __repr__(self):
+        return f"SearchResult({self.url!r})"
+
+
+def format_results(results) -> str:
+    """Renders search results as prompt-friendly text (one numbered block per source)."""
+    if not results:
+        return "No search results."
+    return "\n\n".join(
+        f"[{i}] {r.title}\n{r.url}\n{r.content}" for i, r in enumerate(results, 1)
+    )
+
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_query(query: str) -> str:
+    """Cache key for a query: Unicode-normalized, case-folded, single-spaced, trailing ?!. dropped."""
+    query = unicodedata.normalize("NFKC", query).casefold()
+    return _WHITESPACE.sub(" ", query).strip().rstrip("?!. ")
+
+
+class TavilySearch:
+    """
+    asyncio-native Tavily search client on a MeshSessionPool upstream session.
+
+    - Requests reuse the pool's keep-alive connections to the API (public TLS, no SVID).
+    - At most `max_concurrency` searches are in flight; further callers wait their turn.
+    - Each request is bounded by `timeout` seconds.
+    - `ainvoke({"query": ...})` mirrors LangChain's TavilySearchResults tool output.
+    """
+
+    def __init__(self, pool, api_key=None, base_url=None, max_results=3, timeout=None, max_concurrency=None):
+        self.pool = pool
+        self.api_key = api_key or os.getenv("TAVILY_API_KEY")
+        self.url = (base_url or os.getenv("TAVILY_API_URL", "https://api.tavily.com")).rstrip("/") + "/search"
+        self.max_results = max_results
+        self.timeout = timeout or float(os.getenv("TAVILY_TIMEOUT_S", "15"))
+        self.max_concurrency = max_concurrency or int(os.getenv("TAVILY_MAX_CONCURRENCY", "8"))
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        self.requests = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.in_flight = 0
+
+    async def search(self, query, max_results=None, search_depth="basic") -> list:
+        """Runs one search and returns a list of SearchResult (best first)."""
+        body = {
+            "query": query,
+            "max_results": max_results or self.max_results,
+            "search_depth": search_depth,
+        }
+        headers = {"Authorization": f"Bearer {self.api_key}"} if self.api_key else {}
+
+        async with self._semaphore:
+            self.requests += 1
+            self.in_flight += 1
+            try:
+                async with self.pool.post(self.url, mtls=False, json=body, headers=headers,
+                                          timeout=aiohttp.ClientTimeout(total=self.timeout)) as resp:
+                    if resp.status != 200:
+                        raise SearchError(f"Tavily API Error {resp.status}: {(await resp.text())[:200]}")
+                    data = await resp.json()
+            except asyncio.TimeoutError:
+                self.timeouts += 1
+                raise SearchError(f"Tavily search timed out after {self.timeout}s")
+            except aiohttp.ClientError as e:
+                self.errors += 1
+                raise SearchError(f"Tavily search failed: {e}")
+            except SearchError:
+                self.errors += 1
+                raise
+            finally:
+                self.in_flight -= 1
+
+        try:
+            return [
+                SearchResult(r["title"], r["url"], r["content"], r.get("score"))
+                for r in data.get("results", [])
+            ]
+        except (KeyError, TypeError, AttributeError) as e:
+            self.errors += 1
+            raise SearchError(f"Malformed Tavily response: {e}")
+
+    async def ainvoke(self, tool_input):
+        """Drop-in for `TavilySearchResults.ainvoke`: accepts {"query": ...} or a string."""
+        query = tool_input["query"] if isinstance(tool_input, dict) else tool_input
+        return [r.as_dict() for r in await self.search(query)]
+
+    def stats(self):
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "timeouts": self.timeouts,
+            "in_flight": self.in_flight,
+            "max_concurrency": self.max_concurrency,
+        }
+
+
+class SearchCache:
+    """
+    Researcher-side cache in front of a search client.
+
+    - Keyed by the normalized query (and result count), so trivially different phrasings
+      of the same question share an entry.
+    - Entries live for `ttl` seconds; the cache holds at most `max_size` queries (LRU).
+    - Concurrent identical misses are coalesced: one upstream search, every caller gets
+      its result (or its error). Failures are never cached.
+
+    Returned result lists are shared between callers and must not be mutated.
+    """
+
+    def __init__(self, client, ttl=None, max_size=None):
+        self.client = client
+        self.ttl = ttl or float(os.getenv("SEARCH_CACHE_TTL_S", "300"))
+        self.max_size = max_size or int(os.getenv("SEARCH_CACHE_SIZE", "512"))
+        self._entries = OrderedDict()  # key -> (results, expires_at)
+        self._inflight = {}  # key -> Future
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+
+    @property
+    def api_key(self):
+        return self.client.api_key
+
+    async def search(self, query, max_results=None) -> list:
+        key = (normalize_query(query), max_results or self.client.max_results)
+        entry = self._entries.get(key)
+        if entry is not None:
+            if time.monotonic() < entry[1]:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            del self._entries[key]
+
+        future = self._inflight.get(key)
+        if future is not None:
+            self.coalesced += 1
+        else:
+            self.misses += 1
+            future = self._inflight[key] = asyncio.ensure_future(self._fetch(key, query, max_results))
+            future.add_done_callback(lambda f: self._inflight.pop(key, None))
+        # Shielded: one caller giving up must not cancel the search for the others.
+        return await asyncio.shield(future)
+
+    async def _fetch(self, key, query, max_results):
+        results = await self.client.search(query, max_results=max_results)
+        self._entries[key] = (results, time.monotonic() + self.ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+        return results
+
+    async def ainvoke(self, tool_input):
+        query = tool_input["query"] if isinstance(tool_input, dict) else tool_input
+        return [r.as_dict() for r in await self.search(query)]
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl_s": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "evictions": self.evictions,
+            "in_flight": len(self._inflight),
+            "hit_ratio": round((self.hits + self.coalesced) / lookups, 3) if lookups else 0.0,
+        }
@@ -1,11 +1,21 @@
+import os
+import math
+import time
 import logging
-import asyncio
 import functools
-import aiohttp
 from aiohttp import web
 from src.common.spiffe import SpiffeHelper
-from src.common.auth import JWTManager
-from src.common.tracing import setup_tracing
+from src.common.admission import AdmissionController, AdmissionRejected
+from src.common.ratelimit import TokenBuckets
+from src.common.policy import PolicyEngine
+from src.common.auth import JWTManager, UnknownKeyError
+from src.common.jwks import JWKSStore
+from src.common.jws import SVIDSigner, canonical_json
+from src.common.pool import MeshSessionPool
+from src.common.streaming import SignedStream
+from src.common.tracing import setup_tracing, tracing_stats
+from src.common.logs import bind_log_context, logging_stats
+from src.common.metrics import MetricsRegistry, set_request_labels
 
 logger = logging.getLogger(__name__)
 
@@ -15,24 +25,56 @@ class AgentServer:
     Runs an AIOHTTP service secured by SPIFFE mTLS.
     """
     
-    def __init__(self, service_name, port=8080, spiffe_helper: SpiffeHelper = None):
+    def __init__(self, service_name, port=8080, spiffe_helper: SpiffeHelper = None, peers=None):
         self.service_name = service_name
         self.port = port
+        # Mesh peers (base URLs) to pre-connect to at startup
+        self.peers = list(peers or [])
         
         # Initialize Observability (OTEL)
         setup_tracing(service_name)
         
         self.spiffe = spiffe_helper or SpiffeHelper()
-        self.app = web.Application()
+        # Declarative authorization (routes x SPIFFE IDs x scopes), enforced by one middleware
+        self.policy = PolicyEngine(service_name)
+        # Prometheus-style counters / latency histograms, served on /metrics
+        self.metrics = MetricsRegistry()
+        self.app = web.Application(middlewares=[self.instrument, self.authorize])
         self.routes = web.RouteTableDef()
+        # Response signing (JWS header + key prepared once per SVID generation)
+        self.signer = SVIDSigner(self.spiffe)
+        
+        # Long-lived outbound sessions (mesh peers over mTLS + upstream APIs)
+        self.pool = MeshSessionPool(self.spiffe)
+        self.app.on_startup.append(self._on_startup)
+        self.app.on_cleanup.append(self._on_cleanup)
         
         # JWT Management (Human Identity)
         self.jwt_manager = JWTManager()
-        self.jwks_url = "https://frontend:8080/debug/jwks"
+        self.jwks_url = os.getenv("MESH_JWKS_URL", "https://frontend:8080/debug/jwks")
+        self.jwks = JWKSStore(self.jwks_url, self.pool, self.jwt_manager)
         
         # Standard Health Check
         self.app.router.add_get('/health', self.health_check)
         self.app.router.add_get('/debug/routes', self.debug_routes)
+        self.app.router.add_get('/debug/stats', self.debug_stats)
+        # Scrapers must present an SVID; METRICS_ALLOWED_IDS narrows it to specific SPIFFE IDs
+        metrics_ids = [i for i in os.getenv("METRICS_ALLOWED_IDS", "").split(",") if i]
+        self.app.router.add_get('/metrics', self.require_identity(metrics_ids or None)(self.metrics_endpoint))
+        # Agent-specific counters exposed on /debug/stats (name -> zero-arg callable)
+        self.stats_providers = {"policy": self.policy.stats, "logging": logging_stats,
+                                "tracing": tracing_stats}
+        # Per-route admission controllers (see `admission_control`)
+        self.admission = {}
+        self.stats_providers["admission"] = lambda: {
+            name: controller.stats() for name, controller in self.admission.items()
+        }
+        # Per-route token buckets (see `rate_limit`)
+        self.rate_limits = {}
+        self.stats_providers["rate_limits"] = lambda: {
+            name: {kind: buckets.stats() for kind, buckets in limits.items()}
+            for name, limits in self.rate_limits.items()
+        }
         
     async def health_check(self, request):
         return web.json_response({"status": "healthy", "service": self.service_name})
@@ -47,30 +89,37 @@ class AgentServer:
             })
         return web.json_response(routes_info)
 
+    async def debug_stats(self, request):
+        return web.json_response({
+            "token_cache": self.jwt_manager.token_cache.stats(),
+            "jwks": self.jwks.stats(),
+            **{name: provider() for name, provider in self.stats_providers.items()},
+        })
+
+    async def metrics_endpoint(self, request):
+        return web.Response(body=self.metrics.render().encode("utf-8"),
+                            headers={"Content-Type": MetricsRegistry.CONTENT_TYPE})
+
+    def stage(self, name):
+        """Times a hot-path stage of the current request: `with server.stage("search"): ...`"""
+        return self.metrics.stage(name)
+
+    async def _on_startup(self, app):
+        # Initial JWKS sync, then pre-connect to downstream agents.
+        # Runs on the serving loop so pooled sessions are bound to it.
+        await self.refresh_jwks()
+        self.jwks.start()
+        self.policy.start()
+        await self.pool.warm_up(self.peers)
+
+    async def _on_cleanup(self, app):
+        await self.jwks.stop()
+        await self.policy.stop()
+        await self.pool.close()
+
     async def refresh_jwks(self):
         """Fetches the Public Keys from the Frontend Gateway (via mTLS)"""
-        logger.info(f"Refreshing JWKS from {self.jwks_url}...")
-        ssl_context = self.spiffe.get_client_ssl_context()
-        
-        try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(self.jwks_url, ssl=ssl_context) as resp:
-                    if resp.status == 200:
-                        jwks = await resp.json()
-                        # Simple logic: extract first key and convert to PEM
-                        # In a multi-key setup, we'd use Kid.
-                        from authlib.jose import jwk
-                        public_key = jwk.loads(jwks)
-                        
-                        # Convert to PEM for the JWTManager
-                        pem = public_key.as_pem().decode()
-                        
-                        self.jwt_manager.public_key = pem
-                        logger.info("✓ JWKS refreshed and Public Key cached.")
-                    else:
-                        logger.error(f"Failed to fetch JWKS: {resp.status} {await resp.text()}")
-        except Exception as e:
-            logger.error(f"Error fetching JWKS: {e}")
+        return await self.jwks.refresh()
 
     def run(self):
         """
@@ -79,20 +128,13 @@ class AgentServer:
         # 1. Start SPIFFE Source (Get SVID)
         self.spiffe.start()
         
-        # 1.1 Fetch JWKS (Initial sync)
-        # We need to run this in a loop or before starting the server
-        loop = asyncio.get_event_loop()
-        if loop.is_running():
-            asyncio.create_task(self.refresh_jwks())
-        else:
-            loop.run_until_complete(self.refresh_jwks())
+        # 1.1 JWKS sync and peer warm-up happen in _on_startup (on the server's loop)
         
         # 2. Configure SSL Context for the Server
-        # (Requires Client Certs)
+        # (Requires Client Certs; swaps in rotated SVIDs per handshake, no restart needed)
         ssl_context = self.spiffe.get_server_ssl_context()
         
-        # 3. Basic Middleware for Identity logging (simplified)
-        # Real authz happens in specific handlers or middleware
+        # 3. Authorization is enforced per route by the policy middleware (`authorize`)
         
         logger.info(f"Starting Secure Agent Server '{self.service_name}' on port {self.port}...")
         self.app.add_routes(self.routes)
@@ -100,28 +142,27 @@ class AgentServer:
 
     # Decorator to enforce caller identity
     def require_identity(self, allowed_ids):
+        allowed = frozenset(allowed_ids) if allowed_ids else None
+
         def decorator(handler):
             @functools.wraps(handler)
             async def wrapped(request):
-                # Retrieve the peer cert from the transport
-                transport = request.transport
-                peercert = transport.get_extra_info('peercert')
+                # Peer identity is resolved once per connection (at handshake), not per request
+                peer = self.spiffe.peer_identity(request.transport)
                 
-                if not peercert:
+                if peer is None:
                     # Should be impossible with ssl.CERT_REQUIRED but safety net
                     raise web.HTTPForbidden(text="No Client Certificate presented")
 
-                try:
-                    caller_id = self.spiffe.validate_spiffe_id(
-                        peercert, 
-                        allowed_spiffe_ids=allowed_ids
-                    )
-                    # Inject caller_id into request for logic to use
-                    request['caller_id'] = caller_id
-                except PermissionError as e:
-                    logger.warning(f"Unauthorized access attempt: {e}")
-                    raise web.HTTPForbidden(text=str(e))
+                if allowed is not None and peer.spiffe_id not in allowed:
+                    logger.warning(f"Unauthorized access attempt: Peer ID {peer.spiffe_id} "
+                                   f"(serial {peer.serial}) is not in allowed list")
+                    raise web.HTTPForbidden(text=f"Peer ID {peer.spiffe_id} is not in allowed list")
                 
+                # Inject caller_id into request for logic to use
+                request['caller_id'] = peer.spiffe_id
+                request['peer'] = peer
+                bind_log_context(caller=peer.spiffe_id)
                 return await handler(request)
             return wrapped
         return decorator
@@ -138,63 +179,213 @@ class AgentServer:
             @self.require_identity(allowed_callers)
             @functools.wraps(handler)
             async def wrapped(request):
-                auth_header = request.headers.get("Authorization")
-                if not auth_header or not auth_header.startswith("Bearer "):
-                    raise web.HTTPUnauthorized(text="Missing or invalid Authorization header")
-                
-                token = auth_header.split(" ")[1]
-                
+                await self.verify_user_context(request)
+                return await handler(request)
+            return wrapped
+        return decorator
+
+    async def verify_user_context(self, request):
+        """
+        Verifies the `Authorization: Bearer <JWT>` user token and stores its claims in
+        `request['user_context']`. Raises HTTPUnauthorized when it is missing or invalid.
+        """
+        auth_header = request.headers.get("Authorization")
+        if not auth_header or not auth_header.startswith("Bearer "):
+            raise web.HTTPUnauthorized(text="Missing or invalid Authorization header")
+        
+        token = auth_header.split(" ")[1]
+        
+        try:
+            with self.metrics.stage("verify_token"):
                 try:
-                    # Verify the token using our cached Public Key
+                    # Verify the token against the key named by its `kid`
                     user_context = self.jwt_manager.verify_token(token)
-                    request['user_context'] = user_context
-                    logger.info(f"Verified User Context: {user_context['sub']} ({user_context['email']})")
-                except PermissionError as e:
-                    logger.warning(f"User Authentication Failed: {e}")
-                    raise web.HTTPUnauthorized(text=str(e))
-                except Exception as e:
-                    logger.error(f"Internal error during JWT verification: {e}")
-                    # If we don't have a public key yet, try one more refresh
-                    if not self.jwt_manager.public_key:
-                        await self.refresh_jwks()
-                        # Retry once
-                        try:
-                            user_context = self.jwt_manager.verify_token(token)
-                            request['user_context'] = user_context
-                        except:
-                            raise web.HTTPUnauthorized(text="Identity Provider public key not available")
-                    else:
-                        raise web.HTTPUnauthorized(text="Session verification failed")
+                except UnknownKeyError as e:
+                    # Key rollover (or no keys yet): single-flight, rate-limited JWKS refetch, then retry once
+                    if not await self.jwks.ensure_kid(e.kid):
+                        raise
+                    user_context = self.jwt_manager.verify_token(token)
+            request['user_context'] = user_context
+            bind_log_context(user=user_context['sub'])
+            logger.debug("Verified User Context: %s (%s)", user_context['sub'], user_context['email'])
+        except UnknownKeyError as e:
+            logger.warning(f"User Authentication Failed: {e}")
+            raise web.HTTPUnauthorized(text="Identity Provider public key not available")
+        except PermissionError as e:
+            logger.warning(f"User Authentication Failed: {e}")
+            raise web.HTTPUnauthorized(text=str(e))
+        except Exception as e:
+            logger.error(f"Internal error during JWT verification: {e}")
+            raise web.HTTPUnauthorized(text="Session verification failed")
+        return user_context
+
+    @web.middleware
+    async def instrument(self, request, handler):
+        """
+        Counts every request (including ones denied further down) and records its latency,
+        labelled by matched route and caller SPIFFE ID; also publishes those labels for stage
+        timings and records the connection's TLS handshake time on its first request.
+        """
+        resource = request.match_info.route.resource
+        route = resource.canonical if resource is not None else "unmatched"
+        peer = self.spiffe.peer_identity(request.transport)
+        caller = peer.spiffe_id if peer is not None else ""
+        if peer is not None and peer.handshake_seconds is not None:
+            self.metrics.observe_stage("tls_handshake", peer.handshake_seconds, route="", caller=caller)
+            peer.handshake_seconds = None
+        set_request_labels(route, caller)
+
+        start = time.perf_counter()
+        status = 500
+        try:
+            response = await handler(request)
+            status = response.status
+            return response
+        except web.HTTPException as e:
+            status = e.status
+            raise
+        finally:
+            self.metrics.requests.inc(route, caller, str(status))
+            self.metrics.request_seconds.observe(time.perf_counter() - start, route, caller)
+
+    @web.middleware
+    async def authorize(self, request, handler):
+        """
+        Single enforcement point for the authorization policy (see PolicyEngine): resolves the
+        peer's SPIFFE ID, looks up the matched route's compiled rule, and verifies the user
+        token and scopes when the rule requires them. Routes missing from the policy are denied.
+        """
+        resource = request.match_info.route.resource
+        if resource is None:
+            return await handler(request)  # unmatched (404 / 405): nothing to authorize
 
+        rule = self.policy.lookup(request.method, resource.canonical)
+        peer = self.spiffe.peer_identity(request.transport)  # memoized per connection
+        caller_id = peer.spiffe_id if peer is not None else None
+        if rule is None or caller_id is None or not rule.allows_caller(caller_id):
+            self.policy.record(False)
+            logger.warning(f"Policy denied {request.method} {request.path} for {caller_id}"
+                           f" (serial {peer.serial if peer else None})")
+            raise web.HTTPForbidden(text="Caller not authorized for this route")
+        request['caller_id'] = caller_id
+        request['peer'] = peer
+        bind_log_context(caller=caller_id)
+
+        if rule.user:
+            user_context = await self.verify_user_context(request)
+            missing = rule.missing_scopes(user_context)
+            if missing:
+                self.policy.record(False)
+                logger.warning(f"Policy denied {request.path} for {user_context.get('sub')}: missing scopes {sorted(missing)}")
+                raise web.HTTPForbidden(text="Missing required scope")
+        self.policy.record(True)
+        return await handler(request)
+
+    # Decorator: per-user and per-workload request rates
+    def rate_limit(self, user_rate=None, user_burst=None, caller_rate=None, caller_burst=None):
+        """
+        Decorator applying token-bucket limits keyed by the user (`user_context['sub']`) and by
+        the calling workload (`caller_id`), both set by the `authorize` middleware. Limited
+        requests are refused with 429 + Retry-After before any search or LLM spend.
+        Defaults come from RATE_LIMIT_USER_RPS / _BURST and RATE_LIMIT_CALLER_RPS / _BURST.
+        """
+        user_buckets = TokenBuckets(
+            user_rate if user_rate is not None else float(os.getenv("RATE_LIMIT_USER_RPS", "0.5")),
+            user_burst if user_burst is not None else float(os.getenv("RATE_LIMIT_USER_BURST", "5")))
+        caller_buckets = TokenBuckets(
+            caller_rate if caller_rate is not None else float(os.getenv("RATE_LIMIT_CALLER_RPS", "20")),
+            caller_burst if caller_burst is not None else float(os.getenv("RATE_LIMIT_CALLER_BURST", "40")))
+
+        def decorator(handler):
+            self.rate_limits[handler.__name__] = {"user": user_buckets, "caller": caller_buckets}
+
+            @functools.wraps(handler)
+            async def wrapped(request):
+                caller_id = request.get('caller_id', "anonymous")
+                user_id = (request.get('user_context') or {}).get('sub', "anonymous")
+
+                wait = user_buckets.take(user_id)
+                if wait:
+                    logger.warning(f"Rate limited user {user_id} on {request.path}")
+                else:
+                    wait = caller_buckets.take(caller_id)
+                    if wait:
+                        user_buckets.give_back(user_id)
+                        logger.warning(f"Rate limited caller {caller_id} on {request.path}")
+                if wait:
+                    raise web.HTTPTooManyRequests(
+                        text="Rate limit exceeded", headers={"Retry-After": str(math.ceil(wait))})
                 return await handler(request)
             return wrapped
         return decorator
 
+    # Decorator: bound concurrent work per route, queueing fairly per caller
+    def admission_control(self, max_in_flight=None, max_queue=None, queue_timeout=None, weights=None):
+        """
+        Decorator that limits a route to `max_in_flight` concurrent requests, with a bounded
+        per-caller fair queue in front (see AdmissionController), keyed by the `caller_id` the
+        `authorize` middleware resolved. Place it below `rate_limit`.
+        Overload is answered immediately with 429 / 503 and a Retry-After header.
+        """
+        def decorator(handler):
+            controller = AdmissionController(max_in_flight, max_queue, queue_timeout, weights)
+            self.admission[handler.__name__] = controller
+
+            @functools.wraps(handler)
+            async def wrapped(request):
+                caller_id = request.get('caller_id', "anonymous")
+                try:
+                    await controller.acquire(caller_id)
+                except AdmissionRejected as e:
+                    logger.warning(f"Admission rejected for {caller_id} on {request.path}: {e.reason}")
+                    error = web.HTTPTooManyRequests if e.status == 429 else web.HTTPServiceUnavailable
+                    raise error(text=e.reason, headers={"Retry-After": str(e.retry_after)})
+                start = time.monotonic()
+                try:
+                    return await handler(request)
+                finally:
+                    controller.release(time.monotonic() - start)
+            return wrapped
+        return decorator
+
     def sign_response(self, data: dict) -> dict:
         """
         Signs the response payload using the Agent's SPIFFE SVID.
-        Returns a wrapper containing the original data and a JWS signature.
+        Returns a wrapper containing the original data and a detached JWS signature
+        over `canonical_json(data)` (verify with `src.common.jws.verify_signature`).
         """
-        from authlib.jose import JsonWebSignature
-        jws = JsonWebSignature()
-        import json
+        return self._sign(data)[0]
 
-        # Prepare payload
-        payload = json.dumps(data).encode('utf-8')
-        
-        # Prepare protected header with x5c (Certificate Chain)
-        header = {
-            "alg": self.spiffe.get_x509_algorithm(),
-            "kid": self.spiffe.get_spiffe_id(),
-            "x5c": self.spiffe.get_cert_chain_pems()
-        }
-        
-        # Sign using private key object
-        key = self.spiffe.get_private_key()
-        signature_token = jws.serialize_compact(header, payload, key)
-        
-        return {
-            "status": "success",
-            "content": data,
-            "signature": signature_token.decode() if isinstance(signature_token, bytes) else signature_token
-        }
+    def signed_json_response(self, data: dict, status=200) -> web.Response:
+        """
+        Same envelope as `sign_response`, but the canonical payload bytes that were signed are
+        written straight into the HTTP body instead of being serialized a second time.
+        """
+        return web.Response(body=self.signed_json_body(data), status=status, content_type="application/json")
+
+    def signed_json_body(self, data: dict) -> bytes:
+        """The serialized `sign_response` envelope (the exact bytes `signed_json_response` sends)."""
+        envelope, payload = self._sign(data)
+        return b'{"status":"success","content":' + payload + b',"signature":"' + envelope["signature"].encode("ascii") + b'"}'
+
+    def _sign(self, data: dict):
+        with self.metrics.stage("sign"):
+            payload = canonical_json(data)
+            envelope = {
+                "status": "success",
+                "content": data,
+                "signature": self.signer.sign_detached(payload)
+            }
+        return envelope, payload
+
+    async def open_signed_stream(self, request):
+        """
+        Starts a Server-Sent Events response whose events are signed chunk by chunk.
+        Returns `(response, stream)`: write `stream.chunk(...)` / `stream.end()` bytes to `response`.
+        """
+        response = web.StreamResponse(headers={
+            "Content-Type": "text/event-stream",
+            "Cache-Control": "no-cache",
+        })
+        await response.prepare(request)
+        return response, SignedStream(self.signer)
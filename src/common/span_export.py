@@ -0,0 +1,194 @@
+import os
+import json
+import logging
+import threading
+import urllib.request
+from collections import OrderedDict
+from opentelemetry.trace import SpanKind, StatusCode
+from opentelemetry.sdk.trace import SpanProcessor
+from opentelemetry.sdk.trace.export import BatchSpanProcessor, SpanExporter, SpanExportResult
+from opentelemetry.sdk.trace.sampling import TraceIdRatioBased
+
+logger = logging.getLogger(__name__)
+
+# OTLP enum values (SpanKind is 0-based in the SDK, 1-based on the wire)
+_OTLP_KIND = {kind: kind.value + 1 for kind in SpanKind}
+
+
+def _otlp_value(value):
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    if isinstance(value, (list, tuple)):
+        return {"arrayValue": {"values": [_otlp_value(v) for v in value]}}
+    return {"stringValue": str(value)}
+
+
+def _otlp_attributes(attributes):
+    return [{"key": key, "value": _otlp_value(value)} for key, value in (attributes or {}).items()]
+
+
+class OTLPJsonSpanExporter(SpanExporter):
+    """
+    OTLP/HTTP exporter using the protocol's JSON encoding (POST {endpoint}/v1/traces), so any
+    OpenTelemetry Collector (or a local stand-in) can receive spans without extra dependencies.
+    Runs on the BatchSpanProcessor worker thread, never on the event loop.
+    """
+
+    def __init__(self, endpoint=None, timeout=None, headers=None):
+        endpoint = endpoint or os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT", "http://localhost:4318")
+        self.url = endpoint.rstrip("/") + "/v1/traces"
+        self.timeout = timeout or float(os.getenv("OTEL_EXPORTER_OTLP_TIMEOUT_S", "5"))
+        self.headers = {"Content-Type": "application/json", **(headers or {})}
+        self.exported = 0
+        self.failed = 0
+
+    def encode(self, spans) -> bytes:
+        resources = {}
+        for span in spans:
+            scopes = resources.setdefault(span.resource, {})
+            scope = span.instrumentation_scope
+            scopes.setdefault((scope.name, scope.version) if scope else ("", None), []).append(span)
+
+        return json.dumps({"resourceSpans": [
+            {
+                "resource": {"attributes": _otlp_attributes(resource.attributes)},
+                "scopeSpans": [
+                    {"scope": {"name": name, "version": version or ""},
+                     "spans": [self._encode_span(span) for span in scope_spans]}
+                    for (name, version), scope_spans in scopes.items()
+                ],
+            }
+            for resource, scopes in resources.items()
+        ]}, separators=(",", ":")).encode("utf-8")
+
+    @staticmethod
+    def _encode_span(span):
+        context = span.context
+        encoded = {
+            "traceId": format(context.trace_id, "032x"),
+            "spanId": format(context.span_id, "016x"),
+            "name": span.name,
+            "kind": _OTLP_KIND.get(span.kind, 1),
+            "startTimeUnixNano": str(span.start_time),
+            "endTimeUnixNano": str(span.end_time),
+            "attributes": _otlp_attributes(span.attributes),
+            "status": {"code": span.status.status_code.value, "message": span.status.description or ""},
+        }
+        if span.parent is not None:
+            encoded["parentSpanId"] = format(span.parent.span_id, "016x")
+        if span.events:
+            encoded["events"] = [
+                {"name": e.name, "timeUnixNano": str(e.timestamp), "attributes": _otlp_attributes(e.attributes)}
+                for e in span.events
+            ]
+        return encoded
+
+    def export(self, spans) -> SpanExportResult:
+        request = urllib.request.Request(self.url, data=self.encode(spans), headers=self.headers, method="POST")
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as resp:
+                resp.read()
+        except Exception as e:
+            self.failed += len(spans)
+            logger.warning(f"OTLP export of {len(spans)} span(s) to {self.url} failed: {e}")
+            return SpanExportResult.FAILURE
+        self.exported += len(spans)
+        return SpanExportResult.SUCCESS
+
+    def shutdown(self):
+        pass
+
+
+class TailSamplingProcessor(SpanProcessor):
+    """
+    Buffers each trace's local spans until its local root span ends, then keeps the whole
+    trace if any of these hold:
+
+    - head ratio: the trace ID falls under the `ratio` bound (the TraceIdRatioBased rule, so
+      every service in the mesh keeps the same traces),
+    - slow: the local root took at least `slow_threshold` seconds,
+    - error: any of its spans ended with an ERROR status.
+
+    Kept spans are handed to `delegate` (a BatchSpanProcessor). `on_end` is a few dict
+    operations under a lock; at most `max_traces` traces are buffered (oldest evicted).
+    """
+
+    def __init__(self, delegate, ratio, slow_threshold, max_traces=2048):
+        self.delegate = delegate
+        self.bound = TraceIdRatioBased.get_bound_for_rate(ratio)
+        self.slow_ns = int(slow_threshold * 1e9)
+        self.max_traces = max_traces
+        self._pending = OrderedDict()  # trace_id -> [spans]
+        self._lock = threading.Lock()
+        self.kept = {"ratio": 0, "slow": 0, "error": 0}
+        self.dropped = 0
+        self.evicted = 0
+
+    def on_start(self, span, parent_context=None):
+        pass
+
+    def on_end(self, span):
+        trace_id = span.context.trace_id
+        local_root = span.parent is None or span.parent.is_remote
+        with self._lock:
+            spans = self._pending.get(trace_id)
+            if spans is None:
+                if local_root:
+                    spans = []  # single-span trace: decide right away
+                else:
+                    spans = self._pending[trace_id] = []
+                    if len(self._pending) > self.max_traces:
+                        self._pending.popitem(last=False)
+                        self.evicted += 1
+            spans.append(span)
+            if not local_root:
+                return
+            self._pending.pop(trace_id, None)
+            reason = self._decide(trace_id, span, spans)
+            if reason is None:
+                self.dropped += 1
+                return
+            self.kept[reason] += 1
+        for kept in spans:
+            self.delegate.on_end(kept)
+
+    def _decide(self, trace_id, root, spans):
+        if trace_id & TraceIdRatioBased.TRACE_ID_LIMIT < self.bound:
+            return "ratio"
+        if any(s.status.status_code is StatusCode.ERROR for s in spans):
+            return "error"
+        if root.end_time - root.start_time >= self.slow_ns:
+            return "slow"
+        return None
+
+    def shutdown(self):
+        self.delegate.shutdown()
+
+    def force_flush(self, timeout_millis=30000):
+        return self.delegate.force_flush(timeout_millis)
+
+    def stats(self):
+        with self._lock:
+            pending = len(self._pending)
+        return {"kept": dict(self.kept), "dropped": self.dropped, "pending_traces": pending,
+                "evicted": self.evicted}
+
+
+def build_span_processor(exporter, ratio=None, slow_threshold=None, max_queue_size=None):
+    """
+    The export pipeline: tail sampling (unless `slow_threshold` is 0, in which case the ratio
+    is applied at the head by the sampler instead) in front of a bounded BatchSpanProcessor
+    whose worker thread does the exporting. Spans beyond the queue bound are dropped.
+    """
+    ratio = ratio if ratio is not None else float(os.getenv("OTEL_TRACES_SAMPLER_ARG", "0.1"))
+    slow_threshold = slow_threshold if slow_threshold is not None else float(os.getenv("OTEL_TAIL_SLOW_MS", "500")) / 1000
+    max_queue_size = max_queue_size or int(os.getenv("OTEL_BSP_MAX_QUEUE_SIZE", "2048"))
+    batch = BatchSpanProcessor(exporter, max_queue_size=max_queue_size,
+                               max_export_batch_size=min(max_queue_size, int(os.getenv("OTEL_BSP_MAX_EXPORT_BATCH_SIZE", "512"))))
+    if slow_threshold <= 0:
+        return batch
+    return TailSamplingProcessor(batch, ratio, slow_threshold)
@@ -1,24 +1,147 @@
 import os
 import ssl
+import time
 import logging
+import tempfile
+import threading
 from spiffe import X509Source, X509BundleSet
 from cryptography.hazmat.primitives import serialization
 
 logger = logging.getLogger(__name__)
 
+
+class _TicketCachingSSLObject(ssl.SSLObject):
+    """
+    SSLObject that hands its TLS session back to the owning context once a ticket arrives.
+    TLS 1.3 tickets are sent after the handshake, so the session is captured on read.
+    """
+    _ticket_saved = False
+
+    def do_handshake(self):
+        super().do_handshake()
+        self.context.handshakes["resumed" if self.session_reused else "full"] += 1
+
+    def read(self, len=1024, buffer=None):
+        data = super().read(len, buffer)
+        if not self._ticket_saved:
+            session = self.session
+            if session is not None and session.has_ticket:
+                self.context.sessions[self.server_hostname] = session
+                self._ticket_saved = True
+        return data
+
+
+class _ResumingClientContext(ssl.SSLContext):
+    """
+    Client SSLContext that remembers the last session ticket per server name and offers it
+    on the next connection, turning reconnects into PSK resumptions (no certificate chain
+    exchange or signature verification).
+
+    Tickets live on the context, and a context only exists for one SVID generation
+    (OpenSSL also refuses sessions from another context), so rotation invalidates them.
+    """
+    sslobject_class = _TicketCachingSSLObject
+
+    def __init__(self, protocol=ssl.PROTOCOL_TLS_CLIENT):
+        self.sessions = {}
+        self.handshakes = {"full": 0, "resumed": 0}
+
+    def wrap_bio(self, incoming, outgoing, server_side=False, server_hostname=None, session=None):
+        if session is None and not server_side:
+            session = self.sessions.get(self._encode_hostname(server_hostname))
+        return super().wrap_bio(incoming, outgoing, server_side, server_hostname, session)
+
+
+class _RotatingServerContext(ssl.SSLContext):
+    """
+    Listener SSLContext that hands every new connection to the context built for the current
+    SVID generation. New handshakes pick up a rotated SVID/bundle without rebinding the
+    listener, and established connections are left untouched.
+
+    Each generation's context also holds its own session ticket keys, so tickets issued
+    before a rotation no longer decrypt afterwards: a client offering one gets a full
+    handshake, verified against the current bundle.
+    """
+
+    def __init__(self, protocol=ssl.PROTOCOL_TLS_SERVER):
+        self.helper = None
+
+    def wrap_bio(self, incoming, outgoing, server_side=False, server_hostname=None, session=None):
+        return self.helper._server_context[1].wrap_bio(incoming, outgoing, server_side, server_hostname, session)
+
+    def wrap_socket(self, sock, server_side=False, *args, **kwargs):
+        return self.helper._server_context[1].wrap_socket(sock, server_side, *args, **kwargs)
+
+
+class PeerIdentity:
+    """
+    Authenticated identity of the peer on one mTLS connection: its SPIFFE ID plus the
+    certificate serial number and expiry (kept for forensics / audit logs).
+    """
+    __slots__ = ("spiffe_id", "serial", "not_after", "handshake_seconds")
+
+    def __init__(self, spiffe_id, serial, not_after):
+        self.spiffe_id = spiffe_id
+        self.serial = serial
+        self.not_after = not_after  # epoch seconds
+        self.handshake_seconds = None  # set by the listener; consumed once by the metrics middleware
+
+    @classmethod
+    def from_peercert(cls, peercert):
+        """Builds the identity from `SSLObject.getpeercert()`; raises ValueError without a SPIFFE ID."""
+        spiffe_id = SpiffeHelper.peer_spiffe_id(peercert or {})
+        if spiffe_id is None or not spiffe_id.startswith("spiffe://"):
+            raise ValueError("No SPIFFE ID (URI SAN) found in peer certificate")
+        not_after = peercert.get("notAfter")
+        return cls(spiffe_id, peercert.get("serialNumber"),
+                   ssl.cert_time_to_seconds(not_after) if not_after else None)
+
+    def as_dict(self):
+        return {"spiffe_id": self.spiffe_id, "serial": self.serial, "not_after": self.not_after}
+
+
+class _IdentifyingSSLObject(ssl.SSLObject):
+    """
+    Server-side SSLObject that extracts and validates the client's SPIFFE identity once, when
+    the handshake completes. Every request on the (keep-alive) connection then reuses
+    `peer_identity` instead of re-parsing the peer certificate.
+    """
+    peer_identity = None
+    _handshake_started = None
+
+    def do_handshake(self):
+        if self._handshake_started is None:
+            self._handshake_started = time.perf_counter()
+        super().do_handshake()  # raises SSLWantReadError until the handshake completes
+        try:
+            self.peer_identity = PeerIdentity.from_peercert(self.getpeercert())
+        except ValueError as e:
+            raise ssl.SSLError(f"Rejected peer: {e}")  # aborts the handshake
+        self.peer_identity.handshake_seconds = time.perf_counter() - self._handshake_started
+
+
 class SpiffeHelper:
     """
     Helper class to manage SPIFFE Identity (SVID) and Trust Bundles.
     Uses the pyspiffe library to fetch and rotate credentials from the Workload API.
     """
 
-    def __init__(self, socket_path=None):
+    def __init__(self, socket_path=None, source=None):
         self.socket_path = socket_path or os.getenv(
             "SPIFFE_ENDPOINT_SOCKET", "unix:///run/spire/sockets/agent.sock"
         )
-        self.source = None
+        # An already-connected source (e.g. a test double) can be injected.
+        self.source = source
         self._initialized = False
 
+        # Rotation tracking: bumped every time the Workload API pushes new material.
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._client_context = None  # (generation, SSLContext)
+        self._server_context = None  # (generation, SSLContext) new connections are handed to
+        self._listener_context = None
+        self._rotation_listeners = []
+
     def start(self):
         """
         Connects to the SPIRE Workload API and starts the automatic rotation background thread.
@@ -31,7 +154,9 @@ class SpiffeHelper:
         
         try:
             # X509Source automatically handles fetching and renewal (rotation)
-            self.source = X509Source(socket_path=self.socket_path)
+            if self.source is None:
+                self.source = X509Source(socket_path=self.socket_path)
+            self.source.subscribe_for_updates(self._on_source_update)
             
             # Fetch first X.509 SVID to ensure we are ready
             svid = self.source.svid
@@ -42,91 +167,118 @@ class SpiffeHelper:
             logger.error(f"Failed to connect to SPIRE Workload API: {e}")
             raise
 
+    @property
+    def generation(self) -> int:
+        """Monotonic counter of SVID/bundle updates received from the Workload API."""
+        return self._generation
+
+    def add_rotation_listener(self, callback):
+        """
+        Registers `callback()` to run after each SVID/bundle rotation has been applied.
+        Callbacks run on the Workload API watcher thread; asyncio users must hop to their loop.
+        """
+        self._rotation_listeners.append(callback)
+
+    def _on_source_update(self):
+        """
+        X509Source subscriber (runs on the Workload API watcher thread).
+        Invalidates every context built from the previous SVID/bundle.
+        """
+        with self._lock:
+            self._generation += 1
+            self._client_context = None
+        logger.info(f"SVID/bundle rotation received (generation {self._generation})")
+
+        # Pre-build the server context off the event loop so new connections only read a pointer.
+        if self._listener_context is not None:
+            self._refresh_server_context()
+
+        for callback in list(self._rotation_listeners):
+            try:
+                callback()
+            except Exception as e:
+                logger.error(f"Rotation listener failed: {e}")
+
     def get_server_ssl_context(self) -> ssl.SSLContext:
         """
-        Creates an SSLContext for a Server (Agent listening for connections).
+        Returns the SSLContext for a Server (Agent listening for connections).
         - Presents its own SVID certificate.
         - Requires Client Certificate (mTLS).
         - Validates Client SVID against the Trust Bundle.
+
+        The returned listener context is rotation-aware: every new connection is wrapped
+        by the context built for the current SVID generation (see _RotatingServerContext),
+        which also keeps session tickets from outliving a rotation.
         """
         if not self._initialized:
             self.start()
 
-        # Create a standard SSLContext
-        # pyspiffe provides a helper to configure it, or we can do it manually.
-        # We'll use the source to get the material.
-        
+        with self._lock:
+            if self._listener_context is None:
+                self._server_context = (self._generation, self._build_server_ssl_context())
+                listener = _RotatingServerContext(ssl.PROTOCOL_TLS_SERVER)
+                listener.helper = self
+                self._listener_context = listener
+            return self._listener_context
+
+    def _refresh_server_context(self):
+        """Builds the server context for the current generation; keeps serving the old one on failure."""
+        try:
+            with self._lock:
+                generation = self._generation
+                self._server_context = (generation, self._build_server_ssl_context())
+            logger.info(f"Server TLS identity reloaded (generation {generation})")
+        except Exception as e:
+            logger.error(f"Failed to reload server TLS identity, keeping previous SVID: {e}")
+
+    def _build_server_ssl_context(self) -> ssl.SSLContext:
         context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
         context.verify_mode = ssl.CERT_REQUIRED  # Enforce mTLS
-        
-        # Hook into pyspiffe's dynamic bundle/svid source
-        # Note: In a real long-running app, we need to handle rotation hooks.
-        # pyspiffe X509Source has a specific method to apply to SSLContext? 
-        # Checking pyspiffe docs (mental model): 
-        # source.apply_to_ssl_context(context) is the standard way.
-        
-        # However, for 'server' side, we also need to validate clients.
-        # Let's trust pyspiffe's implementation.
-        
-        def ssl_context_provider():
-             # This might be needed if using a framework that accepts a callable
-             pass
+        context.sslobject_class = _IdentifyingSSLObject  # peer identity resolved once per connection
 
-        # For simple python `ssl` usage:
         svid = self.source.svid
         bundle_set = self.source.bundles
         
-        # Load the Trust Bundle (CA certs)
-        # We need to write them to specific storage or use standard calls.
-        # pyspiffe creates a context that reloads? 
-        # No, standard python ssl.SSLContext doesn't auto-reload from memory easily without callbacks.
-        # But `spiffe` library might offer a context wrapper.
-        
-        # Simpler approach for Phase 1: Create a FRESH context every time or use a wrapper.
-        # Let's rely on extracting the PEMs for now which is explicit.
-        
         # Trust Chain
         ca_certs_pem = self._bundle_to_pem(bundle_set)
         context.load_verify_locations(cadata=ca_certs_pem)
         
         # Server Identity
-        # Currently python ssl requires files for load_cert_chain usually, 
-        # unless we use the lower level loading.
-        # Fortunately, pyspiffe usually handles writing to disk OR we use a temporary file approach.
-        # A2A simplified: We will grab the key/cert from SVID.
-        
-        # We will write temp files because Python's ssl module is file-centric for cert chains
-        # until Python 3.12+ (in-memory loading).
-        # Since we use 3.11-slim, let's write to /dev/shm or /tmp
-        
-        cert_path = "/dev/shm/my_svid.crt"
-        key_path = "/dev/shm/my_svid.key"
-        
-        with open(cert_path, "wb") as f:
-            for cert in svid.cert_chain:
-                f.write(cert.public_bytes(serialization.Encoding.PEM))
-            
-        with open(key_path, "wb") as f:
-            f.write(svid.private_key.private_bytes(
-                encoding=serialization.Encoding.PEM,
-                format=serialization.PrivateFormat.PKCS8,
-                encryption_algorithm=serialization.NoEncryption()
-            ))
-            
-        context.load_cert_chain(certfile=cert_path, keyfile=key_path)
+        # Python's ssl module is file-centric for cert chains, so the SVID is
+        # handed over through an anonymous in-memory file (see _load_svid).
+        self._load_svid(context, svid)
         
         return context
 
     def get_client_ssl_context(self) -> ssl.SSLContext:
         """
-        Creates an SSLContext for a Client (Caller).
+        Returns the SSLContext for a Client (Caller).
         - Presents its own SVID.
         - Validates Server SVID against Trust Bundle.
+
+        The context is cached per SVID/bundle generation: it is only rebuilt
+        after X509Source delivers new material, so outbound calls share it.
         """
         if not self._initialized:
             self.start()
 
-        context = ssl.create_default_context(ssl.Purpose.SERVER_AUTH)
+        cached = self._client_context
+        if cached is not None and cached[0] == self._generation:
+            return cached[1]
+
+        with self._lock:
+            generation = self._generation
+            cached = self._client_context
+            if cached is not None and cached[0] == generation:
+                return cached[1]
+            context = self._build_client_ssl_context()
+            self._client_context = (generation, context)
+            return context
+
+    def _build_client_ssl_context(self) -> ssl.SSLContext:
+        # Session-resuming context; trusts only the SPIFFE bundle (mesh peers never
+        # present publicly-issued certificates).
+        context = _ResumingClientContext(ssl.PROTOCOL_TLS_CLIENT)
         context.verify_mode = ssl.CERT_REQUIRED
         context.check_hostname = False # SPIFFE does not use Hostnames/DNS usually, it uses URI validation subjectAltName. 
         
@@ -136,23 +288,42 @@ class SpiffeHelper:
         context.load_verify_locations(cadata=ca_certs_pem)
         
         # Setup Identity
-        svid = self.source.svid
-        cert_path = "/dev/shm/client_svid.crt"
-        key_path = "/dev/shm/client_svid.key"
-        
-        with open(cert_path, "wb") as f:
-            for cert in svid.cert_chain:
-                f.write(cert.public_bytes(serialization.Encoding.PEM))
-        with open(key_path, "wb") as f:
-            f.write(svid.private_key.private_bytes(
-                encoding=serialization.Encoding.PEM,
-                format=serialization.PrivateFormat.PKCS8,
-                encryption_algorithm=serialization.NoEncryption()
-            ))
-            
-        context.load_cert_chain(certfile=cert_path, keyfile=key_path)
+        self._load_svid(context, self.source.svid)
         return context
 
+    def _load_svid(self, context: ssl.SSLContext, svid):
+        """
+        Loads the SVID chain and key into `context` without touching the filesystem.
+        `load_cert_chain` only accepts paths, so on Linux the PEM is written to a
+        memfd (anonymous RAM-backed file) and read back through /proc/self/fd.
+        """
+        pem = b"".join(cert.public_bytes(serialization.Encoding.PEM) for cert in svid.cert_chain)
+        pem += svid.private_key.private_bytes(
+            encoding=serialization.Encoding.PEM,
+            format=serialization.PrivateFormat.PKCS8,
+            encryption_algorithm=serialization.NoEncryption()
+        )
+
+        if hasattr(os, "memfd_create"):
+            fd = os.memfd_create("svid", os.MFD_CLOEXEC)
+            try:
+                os.write(fd, pem)
+                context.load_cert_chain(certfile=f"/proc/self/fd/{fd}")
+            finally:
+                os.close(fd)
+            return
+
+        # Fallback (non-Linux): short-lived private temp file, removed immediately.
+        with tempfile.NamedTemporaryFile(dir="/dev/shm" if os.path.isdir("/dev/shm") else None) as f:
+            f.write(pem)
+            f.flush()
+            context.load_cert_chain(certfile=f.name)
+
+    def get_svid(self):
+        """Returns the current X509Svid (one consistent snapshot of key, chain and SPIFFE ID)."""
+        if not self._initialized: self.start()
+        return self.source.svid
+
     def get_private_key(self):
         """Returns the current SVID private key object."""
         if not self._initialized: self.start()
@@ -161,8 +332,12 @@ class SpiffeHelper:
     def get_x509_algorithm(self) -> str:
         """Returns the JWS algorithm name (RS256, ES256, etc.) for the current SVID."""
         if not self._initialized: self.start()
+        return self.x509_algorithm(self.source.svid.private_key)
+
+    @staticmethod
+    def x509_algorithm(key) -> str:
+        """Maps an SVID private key to its JWS algorithm name."""
         from cryptography.hazmat.primitives.asymmetric import ec, rsa
-        key = self.source.svid.private_key
         if isinstance(key, rsa.RSAPrivateKey):
             return "RS256"
         if isinstance(key, ec.EllipticCurvePrivateKey):
@@ -191,22 +366,43 @@ class SpiffeHelper:
         if not self._initialized: self.start()
         return str(self.source.svid.spiffe_id)
 
+    @staticmethod
+    def peer_identity(transport):
+        """
+        The PeerIdentity of an accepted mTLS connection, or None (no TLS / no client cert).
+        Resolved at handshake for listeners built by `get_server_ssl_context`; otherwise parsed
+        on first use and memoized on the connection's SSLObject.
+        """
+        ssl_object = transport.get_extra_info('ssl_object') if transport is not None else None
+        if ssl_object is None:
+            return None
+        identity = getattr(ssl_object, "peer_identity", None)
+        if identity is None:
+            try:
+                identity = PeerIdentity.from_peercert(ssl_object.getpeercert())
+            except ValueError:
+                return None
+            ssl_object.peer_identity = identity
+        return identity
+
+    @staticmethod
+    def peer_spiffe_id(peercert):
+        """The SPIFFE ID (first URI SAN) of a verified peer certificate, or None."""
+        for key, value in peercert.get("subjectAltName", ()):
+            if key == "URI":
+                return value  # Assuming one ID
+        return None
+
     def validate_spiffe_id(self, peercert, expected_spiffe_id=None, allowed_spiffe_ids=None):
         """
         Validates that the peer certificate contains a valid SPIFFE ID.
         If specific IDs are allowed, checks against them.
         """
-        # Extract SANs from peercert
-        san_list = []
-        for key, value in peercert.get("subjectAltName", ()):
-            if key == "URI":
-                san_list.append(value)
-        
-        if not san_list:
+        peer_id = self.peer_spiffe_id(peercert)
+        if peer_id is None:
             raise ValueError("No SPIFFE ID (URI SAN) found in peer certificate")
         
-        peer_id = san_list[0] # Assuming one ID
-        logger.info(f"Authenticated Peer SPIFFE ID: {peer_id}")
+        logger.debug("Authenticated Peer SPIFFE ID: %s", peer_id)
 
         if expected_spiffe_id and peer_id != expected_spiffe_id:
              raise PermissionError(f"Peer ID {peer_id} does not match expected {expected_spiffe_id}")
@@ -220,8 +416,8 @@ class SpiffeHelper:
         """
         Converts all bundles in the Set[X509Bundle] to a single PEM bytes string.
         """
-        pem_out = b""
-        for bundle in bundle_set:
-            for authority in bundle.x509_authorities:
-                pem_out += authority.public_bytes(serialization.Encoding.PEM)
-        return pem_out.decode("utf-8")
+        return b"".join(
+            authority.public_bytes(serialization.Encoding.PEM)
+            for bundle in bundle_set
+            for authority in bundle.x509_authorities
+        ).decode("utf-8")
@@ -0,0 +1,121 @@
+import os
+import time
+import asyncio
+import hashlib
+import logging
+import sqlite3
+import threading
+from src.common.jws import canonical_json
+
+logger = logging.getLogger(__name__)
+
+
+class StoredArticle:
+    """A stored writer output: the article plus the signed response body it was served with."""
+    __slots__ = ("key", "article", "body", "fingerprint")
+
+    def __init__(self, key, article, body, fingerprint):
+        self.key = key
+        self.article = article
+        self.body = body
+        self.fingerprint = fingerprint
+
+
+class ArticleStore:
+    """
+    Persistent content-addressed store for generated articles (SQLite, WAL mode).
+
+    - Entries are keyed by the SHA-256 of the canonical prompt inputs (`key_for`), so a
+      byte-identical request never reaches the LLM twice, across restarts too.
+    - Each entry keeps the exact signed response body and the fingerprint of the SVID that
+      signed it; callers re-sign (and `put` again) when the fingerprint no longer matches.
+    - Total stored bytes are bounded by `max_bytes`; least recently used entries go first.
+
+    SQLite calls run in a worker thread so disk I/O never stalls the event loop.
+    """
+
+    def __init__(self, path=None, max_bytes=None):
+        self.path = path or os.getenv("ARTICLE_STORE_PATH", "/tmp/writer_articles.db")
+        self.max_bytes = max_bytes or int(os.getenv("ARTICLE_STORE_MAX_BYTES", str(64 * 1024 * 1024)))
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS articles ("
+            " key TEXT PRIMARY KEY, article TEXT NOT NULL, body BLOB NOT NULL,"
+            " fingerprint TEXT NOT NULL, size INTEGER NOT NULL, last_access REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS articles_lru ON articles (last_access)")
+        self.bytes = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM articles").fetchone()[0]
+
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+
+    @staticmethod
+    def key_for(*inputs) -> str:
+        """Content address for a set of JSON-serializable prompt inputs (e.g. model + request body)."""
+        return hashlib.sha256(canonical_json(list(inputs))).hexdigest()
+
+    async def get(self, key):
+        return await asyncio.to_thread(self._get, key)
+
+    async def put(self, key, article, body, fingerprint):
+        await asyncio.to_thread(self._put, key, article, body, fingerprint)
+
+    def _get(self, key):
+        with self._lock:
+            row = self._db.execute(
+                "SELECT article, body, fingerprint FROM articles WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._db.execute("UPDATE articles SET last_access = ? WHERE key = ?", (time.time(), key))
+            self.hits += 1
+            return StoredArticle(key, row[0], bytes(row[1]), row[2])
+
+    def _put(self, key, article, body, fingerprint):
+        size = len(body) + len(article.encode("utf-8"))
+        if size > self.max_bytes:
+            return  # would evict everything else; not worth keeping
+        with self._lock:
+            previous = self._db.execute("SELECT size FROM articles WHERE key = ?", (key,)).fetchone()
+            self._db.execute(
+                "INSERT OR REPLACE INTO articles (key, article, body, fingerprint, size, last_access)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (key, article, body, fingerprint, size, time.time()))
+            self.bytes += size - (previous[0] if previous else 0)
+            self.writes += 1
+            self._evict()
+
+    def _evict(self):
+        while self.bytes > self.max_bytes:
+            rows = self._db.execute(
+                "SELECT key, size FROM articles ORDER BY last_access LIMIT 32").fetchall()
+            if not rows:
+                break
+            for key, size in rows:
+                if self.bytes <= self.max_bytes:
+                    break
+                self._db.execute("DELETE FROM articles WHERE key = ?", (key,))
+                self.bytes -= size
+                self.evictions += 1
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    def stats(self):
+        with self._lock:
+            entries = self._db.execute("SELECT COUNT(*) FROM articles").fetchone()[0]
+        return {
+            "entries": entries,
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "writes": self.writes,
+            "evictions": self.evictions,
+        }
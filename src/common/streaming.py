@@ -0,0 +1,145 @@
+import json
+import hashlib
+import secrets
+from src.common.jws import canonical_json, verify_signature
+
+
+def sse_event(event: str, data: bytes) -> bytes:
+    """Encodes one Server-Sent Event (`data` must be a single line, e.g. compact JSON)."""
+    return b"event: " + event.encode("ascii") + b"\ndata: " + data + b"\n\n"
+
+
+async def iter_sse(stream):
+    """
+    Parses Server-Sent Events from an aiohttp StreamReader as they arrive.
+    Yields `(event, data)` with `data` as the raw bytes (multi-line data joined by newlines).
+    """
+    event, data = "message", []
+    while True:
+        line = await stream.readline()
+        if not line:
+            break
+        line = line.rstrip(b"\r\n")
+        if not line:
+            if data:
+                yield event, b"\n".join(data)
+            event, data = "message", []
+        elif line.startswith(b"data:"):
+            data.append(line[5:].lstrip(b" "))
+        elif line.startswith(b"event:"):
+            event = line[6:].strip().decode()
+    if data:
+        yield event, b"\n".join(data)
+
+
+def _genesis(stream_id):
+    return hashlib.sha256(stream_id.encode()).hexdigest()
+
+
+class SignedStream:
+    """
+    Emits a response as a sequence of individually signed SSE events.
+
+    Every event carries `{"content": ..., "signature": <detached JWS>}` where the content holds
+    the stream id, a sequence number and `prev`, the SHA-256 of the previous event's signed bytes
+    (the first event chains from the stream id). A receiver can therefore verify and render each
+    chunk as it arrives, and detect any reordered, dropped, spliced or truncated event.
+    """
+
+    def __init__(self, signer, stream_id=None):
+        self.signer = signer
+        self.stream_id = stream_id or secrets.token_hex(16)
+        self.seq = 0
+        self.digest = _genesis(self.stream_id)
+
+    def chunk(self, text: str) -> bytes:
+        return self._event("chunk", {"text": text})
+
+    def end(self, **fields) -> bytes:
+        """Final event; `fields` are signed along with it (e.g. `upstream` for a relayed stream)."""
+        return self._event("end", fields)
+
+    def error(self, message: str) -> bytes:
+        return self._event("error", {"message": message})
+
+    def _event(self, event, fields):
+        content = dict(fields, stream=self.stream_id, seq=self.seq, prev=self.digest)
+        payload = canonical_json(content)
+        signature = self.signer.sign_detached(payload)
+        self.digest = hashlib.sha256(payload).hexdigest()
+        self.seq += 1
+        return sse_event(event, b'{"content":' + payload + b',"signature":"' + signature.encode("ascii") + b'"}')
+
+
+class _StreamState:
+    __slots__ = ("kid", "seq", "digest", "chunks", "complete")
+
+    def __init__(self, kid, stream_id):
+        self.kid = kid
+        self.seq = 0
+        self.digest = _genesis(stream_id)
+        self.chunks = 0
+        self.complete = False
+
+
+class StreamVerifier:
+    """
+    Incrementally validates the events of one or more SignedStreams (e.g. a writer stream
+    relayed by the researcher, followed by the researcher's own attestation).
+
+    Each stream is pinned to the SPIFFE ID that signed its first event. An `end` event may
+    name an `upstream` stream; its digest must match what was verified for that stream.
+    """
+
+    def __init__(self):
+        self.streams = {}  # stream id -> _StreamState
+
+    def feed(self, event: str, data: bytes) -> dict:
+        """Verifies one SSE event and returns its content. Raises ValueError on any violation."""
+        try:
+            envelope = json.loads(data)
+            content, token = envelope["content"], envelope["signature"]
+            stream_id, seq, prev = content["stream"], content["seq"], content["prev"]
+        except (ValueError, KeyError, TypeError) as e:
+            raise ValueError(f"Malformed stream event: {e}")
+
+        header = verify_signature(token, content)
+        state = self.streams.get(stream_id)
+        if state is None:
+            state = self.streams[stream_id] = _StreamState(header.get("kid"), stream_id)
+        if state.complete:
+            raise ValueError(f"Event after end of stream {stream_id}")
+        if header.get("kid") != state.kid:
+            raise ValueError(f"Stream {stream_id} switched signer to {header.get('kid')}")
+        if seq != state.seq or prev != state.digest:
+            raise ValueError(f"Stream {stream_id} out of order at seq {seq}")
+
+        if event == "end":
+            upstream = content.get("upstream")
+            if upstream is not None:
+                relayed = self.streams.get(upstream.get("stream"))
+                if relayed is None or not relayed.complete or relayed.digest != upstream.get("digest"):
+                    raise ValueError(f"Upstream stream {upstream.get('stream')} does not match attestation")
+            state.complete = True
+        elif event == "chunk":
+            state.chunks += 1
+
+        state.seq += 1
+        state.digest = hashlib.sha256(canonical_json(content)).hexdigest()
+        return content
+
+    def digest(self, stream_id):
+        """Chain digest of a stream so far (after `end`, the value a relay attests to)."""
+        return self.streams[stream_id].digest
+
+    def finish(self):
+        """Raises ValueError if any stream was cut off before its `end` event."""
+        for stream_id, state in self.streams.items():
+            if not state.complete:
+                raise ValueError(f"Stream {stream_id} truncated after {state.seq} event(s)")
+
+    def summary(self):
+        return {
+            stream_id: {"kid": s.kid, "chunks": s.chunks, "complete": s.complete}
+            for stream_id, s in self.streams.items()
+        }
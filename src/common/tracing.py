@@ -1,18 +1,24 @@
+import os
 import logging
 from opentelemetry import trace
 from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
 from opentelemetry.sdk.resources import Resource
 from opentelemetry.instrumentation.logging import LoggingInstrumentor
 from opentelemetry.instrumentation.aiohttp_client import AioHttpClientInstrumentor
 from opentelemetry.instrumentation.aiohttp_server import AioHttpServerInstrumentor
+from src.common.logs import setup_logging
+from src.common.span_export import OTLPJsonSpanExporter, build_span_processor
 
 _INITIALIZED = False
+_SPAN_PROCESSOR = None
 
 def setup_tracing(service_name: str):
     """
-    Initializes OpenTelemetry tracing with a Console Exporter.
+    Initializes OpenTelemetry tracing and log correlation.
+    Spans are exported over OTLP/HTTP when OTEL_EXPORTER_OTLP_ENDPOINT is set (see span_export.py).
     """
-    global _INITIALIZED
+    global _INITIALIZED, _SPAN_PROCESSOR
     if _INITIALIZED:
         return
     _INITIALIZED = True
@@ -22,10 +28,21 @@ def setup_tracing(service_name: str):
     })
 
     # 2. Set up Tracer Provider
-    provider = TracerProvider(resource=resource)
+    endpoint = os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT")
+    ratio = float(os.getenv("OTEL_TRACES_SAMPLER_ARG", "0.1"))
+    slow_threshold = float(os.getenv("OTEL_TAIL_SLOW_MS", "500")) / 1000
+    if endpoint and slow_threshold <= 0:
+        # Head sampling only: unsampled spans are never recorded
+        provider = TracerProvider(resource=resource, sampler=ParentBased(TraceIdRatioBased(ratio)))
+    else:
+        # Record everything; the tail sampler keeps ratio-sampled, slow and failed traces
+        provider = TracerProvider(resource=resource)
     
-    # 3. No Export for now (Logs carry the IDs)
-    # We could add an OTLP exporter here later.
+    # 3. Export (Logs always carry the IDs): bounded batch queue + worker thread, so the
+    # event loop only ever appends finished spans to a queue
+    if endpoint:
+        _SPAN_PROCESSOR = build_span_processor(OTLPJsonSpanExporter(endpoint), ratio, slow_threshold)
+        provider.add_span_processor(_SPAN_PROCESSOR)
     
     # 4. Set Global Trace Provider
     trace.set_tracer_provider(provider)
@@ -34,35 +51,19 @@ def setup_tracing(service_name: str):
     # This adds trace_id and span_id to the log records
     LoggingInstrumentor().instrument(set_logging_format=False)
     
-    log_format = (
-        "%(asctime)s %(levelname)s [service.name=%(service_name)s] "
-        "[trace_id=%(otelTraceID)s span_id=%(otelSpanID)s] "
-        "[%(name)s] %(message)s"
-    )
-    
-    # Note: opentelemetry-instrumentation-logging uses these magic names
-    # for the injected fields in the record.
-    
-    class ServiceNameFilter(logging.Filter):
-        def __init__(self, name):
-            self.service_name = name
-        def filter(self, record):
-            record.service_name = self.service_name
-            return True
+    # 6. Non-blocking pipeline: records are queued (bounded, sampled) and formatted as
+    # JSON - with the trace IDs injected above - on a background thread (see logs.py)
+    setup_logging(service_name)
 
-    for handler in logging.root.handlers:
-        handler.addFilter(ServiceNameFilter(service_name))
-        handler.setFormatter(logging.Formatter(log_format))
-    
-    if not logging.root.handlers:
-        logging.basicConfig(level=logging.INFO, format=log_format)
-        logging.root.handlers[0].addFilter(ServiceNameFilter(service_name))
-
-    # 6. Instrument aiohttp (Server & Client)
+    # 7. Instrument aiohttp (Server & Client)
     AioHttpServerInstrumentor().instrument()
     AioHttpClientInstrumentor().instrument()
 
     logging.info(f"OpenTelemetry Tracing initialized for '{service_name}'")
 
+def tracing_stats():
+    stats = getattr(_SPAN_PROCESSOR, "stats", None)
+    return stats() if stats else {"exporting": _SPAN_PROCESSOR is not None}
+
 def get_tracer(name: str):
     return trace.get_tracer(name)
@@ -1,14 +1,12 @@
 import logging
 import streamlit as st
-import asyncio
-import aiohttp
-import ssl
-import threading
 import json
 import os
 from src.common.spiffe import SpiffeHelper
 from src.common.auth import JWTManager
+from src.common.jws import verify_signature
 from src.common.tracing import setup_tracing
+from src.frontend.mesh_client import MeshClient
 
 # Configure Tracing & Logging
 setup_tracing("frontend")
@@ -48,7 +46,7 @@ def get_jwt_manager():
     
     with open(key_path, "r") as f:
         keys = json.load(f)
-        return JWTManager(private_key_pem=keys["priv"], public_key_pem=keys["pub"])
+        return JWTManager(private_key_pem=keys["priv"], public_key_pem=keys["pub"], alg=keys.get("alg", "RS256"))
 
 jwt_manager = get_jwt_manager()
 
@@ -89,48 +87,24 @@ def logout():
     st.session_state.user_info = None
     st.rerun()
 
-# --- Helper to Call Agents ---
-async def call_agent(agent_host, endpoint, payload):
-    url = f"https://{agent_host}:8080{endpoint}"
-    
-    # Get Client SSL Context (with my SVID)
-    ssl_context = spiffe.get_client_ssl_context()
-    
-    # Add User Identity (JWT) to Request
-    headers = {}
-    if st.session_state.user_token:
-        headers["Authorization"] = f"Bearer {st.session_state.user_token}"
-    
-    try:
-        async with aiohttp.ClientSession() as session:
-            async with session.post(url, json=payload, ssl=ssl_context, headers=headers) as resp:
-                if resp.status == 200:
-                    return await resp.json()
-                else:
-                    return {"status": "error", "code": resp.status, "text": await resp.text()}
-    except Exception as e:
-        return {"status": "error", "message": str(e)}
+# --- Mesh Client (Cached) ---
+# One background event loop + pooled mTLS sessions shared by every browser session;
+# script threads submit agent calls to it instead of running a loop per message.
+@st.cache_resource
+def get_mesh_client():
+    return MeshClient(spiffe, peers=["https://researcher:8080"])
+
+mesh = get_mesh_client()
 
-def verify_jws(token):
-    """Verifies a signed response from an agent."""
+def verify_jws(token, content=None):
+    """
+    Verifies a signed response from an agent.
+    Detached signatures are checked against `content` (the envelope's signed data).
+    """
     if not token: return None, "No signature"
-    from authlib.jose import JsonWebSignature
-    from authlib.common.encoding import urlsafe_b64decode
-    import json
-    
-    jws = JsonWebSignature()
     try:
-        # 1. Extract header manually to get cert chain (x5c)
-        header_segment = token.split('.')[0].encode('utf-8')
-        header = json.loads(urlsafe_b64decode(header_segment))
-        
-        x5c = header.get("x5c")
-        if not x5c: return None, "Missing certificate chain"
-        
-        # 2. Verify with the public key from the first cert
-        cert_pem = x5c[0]
-        # deserialize_compact returns {'header': ..., 'payload': ...}
-        jws.deserialize_compact(token, cert_pem)
+        # Public key comes from the first cert of the header's chain (x5c)
+        header = verify_signature(token, content)
         return header.get("kid"), "Valid Signature"
     except Exception as e:
         return None, f"Invalid: {str(e)}"
@@ -184,6 +158,9 @@ else:
     if st.sidebar.button("Logout"):
         logout()
         
+    st.session_state.stream_responses = st.sidebar.toggle(
+        "Stream responses", value=st.session_state.get("stream_responses", True))
+        
     st.sidebar.divider()
     
     # --- Play 2: The Identity Inspector ---
@@ -213,7 +190,7 @@ else:
                 st.markdown(f"**Subject:** `{decoded.get('sub')}`")
                 st.markdown(f"**Email:** `{decoded.get('email')}`")
                 st.json(decoded)
-                st.markdown("**Signature:** <span class='status-ok'>✓ RSA-256 Valid</span>", unsafe_allow_html=True)
+                st.markdown(f"**Signature:** <span class='status-ok'>✓ {jwt_manager.alg} Valid</span>", unsafe_allow_html=True)
                 st.caption("Proof of Delegation: frontend ➔ researcher")
             else:
                 st.info("No active JWT session")
@@ -228,14 +205,23 @@ else:
         # 4. Content Integrity (JWS)
         with st.sidebar.expander("🔏 Content Integrity (JWS)", expanded=True):
             last_resp = st.session_state.get("last_response", {})
-            if "signature" in last_resp:
-                agent_id, status = verify_jws(last_resp["signature"])
+            if last_resp.get("streamed"):
+                # Every chunk was verified on arrival; show who signed each chained stream
+                for stream in last_resp.get("streams", {}).values():
+                    signer = stream["kid"].split('/')[-1] if stream["kid"] else 'Unknown'
+                    st.markdown(f"**{signer.capitalize()}:** `{stream['chunks']} signed chunk(s)`")
+                    st.markdown("**Integrity:** <span class='status-ok'>✓ Hash chain intact</span>", unsafe_allow_html=True)
+                if st.button("View Raw Payload"):
+                    st.json(last_resp)
+            elif "signature" in last_resp:
+                agent_id, status = verify_jws(last_resp["signature"], last_resp.get("content"))
                 st.markdown(f"**Researcher:** `{agent_id.split('/')[-1] if agent_id else 'Unknown'}`")
                 st.markdown(f"**Integrity:** <span class='status-ok'>✓ {status}</span>", unsafe_allow_html=True)
                 
                 writer_sig = last_resp.get("content", {}).get("writer_signature")
                 if writer_sig:
-                    w_agent_id, w_status = verify_jws(writer_sig)
+                    # The writer signed {"result": article}; the researcher forwards it as `answer`
+                    w_agent_id, w_status = verify_jws(writer_sig, {"result": last_resp["content"].get("answer")})
                     st.markdown(f"**Writer:** `{w_agent_id.split('/')[-1] if w_agent_id else 'Unknown'}`")
                     st.markdown(f"**Integrity:** <span class='status-ok'>✓ {w_status}</span>", unsafe_allow_html=True)
                 
@@ -283,9 +269,19 @@ else:
                 st.session_state.last_trace_id = trace_id
                 add_security_event(f"Trace Context Initialized: {trace_id[:8]}...", "info")
                 
-                # Run Async Call in Sync Streamlit
+                # Run the call on the shared mesh loop; this script thread waits for the result
                 add_security_event(f"Requesting Researcher (mTLS + JWT)", "lock")
-                response = asyncio.run(call_agent("researcher", "/ask", payload))
+                token = st.session_state.user_token
+                try:
+                    if st.session_state.stream_responses:
+                        # Render each chunk as soon as its signature and chain link check out
+                        response = mesh.run_streaming(
+                            lambda emit: mesh.stream_agent("researcher", "/ask/stream", payload, token, emit),
+                            lambda text: message_placeholder.markdown(text + "▌"))
+                    else:
+                        response = mesh.run(mesh.call_agent("researcher", "/ask", payload, token))
+                except TimeoutError:
+                    response = {"status": "error", "message": f"No answer within {mesh.timeout:.0f}s"}
                 st.session_state.last_response = response
             
             if response.get("status") == "success":
@@ -294,15 +290,19 @@ else:
                 answer = data.get("answer")
                 verified_by = data.get("verified_caller")
                 
+                if response.get("streamed"):
+                    chunks = sum(s["chunks"] for s in response["streams"].values())
+                    add_security_event(f"Streamed JWS Verified: {chunks} chunk(s), hash chain intact", "success")
+                
                 # Validate Signatures
                 sig = response.get("signature")
                 if sig:
-                    agent_id, status = verify_jws(sig)
+                    agent_id, status = verify_jws(sig, data)
                     add_security_event(f"Researcher JWS Verified: {status}", "success")
                 
                 writer_sig = data.get("writer_signature")
                 if writer_sig:
-                    w_agent_id, w_status = verify_jws(writer_sig)
+                    w_agent_id, w_status = verify_jws(writer_sig, {"result": answer})
                     add_security_event(f"Writer JWS Verified: {w_status}", "success")
 
                 full_reply = f"{answer}\n\n*🔒 Verified Secure Connection from: {verified_by}*"
@@ -0,0 +1,171 @@
+import os
+import time
+import queue
+import asyncio
+import threading
+import contextvars
+import concurrent.futures
+from src.common.pool import MeshSessionPool
+from src.common.streaming import StreamVerifier, iter_sse
+
+_NOTHING = object()
+
+
+class MeshClient:
+    """
+    One event loop on a background thread, owning the frontend's pooled mTLS sessions.
+
+    Streamlit runs every browser session's script on its own thread, so a per-message
+    `asyncio.run` would build (and tear down) a loop, a ClientSession and a TLS connection
+    per chat message. Instead, held in `st.cache_resource`, one MeshClient serves every
+    session: script threads submit coroutines with `run` / `run_streaming` and wait on the
+    returned future, while the requests share one set of warm, keep-alive connections.
+    """
+
+    def __init__(self, spiffe, peers=None, timeout=None, agent_port=8080):
+        self.spiffe = spiffe
+        self.agent_port = agent_port
+        self.timeout = timeout or float(os.getenv("FRONTEND_REQUEST_TIMEOUT_S", "300"))
+        self.pool = MeshSessionPool(spiffe)
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._run_loop, name="mesh-client-loop", daemon=True)
+        self._thread.start()
+        if peers:
+            self.submit(self.pool.warm_up(peers))  # non-blocking; failures are only logged
+
+    def _run_loop(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    # --- Submitting work from script threads ---
+
+    def submit(self, coro) -> concurrent.futures.Future:
+        """
+        Schedules `coro` on the mesh loop and returns a thread-safe future for its result.
+        The caller's contextvars (e.g. the active OpenTelemetry span, for `traceparent`) are
+        carried over to the task.
+        """
+        future = concurrent.futures.Future()
+        context = contextvars.copy_context()
+
+        def start():
+            if not future.set_running_or_notify_cancel():
+                coro.close()
+                return
+            task = self.loop.create_task(coro, context=context)
+            future.task = task
+            task.add_done_callback(lambda t: self._resolve(t, future))
+
+        self.loop.call_soon_threadsafe(start)
+        return future
+
+    @staticmethod
+    def _resolve(task, future):
+        if task.cancelled():
+            future.set_exception(concurrent.futures.CancelledError())
+        elif task.exception() is not None:
+            future.set_exception(task.exception())
+        else:
+            future.set_result(task.result())
+
+    def run(self, coro, timeout=None):
+        """Runs `coro` on the mesh loop, blocking the calling thread until it finishes (or times out)."""
+        future = self.submit(coro)
+        try:
+            return future.result(timeout or self.timeout)
+        except concurrent.futures.TimeoutError:
+            self._cancel(future)
+            raise
+
+    def run_streaming(self, make_coro, on_update, timeout=None):
+        """
+        Like `run`, for coroutines that report progress: `make_coro(emit)` builds the coroutine,
+        which may call `emit(value)` from the loop; `on_update(value)` then runs on the calling
+        thread (UI elements can only be updated from the script thread), with only the latest
+        value delivered when several arrive between checks.
+        """
+        updates = queue.SimpleQueue()
+        future = self.submit(make_coro(updates.put))
+        deadline = time.monotonic() + (timeout or self.timeout)
+        while True:
+            done = future.done()  # checked first: every emit happens before completion
+            latest = _NOTHING
+            try:
+                latest = updates.get(block=not done, timeout=0.05)
+                while True:
+                    latest = updates.get_nowait()
+            except queue.Empty:
+                pass
+            if latest is not _NOTHING:
+                on_update(latest)
+            if done:
+                return future.result()
+            if time.monotonic() > deadline:
+                self._cancel(future)
+                raise concurrent.futures.TimeoutError()
+
+    def _cancel(self, future):
+        if not future.cancel():  # already running: cancel its task (queued after `start`, so it exists)
+            self.loop.call_soon_threadsafe(lambda: future.task.cancel())
+
+    def close(self, timeout=5):
+        """Closes the pooled sessions and stops the loop thread."""
+        if self.loop.is_closed():
+            return
+        try:
+            self.run(self.pool.close(), timeout=timeout)
+        finally:
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self._thread.join(timeout)
+            self.loop.close()
+
+    # --- Agent calls (run on the mesh loop) ---
+
+    async def call_agent(self, agent_host, endpoint, payload, user_token=None):
+        url = f"https://{agent_host}:{self.agent_port}{endpoint}"
+        # Pooled mTLS session (presents the frontend SVID) + user identity (JWT)
+        headers = {"Authorization": f"Bearer {user_token}"} if user_token else {}
+        try:
+            async with self.pool.post(url, json=payload, headers=headers) as resp:
+                if resp.status == 200:
+                    return await resp.json()
+                else:
+                    return {"status": "error", "code": resp.status, "text": await resp.text()}
+        except Exception as e:
+            return {"status": "error", "message": str(e)}
+
+    async def stream_agent(self, agent_host, endpoint, payload, user_token, on_text):
+        """
+        Calls a streaming agent route and verifies every signed event as it arrives
+        (signature, order and hash chain); `on_text(text_so_far)` runs after each verified chunk.
+        """
+        url = f"https://{agent_host}:{self.agent_port}{endpoint}"
+        headers = {"Authorization": f"Bearer {user_token}"} if user_token else {}
+
+        verifier = StreamVerifier()
+        parts, attestation = [], {}
+        try:
+            async with self.pool.post(url, json=payload, headers=headers) as resp:
+                if resp.status != 200:
+                    return {"status": "error", "code": resp.status, "text": await resp.text()}
+                async for event, data in iter_sse(resp.content):
+                    content = verifier.feed(event, data)
+                    if event == "chunk":
+                        parts.append(content["text"])
+                        on_text("".join(parts))
+                    elif event == "error":
+                        return {"status": "error", "message": content["message"], "streams": verifier.summary()}
+                    elif event == "end" and "verified_caller" in content:
+                        attestation = content
+            verifier.finish()
+        except ValueError as e:
+            return {"status": "error", "message": f"Stream integrity check failed: {e}", "streams": verifier.summary()}
+        except Exception as e:
+            return {"status": "error", "message": str(e)}
+
+        return {
+            "status": "success",
+            "streamed": True,
+            "content": {"answer": "".join(parts), "verified_caller": attestation.get("verified_caller")},
+            "streams": verifier.summary(),
+        }
@@ -1,4 +1,5 @@
 import asyncio
+import hashlib
 import logging
 import os
 import json
@@ -9,6 +10,30 @@ from src.common.auth import JWTManager
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("metadata-server")
 
+def create_app(jwt_manager):
+    """The JWKS / health routes, separate from key loading and serving (reused by the load harness)."""
+    app = web.Application()
+    
+    # The key set is fixed for the life of this process: serialize it once and let
+    # agents revalidate cheaply (ETag -> 304) on their background refresh.
+    jwks_body = json.dumps(jwt_manager.get_jwks())
+    jwks_headers = {
+        "ETag": '"' + hashlib.sha256(jwks_body.encode()).hexdigest()[:32] + '"',
+        "Cache-Control": f"max-age={os.getenv('JWKS_MAX_AGE_S', '300')}",
+    }
+
+    async def handle_jwks(request):
+        if request.headers.get("If-None-Match") == jwks_headers["ETag"]:
+            return web.Response(status=304, headers=jwks_headers)
+        return web.Response(text=jwks_body, content_type="application/json", headers=jwks_headers)
+
+    async def handle_health(request):
+        return web.json_response({"status": "healthy"})
+
+    app.router.add_get('/debug/jwks', handle_jwks)
+    app.router.add_get('/health', handle_health)
+    return app
+
 async def run_server():
     # Initialize SPIFFE
     spiffe = SpiffeHelper()
@@ -16,34 +41,28 @@ async def run_server():
     
     # Initialize/Load Keys
     key_path = "/tmp/mesh_keys.json"
+    # The algorithm is recorded in the key file, so the UI and agents follow whatever
+    # the file says; MESH_JWT_ALG (RS256 | ES256 | EdDSA) only applies when generating.
     if not os.path.exists(key_path):
-        logger.info("Generating new Mesh RSA Keypair...")
-        priv, pub = JWTManager.generate_keypair()
+        alg = os.getenv("MESH_JWT_ALG", "RS256")
+        logger.info(f"Generating new Mesh {alg} Keypair...")
+        priv, pub = JWTManager.generate_keypair(alg)
         with open(key_path, "w") as f:
-            json.dump({"priv": priv, "pub": pub}, f)
+            json.dump({"alg": alg, "priv": priv, "pub": pub}, f)
     else:
-        logger.info("Loading existing Mesh RSA Keypair...")
         with open(key_path, "r") as f:
             keys = json.load(f)
-            priv, pub = keys["priv"], keys["pub"]
+            alg, priv, pub = keys.get("alg", "RS256"), keys["priv"], keys["pub"]
+        logger.info(f"Loading existing Mesh {alg} Keypair...")
 
-    jwt_manager = JWTManager(private_key_pem=priv, public_key_pem=pub)
+    jwt_manager = JWTManager(private_key_pem=priv, public_key_pem=pub, alg=alg)
     
     # Share the public key for the app (optional if they read the same file)
     with open("/tmp/mesh_jwks.json", "w") as f:
         json.dump(jwt_manager.get_jwks(), f)
 
-    app = web.Application()
-    
-    async def handle_jwks(request):
-        return web.json_response(jwt_manager.get_jwks())
-
-    async def handle_health(request):
-        return web.json_response({"status": "healthy"})
+    app = create_app(jwt_manager)
 
-    app.router.add_get('/debug/jwks', handle_jwks)
-    app.router.add_get('/health', handle_health)
-    
     ssl_context = spiffe.get_server_ssl_context()
     runner = web.AppRunner(app)
     await runner.setup()
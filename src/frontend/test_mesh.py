@@ -14,7 +14,7 @@ async def run():
     # Load the keys the mesh is using
     with open("/tmp/mesh_keys.json", "r") as f:
         keys = json.load(f)
-        jwt_mgr = JWTManager(private_key_pem=keys["priv"], public_key_pem=keys["pub"])
+        jwt_mgr = JWTManager(private_key_pem=keys["priv"], public_key_pem=keys["pub"], alg=keys.get("alg", "RS256"))
     
     # Create a token for Alice
     token = jwt_mgr.create_token("user_alice", "alice@example.org")
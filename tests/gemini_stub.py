@@ -0,0 +1,81 @@
+"""
+Local stand-in for the Gemini REST API (`:generateContent` and `:streamGenerateContent?alt=sse`)
+for tests and benchmarks. Latency and status are configurable like StubSearchServer's; the
+stub records every prompt and the peak number of concurrent generations.
+"""
+import asyncio
+import json
+
+from aiohttp import web
+
+
+class StubGeminiServer:
+    def __init__(self, latency=0.0, status=200, chunks=4, api_key=None, finish_reason="STOP"):
+        self.latency = latency  # seconds (time to full answer), or a zero-arg callable returning seconds
+        self.status = status
+        self.chunks = chunks  # SSE chunks per streamed answer; latency is spread across them
+        self.api_key = api_key  # None accepts any X-goog-api-key
+        self.finish_reason = finish_reason  # on the last chunk, e.g. "SAFETY" / "MAX_TOKENS" for a cut-off answer
+        self.prompts = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._runner = None
+        self.url = None
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_post("/v1beta/models/{call}", self._generate)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        self.url = f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}"
+        return self
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, *exc):
+        await self.stop()
+
+    @staticmethod
+    def _candidate(text, finish_reason=None):
+        candidate = {"content": {"parts": [{"text": text}], "role": "model"}}
+        if finish_reason:
+            candidate["finishReason"] = finish_reason
+        return {"candidates": [candidate]}
+
+    async def _generate(self, request):
+        if self.api_key is not None and request.headers.get("X-goog-api-key") != self.api_key:
+            return web.json_response({"error": {"code": 403, "message": "API key not valid"}}, status=403)
+        body = await request.json()
+        prompt = body["contents"][0]["parts"][0]["text"]
+        self.prompts.append(prompt)
+        if self.status != 200:
+            return web.json_response({"error": {"code": self.status, "message": "stub failure"}}, status=self.status)
+
+        latency = self.latency() if callable(self.latency) else self.latency
+        parts = [f"# Draft {len(self.prompts)}\n\n"] + [f"Paragraph {i} of the article.\n\n" for i in range(1, self.chunks)]
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            if not request.match_info["call"].endswith(":streamGenerateContent"):
+                if latency:
+                    await asyncio.sleep(latency)
+                return web.json_response(self._candidate("".join(parts), self.finish_reason))
+
+            response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+            await response.prepare(request)
+            for i, part in enumerate(parts, 1):
+                if latency:
+                    await asyncio.sleep(latency / len(parts))
+                event = self._candidate(part, self.finish_reason if i == len(parts) else None)
+                await response.write(f"data: {json.dumps(event)}\r\n\r\n".encode())
+            await response.write_eof()
+            return response
+        finally:
+            self.in_flight -= 1
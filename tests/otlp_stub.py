@@ -0,0 +1,56 @@
+"""
+Local stand-in for an OpenTelemetry Collector's OTLP/HTTP receiver (`POST /v1/traces`, JSON)
+for tests and benchmarks. Runs on its own thread (exporters post from a worker thread) and
+keeps every received span.
+"""
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class StubCollector:
+    def __init__(self):
+        self.spans = []  # (resource attributes dict, span dict)
+        self.requests = 0
+        self._lock = threading.Lock()
+        collector = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers["Content-Length"]))
+                collector._receive(json.loads(body))
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.end_headers()
+                self.wfile.write(b"{}")
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self._server.server_address[1]}"
+        self._thread = None
+
+    def _receive(self, payload):
+        with self._lock:
+            self.requests += 1
+            for resource_spans in payload["resourceSpans"]:
+                resource = {a["key"]: next(iter(a["value"].values()))
+                            for a in resource_spans["resource"]["attributes"]}
+                for scope_spans in resource_spans["scopeSpans"]:
+                    self.spans.extend((resource, span) for span in scope_spans["spans"])
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
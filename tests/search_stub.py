@@ -0,0 +1,71 @@
+"""
+Local stand-in for the Tavily search API (`POST /search`) for tests and benchmarks.
+Latency, status and results are configurable; the stub records every request and
+the peak number of concurrent searches.
+"""
+import asyncio
+
+from aiohttp import web
+
+
+class StubSearchServer:
+    def __init__(self, latency=0.0, status=200, results=None, api_key="tvly-test"):
+        self.latency = latency  # seconds, or a zero-arg callable returning seconds
+        self.status = status
+        self.results = results
+        self.api_key = api_key
+        self.requests = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._runner = None
+        self.url = None
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_post("/search", self._search)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        self.url = f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}"
+        return self
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, *exc):
+        await self.stop()
+
+    def _results_for(self, query, max_results):
+        if self.results is not None:
+            return self.results[:max_results]
+        return [
+            {"title": f"{query} #{i}", "url": f"https://example.org/{i}", "content": f"About {query} ({i}).",
+             "score": round(1 - i / 10, 2)}
+            for i in range(max_results)
+        ]
+
+    async def _search(self, request):
+        if request.headers.get("Authorization") != f"Bearer {self.api_key}":
+            return web.json_response({"detail": {"error": "Unauthorized"}}, status=401)
+        body = await request.json()
+        self.requests.append(body)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            latency = self.latency() if callable(self.latency) else self.latency
+            if latency:
+                await asyncio.sleep(latency)
+        finally:
+            self.in_flight -= 1
+        if self.status != 200:
+            return web.json_response({"detail": {"error": "stub failure"}}, status=self.status)
+        return web.json_response({
+            "query": body["query"],
+            "results": self._results_for(body["query"], body.get("max_results", 5)),
+            "response_time": latency,
+        })
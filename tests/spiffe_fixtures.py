@@ -0,0 +1,135 @@
+"""
+Offline SPIFFE stand-ins for tests and benchmarks.
+
+`LocalCA` plays the role of the SPIRE Server (a self-signed trust domain CA that
+issues X.509-SVIDs) and `FakeX509Source` plays the role of the Workload API
+(`spiffe.X509Source`), including rotation notifications to subscribers.
+"""
+import datetime
+import threading
+
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.asymmetric import ec
+from cryptography.x509.oid import NameOID
+from spiffe import SpiffeId, TrustDomain, X509Bundle, X509Svid
+
+TRUST_DOMAIN = "example.org"
+
+FRONTEND_ID = "spiffe://example.org/ns/ui/sa/frontend"
+RESEARCHER_ID = "spiffe://example.org/ns/agents/sa/researcher"
+WRITER_ID = "spiffe://example.org/ns/agents/sa/writer"
+
+
+class LocalCA:
+    """A throwaway trust domain CA that mints SVIDs like SPIRE does (EC P-256)."""
+
+    def __init__(self, trust_domain=TRUST_DOMAIN):
+        self.trust_domain = trust_domain
+        self.key = ec.generate_private_key(ec.SECP256R1())
+        now = datetime.datetime.now(datetime.timezone.utc)
+        name = x509.Name([
+            x509.NameAttribute(NameOID.COUNTRY_NAME, "US"),
+            x509.NameAttribute(NameOID.ORGANIZATION_NAME, "SPIFFE"),
+        ])
+        self.cert = (
+            x509.CertificateBuilder()
+            .subject_name(name)
+            .issuer_name(name)
+            .public_key(self.key.public_key())
+            .serial_number(x509.random_serial_number())
+            .not_valid_before(now - datetime.timedelta(minutes=1))
+            .not_valid_after(now + datetime.timedelta(days=1))
+            .add_extension(x509.BasicConstraints(ca=True, path_length=None), critical=True)
+            .add_extension(x509.KeyUsage(
+                digital_signature=True, content_commitment=False, key_encipherment=False,
+                data_encipherment=False, key_agreement=False, key_cert_sign=True,
+                crl_sign=True, encipher_only=False, decipher_only=False,
+            ), critical=True)
+            .add_extension(x509.SubjectAlternativeName([x509.UniformResourceIdentifier(f"spiffe://{trust_domain}")]),
+                           critical=False)
+            .sign(self.key, hashes.SHA256())
+        )
+
+    def bundle(self) -> X509Bundle:
+        return X509Bundle(TrustDomain(self.trust_domain), {self.cert})
+
+    def issue_svid(self, spiffe_id: str, ttl=datetime.timedelta(hours=1)) -> X509Svid:
+        """Issues a leaf X.509-SVID for `spiffe_id`, signed by this CA."""
+        key = ec.generate_private_key(ec.SECP256R1())
+        now = datetime.datetime.now(datetime.timezone.utc)
+        cert = (
+            x509.CertificateBuilder()
+            .subject_name(x509.Name([x509.NameAttribute(NameOID.ORGANIZATION_NAME, "SPIRE")]))
+            .issuer_name(self.cert.subject)
+            .public_key(key.public_key())
+            .serial_number(x509.random_serial_number())
+            .not_valid_before(now - datetime.timedelta(minutes=1))
+            .not_valid_after(now + ttl)
+            .add_extension(x509.BasicConstraints(ca=False, path_length=None), critical=True)
+            .add_extension(x509.KeyUsage(
+                digital_signature=True, content_commitment=False, key_encipherment=True,
+                data_encipherment=False, key_agreement=True, key_cert_sign=False,
+                crl_sign=False, encipher_only=False, decipher_only=False,
+            ), critical=True)
+            .add_extension(x509.ExtendedKeyUsage([
+                x509.oid.ExtendedKeyUsageOID.SERVER_AUTH,
+                x509.oid.ExtendedKeyUsageOID.CLIENT_AUTH,
+            ]), critical=False)
+            .add_extension(x509.SubjectAlternativeName([x509.UniformResourceIdentifier(spiffe_id)]),
+                           critical=False)
+            .sign(self.key, hashes.SHA256())
+        )
+        return X509Svid(SpiffeId(spiffe_id), [cert], key)
+
+
+class FakeX509Source:
+    """
+    In-memory replacement for `spiffe.X509Source`.
+    Exposes the same surface the mesh uses (`svid`, `bundles`, update subscriptions)
+    and lets tests trigger SVID rotation on demand.
+    """
+
+    def __init__(self, spiffe_id: str, ca: LocalCA = None):
+        self.spiffe_id = spiffe_id
+        self.ca = ca or LocalCA()
+        self._lock = threading.Lock()
+        self._subscribers = []
+        self._svid = self.ca.issue_svid(spiffe_id)
+        self._bundles = frozenset({self.ca.bundle()})
+        self.rotations = 0
+
+    @property
+    def svid(self) -> X509Svid:
+        with self._lock:
+            return self._svid
+
+    @property
+    def bundles(self):
+        with self._lock:
+            return self._bundles
+
+    def subscribe_for_updates(self, callback):
+        self._subscribers.append(callback)
+
+    def unsubscribe_for_updates(self, callback):
+        if callback in self._subscribers:
+            self._subscribers.remove(callback)
+
+    def rotate(self, ca: LocalCA = None):
+        """
+        Issues a fresh SVID (optionally from a new CA) and notifies subscribers,
+        the same way the Workload API stream does on renewal.
+        """
+        if ca is not None:
+            self.ca = ca
+        svid = self.ca.issue_svid(self.spiffe_id)
+        with self._lock:
+            self._svid = svid
+            self._bundles = frozenset({self.ca.bundle()})
+            self.rotations += 1
+        for callback in list(self._subscribers):
+            callback()
+
+    def close(self):
+        self._subscribers.clear()
@@ -0,0 +1,158 @@
+import asyncio
+import warnings
+
+import aiohttp
+from aiohttp import web
+
+from src.common.admission import AdmissionController, AdmissionRejected
+from src.common.server import AgentServer
+from src.common.spiffe import SpiffeHelper
+from tests.spiffe_fixtures import FRONTEND_ID, RESEARCHER_ID, WRITER_ID, FakeX509Source
+
+warnings.simplefilter("ignore", DeprecationWarning)
+
+
+def test_fair_queueing_across_callers():
+    async def scenario():
+        controller = AdmissionController(max_in_flight=1, max_queue=100, queue_timeout=5,
+                                         weights={RESEARCHER_ID: 2})
+        order = []
+
+        async def request(caller):
+            await controller.acquire(caller)
+            order.append(caller)
+            await asyncio.sleep(0)
+            controller.release(0.01)
+
+        await controller.acquire("warm-up")  # hold the only slot while the queue fills
+        tasks = [asyncio.create_task(request(FRONTEND_ID)) for _ in range(6)]
+        await asyncio.sleep(0)
+        tasks += [asyncio.create_task(request(RESEARCHER_ID)) for _ in range(6)]
+        await asyncio.sleep(0)
+        assert controller.stats()["queued"] == 12
+        controller.release(0.01)
+        await asyncio.gather(*tasks)
+        return order
+
+    order = asyncio.run(scenario())
+    # The later but heavier-weighted caller is interleaved 2:1 instead of waiting behind the burst
+    assert order[:6].count(RESEARCHER_ID) == 4, order
+    print("✓ Weighted fair queueing interleaves callers")
+
+
+def test_queue_full_displaces_heaviest_caller_and_deadline_expires():
+    async def scenario():
+        controller = AdmissionController(max_in_flight=1, max_queue=3, queue_timeout=0.2)
+        await controller.acquire(WRITER_ID)
+
+        hog = [asyncio.create_task(controller.acquire(FRONTEND_ID)) for _ in range(3)]
+        await asyncio.sleep(0)
+
+        # 1. A new caller displaces the newest request of the caller holding the whole queue
+        quiet = asyncio.create_task(controller.acquire(RESEARCHER_ID))
+        await asyncio.sleep(0.01)
+        assert hog[2].done() and hog[2].exception().status == 429
+
+        # 2. The hog itself is refused immediately once the queue is full
+        try:
+            await controller.acquire(FRONTEND_ID)
+            assert False, "expected rejection"
+        except AdmissionRejected as e:
+            assert e.status == 429 and e.retry_after >= 1
+        print("✓ Full queue answered with 429 for the caller over its share")
+        displaced = await asyncio.gather(*hog, return_exceptions=True)
+
+        # 3. Requests still queued after the deadline get 503
+        results = await asyncio.gather(quiet, return_exceptions=True)
+        assert all(isinstance(r, AdmissionRejected) and r.status == 503 for r in displaced[:2] + results)
+        stats = controller.stats()
+        assert (stats["queued"], stats["in_flight"], stats["rejected_429"], stats["rejected_503"]) == (0, 1, 2, 3)
+        print("✓ Queue deadline answered with 503")
+
+        controller.release()
+        await controller.acquire(FRONTEND_ID)  # nothing leaked: the slot is free again
+        assert controller.stats()["in_flight"] == 1
+
+    asyncio.run(scenario())
+
+
+def test_queue_full_compares_weighted_shares():
+    async def scenario():
+        controller = AdmissionController(max_in_flight=1, max_queue=4, queue_timeout=0.2,
+                                         weights={RESEARCHER_ID: 4})
+        await controller.acquire(WRITER_ID)
+
+        # 1. Three queued for a weight-4 caller (share 0.75) are within its share; one for a
+        #    weight-1 caller (share 1.0) is not: the heavy caller's newcomer displaces it
+        heavy = [asyncio.create_task(controller.acquire(RESEARCHER_ID)) for _ in range(3)]
+        light = asyncio.create_task(controller.acquire(FRONTEND_ID))
+        await asyncio.sleep(0)
+        heavy.append(asyncio.create_task(controller.acquire(RESEARCHER_ID)))
+        await asyncio.sleep(0.01)
+        assert light.done() and light.exception().status == 429
+        assert not any(task.done() for task in heavy)
+        await asyncio.gather(*heavy, return_exceptions=True)
+
+        # 2. At equal shares (2 queued at weight 2 vs 1 at weight 1) the light caller's
+        #    newcomer is refused instead of pushing out the heavy caller's request
+        controller.weights[RESEARCHER_ID] = 2
+        controller.max_queue = 3
+        heavy = [asyncio.create_task(controller.acquire(RESEARCHER_ID)) for _ in range(2)]
+        light = asyncio.create_task(controller.acquire(FRONTEND_ID))
+        await asyncio.sleep(0)
+        try:
+            await controller.acquire(FRONTEND_ID)
+            assert False, "expected rejection"
+        except AdmissionRejected as e:
+            assert e.status == 429
+        assert not any(task.done() for task in heavy + [light])
+        await asyncio.gather(*heavy, light, return_exceptions=True)
+
+    asyncio.run(scenario())
+    print("✓ Queue-full displacement compares per-weight shares on both sides")
+
+
+def test_admission_control_decorator_returns_retry_after():
+    server = AgentServer("writer", spiffe_helper=SpiffeHelper(source=FakeX509Source(WRITER_ID)))
+    release = asyncio.Event()
+
+    @server.admission_control(max_in_flight=1, max_queue=1, queue_timeout=0.2)
+    async def handler(request):
+        await release.wait()
+        return web.json_response({"ok": True})
+
+    async def with_caller(request):
+        request["caller_id"] = request.headers["X-Caller"]
+        return await handler(request)
+
+    async def scenario():
+        app = web.Application()
+        app.router.add_post("/process", with_caller)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        url = f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}/process"
+        try:
+            async with aiohttp.ClientSession() as session:
+                async def post(caller):
+                    async with session.post(url, headers={"X-Caller": caller}) as resp:
+                        return resp.status, resp.headers.get("Retry-After")
+
+                running = asyncio.create_task(post(FRONTEND_ID))
+                await asyncio.sleep(0.05)
+                queued = asyncio.create_task(post(FRONTEND_ID))
+                await asyncio.sleep(0.05)
+                refused = await post(FRONTEND_ID)
+                expired = await queued
+                release.set()
+                return refused, expired, await running
+        finally:
+            await runner.cleanup()
+
+    refused, expired, ok = asyncio.run(scenario())
+    assert refused[0] == 429 and int(refused[1]) >= 1
+    assert expired[0] == 503 and int(expired[1]) >= 1
+    assert ok == (200, None)
+    assert server.stats_providers["admission"]()["handler"]["admitted"] == 1
+    print("✓ Overload answered fast with 429/503 and Retry-After")
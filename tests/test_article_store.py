@@ -0,0 +1,69 @@
+import asyncio
+import json
+import time
+import warnings
+
+from src.common.jws import verify_signature
+from src.common.server import AgentServer
+from src.common.spiffe import SpiffeHelper
+from src.common.store import ArticleStore
+from tests.spiffe_fixtures import WRITER_ID, FakeX509Source
+
+warnings.simplefilter("ignore", DeprecationWarning)
+
+
+def test_store_persists_and_evicts_by_size(tmp_path):
+    path = str(tmp_path / "articles.db")
+    key = ArticleStore.key_for("model", {"prompt": "zero trust"})
+    assert key == ArticleStore.key_for("model", {"prompt": "zero trust"})
+    assert key != ArticleStore.key_for("model", {"prompt": "zero trust!"})
+
+    async def scenario():
+        store = ArticleStore(path, max_bytes=1000)
+        await store.put(key, "article", b'{"signed":1}', "fp-1")
+        store.close()
+
+        # 1. Survives a restart
+        store = ArticleStore(path, max_bytes=1000)
+        start = time.perf_counter()
+        stored = await store.get(key)
+        elapsed = time.perf_counter() - start
+        assert (stored.article, stored.body, stored.fingerprint) == ("article", b'{"signed":1}', "fp-1")
+        assert elapsed < 0.05
+        print(f"✓ Entry survives reopen; hit in {elapsed * 1000:.2f} ms")
+
+        # 2. Size bound evicts least recently used entries
+        for i in range(5):
+            await store.put(f"k{i}", "x" * 100, b"y" * 100, "fp-1")
+            await store.get(key)  # keep the first entry hot
+        assert store.stats()["bytes"] <= 1000 and store.stats()["evictions"] > 0
+        assert await store.get(key) is not None and await store.get("k0") is None
+        store.close()
+        print("✓ Size-based LRU eviction")
+
+    asyncio.run(scenario())
+
+
+def test_stored_envelope_resigned_only_after_rotation(tmp_path):
+    source = FakeX509Source(WRITER_ID)
+    server = AgentServer("writer", spiffe_helper=SpiffeHelper(source=source))
+    store = ArticleStore(str(tmp_path / "articles.db"))
+    key = ArticleStore.key_for("model", {"prompt": "zero trust"})
+
+    async def scenario():
+        fingerprint = server.signer.fingerprint
+        await store.put(key, "# Article", server.signed_json_body({"result": "# Article"}), fingerprint)
+
+        stored = await store.get(key)
+        assert stored.fingerprint == server.signer.fingerprint
+        print("✓ Stored envelope reusable while the SVID is unchanged")
+
+        source.rotate()
+        assert stored.fingerprint != server.signer.fingerprint
+        body = json.loads(server.signed_json_body({"result": stored.article}))
+        assert verify_signature(body["signature"], body["content"])["x5c"] != \
+            verify_signature(json.loads(stored.body)["signature"], {"result": "# Article"})["x5c"]
+        print("✓ Rotation invalidates the stored signature (fingerprint mismatch)")
+
+    asyncio.run(scenario())
+    store.close()
@@ -1,5 +1,7 @@
-from src.common.auth import JWTManager
+from authlib.jose import JsonWebKey, jwt
+from src.common.auth import JWTManager, UnknownKeyError, VerifiedTokenCache
 import json
+import time
 
 def test_jwt_flow():
     print("Testing JWTManager...")
@@ -30,9 +32,90 @@ def test_jwt_flow():
     assert claims["iss"] == "frontend.mesh.local"
     print("✓ JWT Verification successful")
 
+def test_verified_token_cache():
+    print("Testing verified-token cache...")
+    priv, pub = JWTManager.generate_keypair()
+    mgr = JWTManager(private_key_pem=priv, public_key_pem=pub)
+    token = mgr.create_token("user_123", "test@example.org")
+
+    # 1. Repeat verification is served from the cache
+    first = mgr.verify_token(token)
+    second = mgr.verify_token(token)
+    assert second is first
+    assert mgr.token_cache.stats()["hits"] == 1
+    assert mgr.token_cache.stats()["misses"] == 1
+    print("✓ Repeat verification served from cache")
+
+    # 2. Expired entries are never served
+    digest = VerifiedTokenCache.digest(token)
+    mgr.token_cache._entries[digest] = (first, int(time.time()) - 1)
+    assert mgr.token_cache.get(digest) is None
+    print("✓ Cache entries expire at the token's exp")
+
+    # 3. A key set change invalidates the cache
+    mgr.verify_token(token)
+    _, other_pub = JWTManager.generate_keypair()
+    mgr.public_key = other_pub
+    assert mgr.token_cache.stats()["size"] == 0
+    try:
+        mgr.verify_token(token)
+        raise AssertionError("Token verified against the wrong key")
+    except PermissionError:
+        pass
+    print("✓ JWKS change invalidates cached verifications")
+
+    # 4. Size bound (LRU)
+    mgr = JWTManager(private_key_pem=priv, public_key_pem=pub)
+    mgr.token_cache.max_size = 2
+    for i in range(3):
+        mgr.verify_token(mgr.create_token(f"user_{i}", "test@example.org"))
+    assert mgr.token_cache.stats()["size"] == 2
+    assert mgr.token_cache.stats()["evictions"] == 1
+    print("✓ LRU bound enforced")
+
+def test_token_algorithms():
+    print("Testing selectable token algorithms...")
+    expected = {"RS256": ("RSA", None), "ES256": ("EC", "P-256"), "EdDSA": ("OKP", "Ed25519")}
+    for alg, (kty, crv) in expected.items():
+        priv, pub = JWTManager.generate_keypair(alg)
+        signer = JWTManager(private_key_pem=priv, public_key_pem=pub, alg=alg)
+        token = signer.create_token("user_123", "test@example.org")
+
+        # 1. JWKS advertises the right key type, curve and algorithm
+        entry = signer.get_jwks()["keys"][0]
+        assert (entry["kty"], entry.get("crv"), entry["alg"]) == (kty, crv, alg)
+
+        # 2. An agent-side verifier loaded from the JWKS accepts the token
+        verifier = JWTManager()
+        verifier.set_public_keys({k["kid"]: JsonWebKey.import_key(k) for k in signer.get_jwks()["keys"]})
+        assert verifier.verify_token(token)["sub"] == "user_123"
+        print(f"✓ {alg}: sign, JWKS export ({kty}) and verification")
+
+        # 3. A token whose header names another algorithm is rejected for this kid
+        forged = jwt.encode({"alg": "HS256", "kid": "mesh-key-1"}, {"sub": "mallory"}, b"secret").decode()
+        try:
+            verifier.verify_token(forged)
+            raise AssertionError(f"Forged HS256 token accepted by {alg} key")
+        except UnknownKeyError:
+            raise AssertionError("Wrong rejection reason")
+        except PermissionError:
+            pass
+
+    # 4. The algorithm follows the key type, and mismatches are refused
+    priv, pub = JWTManager.generate_keypair("ES256")
+    assert JWTManager(private_key_pem=priv, public_key_pem=pub).alg == "ES256"
+    try:
+        JWTManager(private_key_pem=priv, public_key_pem=pub, alg="RS256")
+        raise AssertionError("Key/algorithm mismatch accepted")
+    except ValueError:
+        pass
+    print("✓ Algorithm pinned per key; mismatches rejected")
+
 if __name__ == "__main__":
     try:
         test_jwt_flow()
+        test_verified_token_cache()
+        test_token_algorithms()
         print("\nALL AUTH TESTS PASSED")
     except Exception as e:
         print(f"\nTEST FAILED: {e}")
@@ -0,0 +1,94 @@
+import asyncio
+
+from aiohttp import web
+
+from src.common.auth import JWTManager, UnknownKeyError
+from src.common.jwks import JWKSStore
+from src.common.pool import MeshSessionPool
+from src.common.spiffe import SpiffeHelper
+from tests.spiffe_fixtures import FRONTEND_ID, WRITER_ID, FakeX509Source, LocalCA
+
+
+class _IdentityProvider:
+    """Metadata-server stand-in that can roll its key set and counts JWKS fetches."""
+
+    def __init__(self):
+        self.signers = {}
+        self.hits = 0
+        self.add_key("mesh-key-1")
+
+    def add_key(self, kid):
+        priv, pub = JWTManager.generate_keypair()
+        self.signers[kid] = JWTManager(private_key_pem=priv, public_key_pem=pub, kid=kid)
+
+    def jwks(self):
+        return {"keys": [k for signer in self.signers.values() for k in signer.get_jwks()["keys"]]}
+
+    async def handle(self, request):
+        self.hits += 1
+        await asyncio.sleep(0.05)
+        etag = f'"{len(self.signers)}"'
+        headers = {"ETag": etag, "Cache-Control": "max-age=120"}
+        if request.headers.get("If-None-Match") == etag:
+            return web.Response(status=304, headers=headers)
+        return web.json_response(self.jwks(), headers=headers)
+
+
+async def _start(idp, helper):
+    app = web.Application()
+    app.router.add_get("/debug/jwks", idp.handle)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0, ssl_context=helper.get_server_ssl_context())
+    await site.start()
+    return runner, f"https://127.0.0.1:{site._server.sockets[0].getsockname()[1]}/debug/jwks"
+
+
+def test_jwks_store_rollover():
+    ca = LocalCA()
+    frontend = SpiffeHelper(source=FakeX509Source(FRONTEND_ID, ca))
+    writer = SpiffeHelper(source=FakeX509Source(WRITER_ID, ca))
+    idp = _IdentityProvider()
+
+    async def scenario():
+        runner, url = await _start(idp, frontend)
+        pool = MeshSessionPool(writer)
+        verifier = JWTManager()
+        store = JWKSStore(url, pool, verifier, min_refetch_interval=60)
+        try:
+            # 1. Initial load + conditional revalidation
+            assert await store.refresh()
+            assert list(verifier.public_keys) == ["mesh-key-1"]
+            assert store.next_refresh_delay() == 120
+            assert await store.refresh()
+            assert idp.hits == 2 and store.etag == '"1"'
+            print("✓ JWKS loaded by kid; ETag revalidation and Cache-Control honoured")
+
+            # 2. Key rollover: a token with a new kid fails until refetched
+            idp.add_key("mesh-key-2")
+            token = idp.signers["mesh-key-2"].create_token("user_alice", "alice@example.org")
+            try:
+                verifier.verify_token(token)
+                raise AssertionError("Unknown kid accepted")
+            except UnknownKeyError as e:
+                assert e.kid == "mesh-key-2"
+
+            # 3. Thundering herd: 50 concurrent unknown-kid lookups share one fetch
+            store.last_fetch = 0.0
+            results = await asyncio.gather(*(store.ensure_kid("mesh-key-2") for _ in range(50)))
+            assert all(results)
+            assert idp.hits == 3
+            assert verifier.verify_token(token)["sub"] == "user_alice"
+            old_token = idp.signers["mesh-key-1"].create_token("user_bob", "bob@example.org")
+            assert verifier.verify_token(old_token)["sub"] == "user_bob"
+            print("✓ Rollover handled with a single-flight refetch; both kids verify")
+
+            # 4. Unknown kids cannot force refetches faster than the minimum interval
+            assert not await store.ensure_kid("attacker-kid")
+            assert idp.hits == 3
+            print("✓ Minimum refetch interval enforced")
+        finally:
+            await pool.close()
+            await runner.cleanup()
+
+    asyncio.run(scenario())
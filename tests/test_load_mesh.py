@@ -0,0 +1,24 @@
+import json
+import subprocess
+import sys
+
+
+def test_load_harness_drives_the_whole_mesh(tmp_path):
+    # A subprocess: the harness imports the agent modules after pointing their env at the stubs
+    output = tmp_path / "load.json"
+    result = subprocess.run(
+        [sys.executable, "-m", "benchmarks.load_mesh", "--duration", "1", "--concurrency", "4",
+         "--search-latency", "0.01", "--llm-latency", "uniform:0.01:0.03", "--output", str(output)],
+        capture_output=True, text=True, timeout=120)
+    assert result.returncode == 0, result.stderr[-2000:]
+
+    report = json.loads(output.read_text())
+    assert set(report["outcomes"]) == {"ok"} and report["outcomes"]["ok"] > 10, report["outcomes"]
+    hops = report["hops"]
+    ok = report["outcomes"]["ok"]
+    for hop in ("frontend -> researcher (client)", "researcher request", "  search (Tavily stub)",
+                "  researcher -> writer", "writer request", "  llm (Gemini stub)"):
+        assert hops[hop]["n"] == ok, hop
+    assert hops["  llm (Gemini stub)"]["p50_ms"] >= 10
+    assert hops["frontend -> researcher (client)"]["p99_ms"] >= hops["  llm (Gemini stub)"]["p50_ms"]
+    print(f"✓ {ok} requests through frontend -> researcher -> writer over mTLS, every hop accounted for")
@@ -0,0 +1,104 @@
+import asyncio
+import io
+import json
+import logging
+import threading
+import time
+
+from src.common.logs import LogPipeline, bind_log_context
+
+
+def _pipeline(name, output, **kwargs):
+    """A pipeline installed on an isolated logger tree (`name`) instead of the process root."""
+    root = logging.getLogger(name)
+    root.propagate = False
+    root.setLevel(logging.INFO)
+    root.addHandler(output)
+    return root, LogPipeline("researcher", fmt="json", **kwargs).install(root)
+
+
+def test_json_records_carry_request_context():
+    stream = io.StringIO()
+    root, pipeline = _pipeline("logs-json", logging.StreamHandler(stream), sample_rates={})
+    log = logging.getLogger("logs-json.researcher-agent")
+
+    async def handle(caller, user):
+        bind_log_context(caller=caller)
+        bind_log_context(user=user)
+        log.info("RESEARCH REQUEST | Query: %s", "zero trust")
+
+    async def scenario():
+        await asyncio.gather(handle("spiffe://example.org/ns/ui/sa/frontend", "alice"),
+                             asyncio.create_task(handle("spiffe://example.org/x", "bob")))
+        log.warning("outside any request")
+
+    try:
+        asyncio.run(scenario())
+        try:
+            raise RuntimeError("boom")
+        except RuntimeError:
+            log.exception("failed")
+        batch = ["as logged"]
+        log.info("batch: %s", batch)
+        batch[0] = "changed after logging"  # rendered on the emitting thread, not the listener's
+    finally:
+        pipeline.stop()
+
+    lines = [json.loads(line) for line in stream.getvalue().splitlines()]
+    assert sorted((e.get("caller"), e.get("user")) for e in lines[:2]) == [
+        ("spiffe://example.org/ns/ui/sa/frontend", "alice"), ("spiffe://example.org/x", "bob")]
+    assert "caller" not in lines[2] and "user" not in lines[2]
+    assert lines[0]["msg"] == "RESEARCH REQUEST | Query: zero trust"
+    assert lines[0]["service"] == "researcher" and lines[0]["level"] == "INFO" and "trace_id" in lines[0]
+    assert "RuntimeError: boom" in lines[3]["exc"]
+    assert lines[4]["msg"] == "batch: ['as logged']"
+    print("✓ JSON lines with per-request caller/user context (no cross-task leakage)")
+
+
+def test_sampling_keeps_warnings():
+    stream = io.StringIO()
+    root, pipeline = _pipeline("logs-sample", logging.StreamHandler(stream),
+                               sample_rates={"logs-sample.hot": 0.25})
+    try:
+        for i in range(100):
+            logging.getLogger("logs-sample.hot.path").info("hot %d", i)
+            logging.getLogger("logs-sample.cold").info("cold %d", i)
+        logging.getLogger("logs-sample.hot").warning("always kept")
+    finally:
+        pipeline.stop()
+
+    messages = [json.loads(line)["msg"] for line in stream.getvalue().splitlines()]
+    assert sum(m.startswith("hot") for m in messages) == 25
+    assert sum(m.startswith("cold") for m in messages) == 100
+    assert "always kept" in messages and pipeline.stats()["sampled_out"] == 75
+    print("✓ Hot-path lines sampled 1:4, other loggers and warnings untouched")
+
+
+def test_full_queue_drops_instead_of_blocking():
+    class SlowHandler(logging.StreamHandler):
+        def __init__(self):
+            super().__init__(io.StringIO())
+            self.gate = threading.Event()
+            self.count = 0
+
+        def emit(self, record):
+            self.gate.wait()
+            self.count += 1
+
+    output = SlowHandler()
+    root, pipeline = _pipeline("logs-bounded", logging.StreamHandler(io.StringIO()), queue_size=50)
+    pipeline.listener.handlers = (output,)  # a stalled sink (e.g. blocked stderr pipe)
+    log = logging.getLogger("logs-bounded.writer-agent")
+
+    start = time.perf_counter()
+    for i in range(1000):
+        log.info("Writing Complete (%d chunks streamed).", i)
+    elapsed = time.perf_counter() - start
+    output.gate.set()
+    pipeline.stop()
+
+    stats = pipeline.stats()
+    assert stats["dropped"] > 0 and stats["enqueued"] + stats["dropped"] == 1000
+    assert output.count == stats["enqueued"]
+    assert elapsed < 0.5
+    print(f"✓ 1000 records against a stalled sink in {elapsed * 1000:.1f} ms, {stats['dropped']} dropped")
@@ -0,0 +1,113 @@
+import asyncio
+import concurrent.futures
+import contextvars
+import threading
+import time
+
+from aiohttp import web
+
+from src.common.spiffe import SpiffeHelper
+from src.frontend.mesh_client import MeshClient
+from tests.spiffe_fixtures import FRONTEND_ID, RESEARCHER_ID, FakeX509Source, LocalCA
+
+_session = contextvars.ContextVar("session", default=None)
+
+
+def _start_researcher(helper, connections):
+    """mTLS /ask server on its own loop thread (Streamlit's frontend talks to a separate process)."""
+    loop = asyncio.new_event_loop()
+    started = threading.Event()
+    state = {}
+
+    async def ask(request):
+        connections.add(id(request.transport))
+        await asyncio.sleep(0.05)
+        body = await request.json()
+        return web.json_response({"status": "success", "content": {"answer": body["query"],
+                                                                    "auth": request.headers.get("Authorization")}})
+
+    async def start():
+        app = web.Application()
+        app.router.add_post("/ask", ask)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0, ssl_context=helper.get_server_ssl_context())
+        await site.start()
+        state["runner"], state["port"] = runner, site._server.sockets[0].getsockname()[1]
+
+    def run():
+        asyncio.set_event_loop(loop)
+        loop.run_until_complete(start())
+        started.set()
+        loop.run_forever()
+
+    threading.Thread(target=run, daemon=True).start()
+    started.wait(10)
+
+    def stop():
+        asyncio.run_coroutine_threadsafe(state["runner"].cleanup(), loop).result(10)
+        loop.call_soon_threadsafe(loop.stop)
+
+    return state["port"], stop
+
+
+def test_script_threads_share_one_loop_and_warm_connections():
+    ca = LocalCA()
+    connections = set()
+    port, stop_server = _start_researcher(SpiffeHelper(source=FakeX509Source(RESEARCHER_ID, ca)), connections)
+    client = MeshClient(SpiffeHelper(source=FakeX509Source(FRONTEND_ID, ca)), agent_port=port)
+
+    def browser_session(i):
+        # What one Streamlit script run does per chat message
+        return client.run(client.call_agent("127.0.0.1", "/ask", {"query": f"q{i}"}, user_token=f"t{i}"))
+
+    try:
+        with concurrent.futures.ThreadPoolExecutor(8) as sessions:
+            first = list(sessions.map(browser_session, range(8)))
+            second = list(sessions.map(browser_session, range(8, 40)))
+        assert [r["content"]["answer"] for r in first + second] == [f"q{i}" for i in range(40)]
+        assert second[0]["content"]["auth"] == "Bearer t8"
+        assert len(connections) <= 8  # 40 messages over the connections opened by the first wave
+        print(f"✓ 40 chat messages from 8 script threads over {len(connections)} pooled mTLS connection(s)")
+
+        # The caller's context (e.g. its OTEL span) follows the coroutine onto the mesh loop
+        async def read_context():
+            return _session.get(), threading.current_thread().name
+
+        _session.set("alice")
+        assert client.run(read_context()) == ("alice", "mesh-client-loop")
+
+        async def produce(emit):
+            for i in range(1, 6):
+                emit("x" * i)
+                await asyncio.sleep(0.01)
+            return "done"
+
+        seen = []
+        result = client.run_streaming(produce, lambda text: seen.append((text, threading.current_thread().name)))
+        assert result == "done" and seen[-1][0] == "xxxxx"
+        assert {name for _, name in seen} == {threading.current_thread().name}
+        print(f"✓ Context propagated; {len(seen)} stream update(s) rendered on the script thread")
+
+        cancelled = asyncio.Event()
+
+        async def slow():
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        start = time.perf_counter()
+        try:
+            client.run(slow(), timeout=0.1)
+            assert False, "expected a timeout"
+        except TimeoutError:
+            pass
+        assert time.perf_counter() - start < 1
+        assert client.run(asyncio.wait_for(cancelled.wait(), 1)) is True
+        print("✓ Timed-out calls are cancelled on the mesh loop")
+    finally:
+        client.close()
+        stop_server()
+    assert client.loop.is_closed()
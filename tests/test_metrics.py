@@ -0,0 +1,95 @@
+import asyncio
+import warnings
+
+import aiohttp
+from aiohttp import web
+
+from src.common.metrics import MetricsRegistry, set_request_labels
+from src.common.server import AgentServer
+from src.common.spiffe import SpiffeHelper
+from tests.spiffe_fixtures import FRONTEND_ID, RESEARCHER_ID, WRITER_ID, FakeX509Source, LocalCA
+
+warnings.simplefilter("ignore", DeprecationWarning)
+
+
+def test_exposition_format():
+    registry = MetricsRegistry()
+    histogram = registry.histogram("work_seconds", "Work.", ("kind",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.observe(value, 'a"b')
+    registry.requests.inc("/ask", FRONTEND_ID, "200")
+    registry.requests.inc("/ask", FRONTEND_ID, "200")
+
+    set_request_labels("/ask", FRONTEND_ID)
+    with registry.stage("search"):
+        pass
+    assert registry.stage_seconds.count("search", "/ask", FRONTEND_ID) == 1
+
+    text = registry.render()
+    assert "# TYPE mesh_work_seconds histogram" in text
+    assert 'mesh_work_seconds_bucket{kind="a\\"b",le="0.1"} 2' in text  # upper bounds are inclusive
+    assert 'mesh_work_seconds_bucket{kind="a\\"b",le="1.0"} 3' in text
+    assert 'mesh_work_seconds_bucket{kind="a\\"b",le="+Inf"} 4' in text
+    assert 'mesh_work_seconds_sum{kind="a\\"b"} 3.65' in text
+    assert 'mesh_work_seconds_count{kind="a\\"b"} 4' in text
+    assert f'mesh_requests_total{{route="/ask",caller="{FRONTEND_ID}",status="200"}} 2' in text
+
+    assert histogram.merged(kind='a"b') == [2, 1, 1]
+    assert histogram.quantile(0.5, kind='a"b') == 0.1  # rank 2 of 4: top of the first bucket
+    assert abs(histogram.quantile(0.75, kind='a"b') - 1.0) < 1e-9
+    assert histogram.quantile(0.99) == 1.0  # +Inf bucket: largest finite bound
+    assert histogram.quantile(0.5, kind="other") is None
+    print("✓ Counters and cumulative histogram buckets rendered in Prometheus text format")
+
+
+def test_metrics_endpoint_over_mtls(monkeypatch):
+    monkeypatch.setenv("METRICS_ALLOWED_IDS", RESEARCHER_ID)
+    ca = LocalCA()
+    server = AgentServer("writer", spiffe_helper=SpiffeHelper(source=FakeX509Source(WRITER_ID, ca)))
+    clients = {name: SpiffeHelper(source=FakeX509Source(spiffe_id, ca))
+               for name, spiffe_id in (("frontend", FRONTEND_ID), ("researcher", RESEARCHER_ID))}
+
+    async def work(request):
+        with server.stage("llm"):
+            await asyncio.sleep(0.01)
+        return web.json_response({"ok": True})
+
+    async def scenario():
+        # AgentServer.app's startup hooks fetch JWKS; mount its middleware and /metrics on a bare app
+        app = web.Application(middlewares=[server.instrument])
+        app.router.add_post("/work/{job}", work)
+        app.router.add_get("/metrics", server.require_identity([RESEARCHER_ID])(server.metrics_endpoint))
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0, ssl_context=server.spiffe.get_server_ssl_context())
+        await site.start()
+        base = f"https://127.0.0.1:{site._server.sockets[0].getsockname()[1]}"
+
+        try:
+            async with aiohttp.ClientSession() as session:  # one keep-alive connection
+                ssl_context = clients["frontend"].get_client_ssl_context()
+                for job in range(3):
+                    async with session.post(f"{base}/work/{job}", ssl=ssl_context) as resp:
+                        assert resp.status == 200
+                async with session.get(f"{base}/metrics", ssl=ssl_context) as resp:
+                    denied = resp.status
+            async with aiohttp.ClientSession() as session:
+                async with session.get(f"{base}/metrics", ssl=clients["researcher"].get_client_ssl_context()) as resp:
+                    return denied, resp.status, resp.headers["Content-Type"], await resp.text()
+        finally:
+            await runner.cleanup()
+
+    denied, status, content_type, text = asyncio.run(scenario())
+    assert (denied, status) == (403, 200)
+    assert content_type.startswith("text/plain")
+    assert any(r.canonical == "/metrics" for r in server.app.router.resources())  # and on the real app
+
+    route, by = "/work/{job}", f'caller="{FRONTEND_ID}"'
+    assert f'mesh_requests_total{{route="{route}",{by},status="200"}} 3' in text
+    assert f'mesh_requests_total{{route="/metrics",{by},status="403"}} 1' in text
+    assert f'mesh_request_duration_seconds_count{{route="{route}",{by}}} 3' in text
+    assert f'mesh_stage_duration_seconds_count{{stage="llm",route="{route}",{by}}} 3' in text
+    # Handshake time is recorded once per connection, not per request
+    assert f'mesh_stage_duration_seconds_count{{stage="tls_handshake",route="",{by}}} 1' in text
+    assert server.metrics.stage_seconds.count("tls_handshake", "", RESEARCHER_ID) == 1
+    print("✓ Per-route / per-caller latency and stage histograms served on /metrics to allowed SPIFFE IDs")
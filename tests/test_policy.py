@@ -0,0 +1,131 @@
+import asyncio
+import json
+import os
+import warnings
+
+import aiohttp
+from aiohttp import web
+
+from src.common.auth import JWTManager
+from src.common.policy import PolicyEngine, compile_policy
+from src.common.server import AgentServer
+from src.common.spiffe import SpiffeHelper
+from tests.spiffe_fixtures import FRONTEND_ID, RESEARCHER_ID, WRITER_ID, FakeX509Source, LocalCA
+
+warnings.simplefilter("ignore", DeprecationWarning)
+
+
+def _write_policy(path, process_callers):
+    document = {"services": {"writer": [
+        {"routes": ["POST /process"], "callers": process_callers, "scopes": ["mesh:all"]},
+        {"routes": ["GET /health"], "callers": "*", "user": False},
+    ]}}
+    previous = os.stat(path).st_mtime_ns if os.path.exists(path) else 0
+    with open(path, "w") as f:
+        json.dump(document, f)
+    os.utime(path, ns=(previous + 10**9, previous + 10**9))  # guarantee a visible mtime change
+
+
+def test_policy_compilation_and_reload(tmp_path):
+    path = str(tmp_path / "policy.json")
+    _write_policy(path, [FRONTEND_ID])
+    engine = PolicyEngine("writer", path=path)
+
+    rule = engine.lookup("POST", "/process")
+    assert rule.allows_caller(FRONTEND_ID) and not rule.allows_caller(RESEARCHER_ID)
+    assert engine.lookup("HEAD", "/health").allows_caller(WRITER_ID)
+    assert engine.lookup("GET", "/process") is None
+    assert rule.missing_scopes({"scope": "mesh:read mesh:all"}) == frozenset()
+    assert rule.missing_scopes({"scope": "mesh:read"}) == {"mesh:all"}
+    print("✓ Policy compiled into a (method, route) decision table")
+
+    for bad in ({"services": {}},
+                {"services": {"writer": [{"routes": ["POST /a"], "callers": ["frontend"]}]}},
+                {"services": {"writer": [{"routes": ["POST /a"], "callers": "*"},
+                                         {"routes": ["POST /a"], "callers": "*"}]}}):
+        try:
+            compile_policy(bad, "writer")
+            assert False, f"expected ValueError for {bad}"
+        except ValueError:
+            pass
+
+    _write_policy(path, [FRONTEND_ID, RESEARCHER_ID])
+    assert engine.reload_if_changed() and engine.lookup("POST", "/process").allows_caller(RESEARCHER_ID)
+    assert not engine.reload_if_changed()  # unchanged file is not recompiled
+
+    with open(path, "w") as f:
+        f.write("{ not json")
+    os.utime(path, ns=(engine.mtime + 10**9, engine.mtime + 10**9))
+    assert not engine.reload_if_changed()
+    assert engine.lookup("POST", "/process").allows_caller(RESEARCHER_ID)
+    assert (engine.stats()["loads"], engine.stats()["load_errors"]) == (2, 1)
+    print("✓ Hot reload; invalid file keeps the previous table")
+
+
+def test_policy_middleware_over_mtls(tmp_path, monkeypatch):
+    path = str(tmp_path / "policy.json")
+    _write_policy(path, [FRONTEND_ID])
+    monkeypatch.setenv("MESH_POLICY_PATH", path)
+    monkeypatch.setenv("MESH_POLICY_RELOAD_S", "0.05")
+
+    ca = LocalCA()
+    server = AgentServer("writer", spiffe_helper=SpiffeHelper(source=FakeX509Source(WRITER_ID, ca)))
+    priv, pub = JWTManager.generate_keypair()
+    issuer = JWTManager(private_key_pem=priv, public_key_pem=pub)
+    server.jwt_manager = JWTManager(public_key_pem=pub)
+    clients = {name: SpiffeHelper(source=FakeX509Source(spiffe_id, ca))
+               for name, spiffe_id in (("frontend", FRONTEND_ID), ("researcher", RESEARCHER_ID))}
+    seen = []
+
+    async def process(request):
+        seen.append((request["caller_id"], request["user_context"]["sub"]))
+        return web.json_response({"ok": True})
+
+    async def health(request):
+        return web.json_response({"status": "healthy"})
+
+    async def scenario():
+        app = web.Application(middlewares=[server.authorize])
+        app.router.add_post("/process", process)
+        app.router.add_post("/unlisted", health)
+        app.router.add_get("/health", health)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0, ssl_context=server.spiffe.get_server_ssl_context())
+        await site.start()
+        base = f"https://127.0.0.1:{site._server.sockets[0].getsockname()[1]}"
+        server.policy.start()
+
+        async def call(client, method, route, scope="mesh:all"):
+            headers = {"Authorization": f"Bearer {issuer.create_token('user_alice', 'alice@example.org', scope)}"} \
+                if scope else {}
+            async with aiohttp.ClientSession() as session:
+                async with session.request(method, base + route, headers=headers,
+                                           ssl=clients[client].get_client_ssl_context()) as resp:
+                    return resp.status
+
+        try:
+            results = {
+                "allowed": await call("frontend", "POST", "/process"),
+                "wrong_caller": await call("researcher", "POST", "/process"),
+                "missing_scope": await call("frontend", "POST", "/process", scope="mesh:read"),
+                "no_token": await call("frontend", "POST", "/process", scope=None),
+                "open_route": await call("researcher", "GET", "/health", scope=None),
+                "unlisted_route": await call("frontend", "POST", "/unlisted"),
+                "unknown_route": await call("frontend", "GET", "/nope"),
+            }
+            _write_policy(path, [FRONTEND_ID, RESEARCHER_ID])
+            await asyncio.sleep(0.3)
+            results["after_reload"] = await call("researcher", "POST", "/process")
+        finally:
+            await server.policy.stop()
+            await runner.cleanup()
+        return results
+
+    results = asyncio.run(scenario())
+    assert results == {
+        "allowed": 200, "wrong_caller": 403, "missing_scope": 403, "no_token": 401,
+        "open_route": 200, "unlisted_route": 403, "unknown_route": 404, "after_reload": 200,
+    }
+    assert seen == [(FRONTEND_ID, "user_alice"), (RESEARCHER_ID, "user_alice")]
+    print("✓ Middleware enforces callers, scopes and user tokens; policy edit applied without restart")
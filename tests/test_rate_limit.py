@@ -0,0 +1,100 @@
+import asyncio
+import warnings
+
+from aiohttp import web
+from aiohttp.test_utils import make_mocked_request
+
+from src.common.ratelimit import TokenBuckets
+from src.common.server import AgentServer
+from src.common.spiffe import SpiffeHelper
+from tests.spiffe_fixtures import FRONTEND_ID, RESEARCHER_ID, WRITER_ID, FakeX509Source
+
+warnings.simplefilter("ignore", DeprecationWarning)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_token_bucket_refill_and_idle_eviction():
+    clock = FakeClock()
+    buckets = TokenBuckets(rate=2, burst=3, idle_ttl=10, max_keys=100, clock=clock)
+
+    assert [buckets.take("alice") for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert buckets.take("alice") == 0.5  # one token every 0.5 s
+    assert buckets.take("bob") == 0.0  # independent bucket
+    clock.now += 0.5
+    assert buckets.take("alice") == 0.0
+    print("✓ Burst, refill rate and Retry-After hint")
+
+    # Idle buckets are forgotten as new keys arrive; the live set stays bounded
+    clock.now += 11
+    for i in range(50):
+        buckets.take(f"user-{i}")
+    assert buckets.stats()["keys"] == 50 and buckets.stats()["evictions"] == 2
+    for i in range(200):
+        buckets.take(f"burst-{i}")
+    assert buckets.stats()["keys"] == 100
+    print("✓ Idle and overflow buckets evicted")
+
+
+def test_rate_limit_rejects_before_handler():
+    server = AgentServer("researcher", spiffe_helper=SpiffeHelper(source=FakeX509Source(RESEARCHER_ID)))
+    calls = []
+
+    @server.rate_limit(user_rate=0.01, user_burst=2, caller_rate=0.01, caller_burst=3)
+    async def ask(request):
+        calls.append(request["user_context"]["sub"])
+        return web.json_response({"ok": True})
+
+    async def send(user, caller=FRONTEND_ID):
+        request = make_mocked_request("POST", "/ask")
+        request["caller_id"] = caller
+        request["user_context"] = {"sub": user}
+        try:
+            return (await ask(request)).status, None
+        except web.HTTPTooManyRequests as e:
+            return e.status, e.headers["Retry-After"]
+
+    async def scenario():
+        return [await send("alice"), await send("alice"), await send("alice"),
+                await send("bob"), await send("carol"), await send("dave", caller=WRITER_ID)]
+
+    results = asyncio.run(scenario())
+    assert [status for status, _ in results] == [200, 200, 429, 200, 429, 200]
+    assert int(results[2][1]) >= 1
+    assert calls == ["alice", "alice", "bob", "dave"]
+    print("✓ Per-user limit hit (no handler call)")
+
+    stats = server.stats_providers["rate_limits"]()["ask"]
+    # carol's token was given back when the shared frontend caller bucket ran dry
+    assert stats["user"]["allowed"] == 4 and stats["caller"]["limited"] == 1
+    print("✓ Per-SPIFFE-ID limit hit without charging the user")
+
+
+def test_explicit_zero_limit_blocks_route(monkeypatch):
+    monkeypatch.setenv("RATE_LIMIT_USER_RPS", "100")
+    monkeypatch.setenv("RATE_LIMIT_USER_BURST", "100")
+    server = AgentServer("writer", spiffe_helper=SpiffeHelper(source=FakeX509Source(WRITER_ID)))
+
+    @server.rate_limit(user_rate=0, user_burst=0)
+    async def process(request):
+        raise AssertionError("blocked route reached its handler")
+
+    async def scenario():
+        request = make_mocked_request("POST", "/process")
+        request["caller_id"], request["user_context"] = RESEARCHER_ID, {"sub": "alice"}
+        try:
+            await process(request)
+        except web.HTTPTooManyRequests as e:
+            return e.headers["Retry-After"]
+
+    assert asyncio.run(scenario()) == "60"
+    stats = server.stats_providers["rate_limits"]()["process"]
+    assert (stats["user"]["rate"], stats["user"]["burst"]) == (0.0, 0.0)  # not the env defaults
+    assert stats["caller"]["allowed"] == 0
+    print("✓ An explicit 0 limit blocks the route instead of falling back to the env default")
@@ -0,0 +1,86 @@
+import json
+import warnings
+
+from authlib.common.encoding import urlsafe_b64decode
+from authlib.jose import JsonWebSignature
+
+from src.common.jws import SVIDSigner, canonical_json, verify_signature
+from src.common.server import AgentServer
+from src.common.spiffe import SpiffeHelper
+from tests.spiffe_fixtures import WRITER_ID, FakeX509Source
+
+warnings.simplefilter("ignore", DeprecationWarning)
+
+
+def _verify(token):
+    """Verifies the way the frontend does: public key taken from the header's x5c."""
+    header = json.loads(urlsafe_b64decode(token.split(".")[0].encode()))
+    return header, JsonWebSignature().deserialize_compact(token, header["x5c"][0])["payload"]
+
+
+def test_signer_prepares_header_once_per_generation():
+    source = FakeX509Source(WRITER_ID)
+    helper = SpiffeHelper(source=source)
+    helper.start()
+    signer = SVIDSigner(helper)
+
+    # 1. Signatures verify against the embedded chain
+    header, payload = _verify(signer.sign_compact(b'{"result": "article"}'))
+    assert payload == b'{"result": "article"}'
+    assert header["alg"] == "ES256"
+    assert header["kid"] == WRITER_ID
+    print("✓ Compact JWS verifies with x5c[0]")
+
+    # 2. Header and key are reused within a generation
+    state = signer._state
+    signer.sign_compact(b"second")
+    assert signer._state is state
+    print("✓ Protected header and key prepared once per generation")
+
+    # 3. Rotation re-prepares them for the new SVID
+    old_x5c = header["x5c"]
+    source.rotate()
+    assert signer._state is not state and signer._state.generation == helper.generation
+    header, payload = _verify(signer.sign_compact(b"after rotation"))
+    assert header["x5c"] != old_x5c and payload == b"after rotation"
+    print("✓ Rotation refreshes the signing state")
+
+
+def test_detached_signature_round_trip():
+    helper = SpiffeHelper(source=FakeX509Source(WRITER_ID))
+    signer = SVIDSigner(helper)
+    content = {"result": "# Zero Trust\n\nNon-ASCII survives: café ✓", "n": [1, 2.5, None]}
+
+    # 1. Detached token carries no payload; verification re-derives canonical bytes
+    token = signer.sign_detached(canonical_json(content))
+    assert token.split(".")[1] == ""
+    header = verify_signature(token, json.loads(json.dumps(content, indent=2)))
+    assert header["kid"] == WRITER_ID and header["b64"] is False and header["crit"] == ["b64"]
+    assert canonical_json({"b": 1e-7, "a": 1e20}) == b'{"a":1e+20,"b":1e-7}'  # one float format everywhere
+    print("✓ Detached JWS verifies independently of wire formatting")
+
+    # 2. Tampered or missing content is rejected
+    for bad in ({**content, "result": "tampered"}, None):
+        try:
+            verify_signature(token, bad)
+            raise AssertionError("Detached JWS verified against the wrong content")
+        except ValueError:
+            pass
+    print("✓ Tampered content rejected")
+
+    # 3. The older embedded-payload form still verifies
+    assert verify_signature(signer.sign_compact(b'{"result":"legacy"}'))["kid"] == WRITER_ID
+    print("✓ Compact JWS still accepted")
+
+
+def test_signed_json_response_body_reuses_signed_bytes():
+    server = AgentServer("writer", spiffe_helper=SpiffeHelper(source=FakeX509Source(WRITER_ID)))
+    content = {"result": "article " * 100}
+
+    response = server.signed_json_response(content)
+    body = json.loads(response.body)
+    assert canonical_json(content) in response.body
+    assert body["content"] == content and body["status"] == "success"
+    assert verify_signature(body["signature"], body["content"])["kid"] == WRITER_ID
+    assert response.body.count(b"article") == 100  # payload not repeated inside the signature
+    print("✓ HTTP body embeds the signed bytes once")
@@ -0,0 +1,18 @@
+import subprocess
+import sys
+
+
+def test_rotation_storm_keeps_serving():
+    result = subprocess.run(
+        [sys.executable, "-m", "benchmarks.rotation_storm", "--duration", "1.5", "--interval", "0.3",
+         "--settle", "0.5", "--concurrency", "4", "--search-latency", "0.01", "--llm-latency", "0.02",
+         "--max-error-rate", "0"],
+        capture_output=True, text=True, timeout=180)
+    assert result.returncode == 0, result.stdout[-2000:] + result.stderr[-2000:]
+
+    generations = next(line for line in result.stdout.splitlines() if line.startswith("SVID generations seen"))
+    counts = [int(part.split("=")[1]) for part in generations.split(": ")[1].split(", ")]
+    assert len(counts) == 3 and min(counts) >= 3, generations
+    shm = next(line for line in result.stdout.splitlines() if line.startswith("shm_files")).split()
+    assert shm[1] == shm[2], shm  # no SVID material left behind in /dev/shm
+    print(f"✓ No failed requests across {min(counts)} rotations of every workload; {generations}")
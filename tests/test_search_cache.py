@@ -0,0 +1,77 @@
+import asyncio
+
+from src.common.pool import MeshSessionPool
+from src.common.search import SearchCache, SearchError, TavilySearch, normalize_query
+from tests.search_stub import StubSearchServer
+
+
+def _cache(stub, **kwargs):
+    client = TavilySearch(MeshSessionPool(), api_key="tvly-test", base_url=stub.url)
+    return SearchCache(client, **kwargs)
+
+
+def test_normalized_hits_ttl_and_lru():
+    assert normalize_query("  Is  Zero Trust\tbetter?? ") == "is zero trust better"
+    assert normalize_query("ＺＥＲＯ trust.") == "zero trust"
+
+    async def scenario():
+        async with StubSearchServer() as stub:
+            cache = _cache(stub, ttl=0.2, max_size=2)
+            try:
+                first = await cache.search("Is Zero Trust better?")
+                again = await cache.search("is zero   trust better")
+                assert again is first and len(stub.requests) == 1
+                print("✓ Normalized repeat query served from cache")
+
+                await asyncio.sleep(0.25)
+                await cache.search("is zero trust better")
+                assert len(stub.requests) == 2
+                print("✓ Entries expire after the TTL")
+
+                await cache.search("second")
+                await cache.search("third")
+                assert cache.stats()["size"] == 2 and cache.stats()["evictions"] == 1
+                print("✓ LRU size bound enforced")
+            finally:
+                await cache.client.pool.close()
+            return cache.stats()
+
+    stats = asyncio.run(scenario())
+    assert (stats["hits"], stats["misses"], stats["coalesced"]) == (1, 4, 0)
+
+
+def test_concurrent_identical_queries_coalesce():
+    async def scenario():
+        async with StubSearchServer(latency=0.1) as stub:
+            cache = _cache(stub)
+            try:
+                results = await asyncio.gather(*(cache.search("Zero trust?") for _ in range(10)))
+            finally:
+                await cache.client.pool.close()
+            return stub, cache, results
+
+    stub, cache, results = asyncio.run(scenario())
+    assert len(stub.requests) == 1
+    assert all(r is results[0] for r in results)
+    assert cache.stats()["misses"] == 1 and cache.stats()["coalesced"] == 9
+    assert cache.stats()["in_flight"] == 0
+    print("✓ 10 concurrent identical queries -> 1 upstream search")
+
+
+def test_failures_shared_but_not_cached():
+    async def scenario():
+        async with StubSearchServer(latency=0.05, status=503) as stub:
+            cache = _cache(stub)
+            try:
+                outcomes = await asyncio.gather(*(cache.search("zero trust") for _ in range(3)),
+                                                return_exceptions=True)
+                stub.status = 200
+                recovered = await cache.search("zero trust")
+            finally:
+                await cache.client.pool.close()
+            return stub, outcomes, recovered
+
+    stub, outcomes, recovered = asyncio.run(scenario())
+    assert all(isinstance(o, SearchError) for o in outcomes)
+    assert len(stub.requests) == 2 and len(recovered) == 3
+    print("✓ Coalesced callers share a failure; the next query retries upstream")
@@ -0,0 +1,81 @@
+import asyncio
+import time
+
+from src.common.pool import MeshSessionPool
+from src.common.search import SearchError, SearchResult, TavilySearch, format_results
+from tests.search_stub import StubSearchServer
+
+
+def _client(stub, **kwargs):
+    return TavilySearch(MeshSessionPool(), api_key="tvly-test", base_url=stub.url, **kwargs)
+
+
+def test_structured_results_from_stub():
+    async def scenario():
+        async with StubSearchServer() as stub:
+            client = _client(stub)
+            try:
+                results = await client.search("zero trust")
+                as_tool = await client.ainvoke({"query": "zero trust"})
+            finally:
+                await client.pool.close()
+            return stub, results, as_tool
+
+    stub, results, as_tool = asyncio.run(scenario())
+    assert [type(r) for r in results] == [SearchResult] * 3
+    assert results[0].title == "zero trust #0" and results[0].url == "https://example.org/0"
+    assert stub.requests[0] == {"query": "zero trust", "max_results": 3, "search_depth": "basic"}
+    assert as_tool[0] == {"title": "zero trust #0", "url": "https://example.org/0",
+                          "content": "About zero trust (0).", "score": 1.0}
+    assert "[1] zero trust #0\nhttps://example.org/0" in format_results(results)
+    print("✓ Structured results (and LangChain-style ainvoke output) from the stub")
+
+
+def test_bounded_concurrency_without_blocking_the_loop():
+    async def scenario():
+        async with StubSearchServer(latency=0.1) as stub:
+            client = _client(stub, max_concurrency=3)
+            ticks = 0
+
+            async def ticker():
+                nonlocal ticks
+                while True:
+                    await asyncio.sleep(0.01)
+                    ticks += 1
+
+            tick_task = asyncio.ensure_future(ticker())
+            start = time.perf_counter()
+            try:
+                await asyncio.gather(*(client.search(f"q{i}") for i in range(9)))
+            finally:
+                tick_task.cancel()
+                await client.pool.close()
+            return stub, client, time.perf_counter() - start, ticks
+
+    stub, client, elapsed, ticks = asyncio.run(scenario())
+    assert stub.max_in_flight == 3
+    assert 0.3 <= elapsed < 1.0  # 9 searches, 3 at a time, 0.1 s each
+    assert ticks >= 15  # the event loop kept running while searches were in flight
+    assert client.stats()["requests"] == 9 and client.stats()["in_flight"] == 0
+    print("✓ At most max_concurrency searches in flight; event loop never blocked")
+
+
+def test_timeouts_and_errors_raise_search_error():
+    async def scenario():
+        outcomes = []
+        for stub, timeout in ((StubSearchServer(latency=0.5), 0.1), (StubSearchServer(status=500), 5)):
+            async with stub:
+                client = _client(stub, timeout=timeout)
+                try:
+                    await client.search("zero trust")
+                    outcomes.append(None)
+                except SearchError as e:
+                    outcomes.append((str(e), client.stats()))
+                finally:
+                    await client.pool.close()
+        return outcomes
+
+    timed_out, failed = asyncio.run(scenario())
+    assert "timed out" in timed_out[0] and timed_out[1]["timeouts"] == 1
+    assert "500" in failed[0] and failed[1]["errors"] == 1
+    print("✓ Timeouts and API errors surface as SearchError")
@@ -0,0 +1,87 @@
+import asyncio
+
+from aiohttp import web
+
+from src.common.pool import MeshSessionPool
+from src.common.spiffe import SpiffeHelper
+from tests.spiffe_fixtures import RESEARCHER_ID, WRITER_ID, FakeX509Source, LocalCA
+
+
+async def _start_peer(helper, delay=0.0):
+    """A writer stand-in that reports which client certificate / connection served each call."""
+    app = web.Application()
+    seen = {"connections": set(), "client_serials": set()}
+
+    async def process(request):
+        seen["connections"].add(id(request.transport))
+        seen["client_serials"].add(request.transport.get_extra_info("peercert")["serialNumber"])
+        await asyncio.sleep(delay)
+        return web.json_response({"status": "success"})
+
+    app.router.add_get("/health", process)
+    app.router.add_post("/process", process)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0, ssl_context=helper.get_server_ssl_context())
+    await site.start()
+    return runner, f"https://127.0.0.1:{site._server.sockets[0].getsockname()[1]}", seen
+
+
+def test_pool_reuses_warm_connections():
+    ca = LocalCA()
+    writer = SpiffeHelper(source=FakeX509Source(WRITER_ID, ca))
+    researcher = SpiffeHelper(source=FakeX509Source(RESEARCHER_ID, ca))
+
+    async def scenario():
+        runner, base_url, seen = await _start_peer(writer)
+        pool = MeshSessionPool(researcher)
+        try:
+            await pool.warm_up([base_url], connections=2)
+            assert len(seen["connections"]) == 2
+            for _ in range(20):
+                async with pool.post(f"{base_url}/process", json={}) as resp:
+                    assert resp.status == 200
+            return seen
+        finally:
+            await pool.close()
+            await runner.cleanup()
+
+    seen = asyncio.run(scenario())
+    assert len(seen["connections"]) == 2
+    print("✓ 20 sequential calls served by the 2 warmed connections")
+
+
+def test_pool_drains_and_reconnects_on_rotation():
+    ca = LocalCA()
+    writer = SpiffeHelper(source=FakeX509Source(WRITER_ID, ca))
+    researcher_source = FakeX509Source(RESEARCHER_ID, ca)
+    researcher = SpiffeHelper(source=researcher_source)
+
+    async def scenario():
+        runner, base_url, seen = await _start_peer(writer, delay=0.2)
+        pool = MeshSessionPool(researcher)
+        try:
+            async with pool.post(f"{base_url}/process", json={}) as resp:
+                assert resp.status == 200
+
+            async def slow_call():
+                async with pool.post(f"{base_url}/process", json={}) as resp:
+                    return resp.status
+
+            # A request in flight across the rotation must complete on its old connection.
+            in_flight = asyncio.create_task(slow_call())
+            await asyncio.sleep(0.05)
+            await asyncio.get_running_loop().run_in_executor(None, researcher_source.rotate)
+            await asyncio.sleep(0)
+
+            async with pool.post(f"{base_url}/process", json={}) as resp:
+                assert resp.status == 200
+            assert await in_flight == 200
+            return seen
+        finally:
+            await pool.close()
+            await runner.cleanup()
+
+    seen = asyncio.run(scenario())
+    assert len(seen["client_serials"]) == 2
+    print("✓ Rotation drained old session and new connections present the new SVID")
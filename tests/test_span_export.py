@@ -0,0 +1,80 @@
+import time
+
+from opentelemetry.sdk.resources import Resource
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.id_generator import RandomIdGenerator
+from opentelemetry.trace import SpanKind, Status, StatusCode
+
+from src.common.span_export import OTLPJsonSpanExporter, TailSamplingProcessor, build_span_processor
+from tests.otlp_stub import StubCollector
+
+
+class _TenthsIdGenerator(RandomIdGenerator):
+    """Trace IDs whose low 64 bits sit mid-way in the tenths (0.05, 0.15, ...) of the ratio-sampling range."""
+
+    def __init__(self):
+        self.next = 0
+
+    def generate_trace_id(self):
+        step = (1 << 64) // 10
+        trace_id = (0xABC << 64) | (self.next * step + step // 2)
+        self.next = (self.next + 1) % 10
+        return trace_id
+
+
+def _provider(processor):
+    provider = TracerProvider(resource=Resource.create({"service.name": "researcher"}),
+                              id_generator=_TenthsIdGenerator())
+    provider.add_span_processor(processor)
+    return provider.get_tracer("test")
+
+
+def test_tail_sampling_keeps_ratio_slow_and_error_traces():
+    with StubCollector() as collector:
+        processor = build_span_processor(OTLPJsonSpanExporter(collector.url), ratio=0.2, slow_threshold=0.05)
+        assert isinstance(processor, TailSamplingProcessor)
+        tracer = _provider(processor)
+
+        def request(name, delay=0.0, fail=False):
+            with tracer.start_as_current_span(name, kind=SpanKind.SERVER):
+                with tracer.start_as_current_span("search", kind=SpanKind.CLIENT) as child:
+                    time.sleep(delay)
+                    if fail:
+                        child.set_status(Status(StatusCode.ERROR, "upstream 503"))
+                        child.add_event("retry", {"attempt": 1})
+
+        for i in range(10):  # IDs at 0.05 and 0.15 fall under the 0.2 ratio bound
+            request(f"fast-{i}", fail=(i == 4), delay=(0.06 if i == 7 else 0.0))
+        assert processor.force_flush()
+        stats = processor.stats()
+
+    roots = sorted(span["name"] for _, span in collector.spans if span["kind"] == 2)
+    assert roots == ["fast-0", "fast-1", "fast-4", "fast-7"], roots
+    assert stats["kept"] == {"ratio": 2, "error": 1, "slow": 1} and stats["dropped"] == 6
+    assert stats["pending_traces"] == 0
+    print("✓ Head ratio + slow + error traces kept, the rest dropped")
+
+    resource, child = next((r, s) for r, s in collector.spans if s["status"]["code"] == 2)
+    root = next(s for _, s in collector.spans if s["name"] == "fast-4")
+    assert resource["service.name"] == "researcher"
+    assert child["parentSpanId"] == root["spanId"] and child["traceId"] == root["traceId"]
+    assert child["events"][0]["attributes"] == [{"key": "attempt", "value": {"intValue": "1"}}]
+    print("✓ Whole traces exported as OTLP/JSON to the collector stand-in")
+
+
+def test_export_failures_never_reach_the_caller():
+    exporter = OTLPJsonSpanExporter("http://127.0.0.1:9", timeout=0.2)  # nothing listening
+    processor = build_span_processor(exporter, ratio=1.0, slow_threshold=0.5, max_queue_size=8)
+    tracer = _provider(processor)
+
+    start = time.perf_counter()
+    for i in range(100):  # overflows the bounded batch queue
+        with tracer.start_as_current_span(f"req-{i}"):
+            pass
+    elapsed = time.perf_counter() - start
+    processor.force_flush(timeout_millis=2000)
+    processor.shutdown()
+
+    assert elapsed < 0.5
+    assert exporter.exported == 0 and exporter.failed > 0
+    print(f"✓ 100 spans ended in {elapsed * 1000:.1f} ms with an unreachable collector")
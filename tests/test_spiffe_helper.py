@@ -0,0 +1,194 @@
+import asyncio
+import glob
+import socket
+import ssl
+import threading
+
+import aiohttp
+from aiohttp import web
+
+from src.common.spiffe import SpiffeHelper
+from tests.spiffe_fixtures import FRONTEND_ID, RESEARCHER_ID, FakeX509Source, LocalCA
+
+
+def _handshake(server_ctx, client_ctx):
+    """Performs one mTLS handshake over a socketpair and returns the server's view of the peer."""
+    server_sock, client_sock = socket.socketpair()
+    result = {}
+
+    def serve():
+        try:
+            with server_ctx.wrap_socket(server_sock, server_side=True) as s:
+                result["peercert"] = s.getpeercert()
+        except (ssl.SSLError, OSError) as e:
+            result["error"] = e
+
+    t = threading.Thread(target=serve)
+    t.start()
+    with client_ctx.wrap_socket(client_sock, server_hostname="researcher") as c:
+        c.getpeercert()
+    t.join(timeout=5)
+    if "error" in result:
+        raise result["error"]
+    return result["peercert"]
+
+
+def test_client_context_cached_per_generation():
+    source = FakeX509Source(FRONTEND_ID)
+    helper = SpiffeHelper(source=source)
+    helper.start()
+
+    ctx1 = helper.get_client_ssl_context()
+    assert helper.get_client_ssl_context() is ctx1
+    print("✓ Client SSLContext reused within a generation")
+
+    source.rotate()
+    assert helper.generation == 1
+    ctx2 = helper.get_client_ssl_context()
+    assert ctx2 is not ctx1
+    assert helper.get_client_ssl_context() is ctx2
+    print("✓ Client SSLContext rebuilt after rotation")
+
+
+def test_in_memory_svid_loading_mtls():
+    shm_before = set(glob.glob("/dev/shm/*svid*"))
+    ca = LocalCA()
+    server = SpiffeHelper(source=FakeX509Source(RESEARCHER_ID, ca))
+    client = SpiffeHelper(source=FakeX509Source(FRONTEND_ID, ca))
+
+    peercert = _handshake(server.get_server_ssl_context(), client.get_client_ssl_context())
+    assert server.validate_spiffe_id(peercert, allowed_spiffe_ids=[FRONTEND_ID]) == FRONTEND_ID
+    assert set(glob.glob("/dev/shm/*svid*")) == shm_before
+    print("✓ mTLS handshake with in-memory SVIDs, no key material on disk")
+
+
+def test_rotated_ca_rejected_by_stale_peer():
+    client_source = FakeX509Source(FRONTEND_ID)
+    client = SpiffeHelper(source=client_source)
+    server = SpiffeHelper(source=FakeX509Source(RESEARCHER_ID, client_source.ca))
+    server_ctx = server.get_server_ssl_context()
+
+    client_source.rotate(ca=LocalCA())
+    try:
+        _handshake(server_ctx, client.get_client_ssl_context())
+    except (ssl.SSLError, OSError):
+        print("✓ Rotated client context trusts only the new bundle")
+        return
+    raise AssertionError("Handshake unexpectedly succeeded across trust domains")
+
+
+def test_session_resumption_and_rotation_invalidation():
+    ca = LocalCA()
+    server = SpiffeHelper(source=FakeX509Source(RESEARCHER_ID, ca))
+    client_source = FakeX509Source(FRONTEND_ID, ca)
+    client = SpiffeHelper(source=client_source)
+
+    async def scenario():
+        async def greet(reader, writer):
+            writer.write(b"ok")
+            await writer.drain()
+            writer.close()
+
+        listener = await asyncio.start_server(greet, "127.0.0.1", 0, ssl=server.get_server_ssl_context())
+        port = listener.sockets[0].getsockname()[1]
+
+        async def connect():
+            reader, writer = await asyncio.open_connection(
+                "127.0.0.1", port, ssl=client.get_client_ssl_context(), server_hostname="researcher")
+            await reader.readexactly(2)
+            reused = writer.get_extra_info("ssl_object").session_reused
+            writer.close()
+            return reused
+
+        try:
+            results = [await connect(), await connect(), await connect()]
+            client_source.rotate()
+            results.append(await connect())
+            return results
+        finally:
+            listener.close()
+            await listener.wait_closed()
+
+    assert asyncio.run(scenario()) == [False, True, True, False]
+    print("✓ Reconnects resume via session ticket; rotation forces a full handshake")
+
+
+def test_server_rotation_invalidates_issued_tickets():
+    server_source = FakeX509Source(RESEARCHER_ID)
+    server = SpiffeHelper(source=server_source)
+    client = SpiffeHelper(source=FakeX509Source(FRONTEND_ID, server_source.ca))
+
+    async def scenario():
+        async def greet(reader, writer):
+            writer.write(b"ok")
+            await writer.drain()
+            writer.close()
+
+        listener = await asyncio.start_server(greet, "127.0.0.1", 0, ssl=server.get_server_ssl_context())
+        port = listener.sockets[0].getsockname()[1]
+
+        async def connect():
+            reader, writer = await asyncio.open_connection(
+                "127.0.0.1", port, ssl=client.get_client_ssl_context(), server_hostname="researcher")
+            await reader.readexactly(2)
+            reused = writer.get_extra_info("ssl_object").session_reused
+            writer.close()
+            return reused
+
+        try:
+            results = [await connect(), await connect()]
+            server_source.rotate()  # same CA: the old ticket is refused, the full handshake succeeds
+            results += [await connect(), await connect()]
+            server_source.rotate(ca=LocalCA())  # new CA: the client's ticket must not get it in
+            try:
+                results.append(await connect())
+            except (ssl.SSLError, ConnectionError):
+                results.append("rejected")
+            return results
+        finally:
+            listener.close()
+            await listener.wait_closed()
+
+    assert asyncio.run(scenario()) == [False, True, False, True, "rejected"]
+    print("✓ Server rotation invalidates issued tickets; peers from a dropped CA are rejected")
+
+
+def test_peer_identity_resolved_once_per_connection():
+    ca = LocalCA()
+    server = SpiffeHelper(source=FakeX509Source(RESEARCHER_ID, ca))
+    client_source = FakeX509Source(FRONTEND_ID, ca)
+    client = SpiffeHelper(source=client_source)
+    seen = []
+
+    async def whoami(request):
+        # Already resolved by the listener at handshake completion
+        assert request.transport.get_extra_info("ssl_object").peer_identity is not None
+        seen.append(SpiffeHelper.peer_identity(request.transport))
+        return web.Response(text="ok")
+
+    async def scenario():
+        app = web.Application()
+        app.router.add_get("/whoami", whoami)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0, ssl_context=server.get_server_ssl_context())
+        await site.start()
+        url = f"https://127.0.0.1:{site._server.sockets[0].getsockname()[1]}/whoami"
+        try:
+            for _ in range(2):  # two keep-alive connections (the second one TLS-resumed)
+                async with aiohttp.ClientSession() as session:
+                    for _ in range(3):
+                        async with session.get(url, ssl=client.get_client_ssl_context()) as resp:
+                            assert resp.status == 200
+        finally:
+            await runner.cleanup()
+
+    asyncio.run(scenario())
+    cert = client_source.svid.leaf
+    assert all(peer is seen[0] for peer in seen[:3]) and all(peer is seen[3] for peer in seen[3:])
+    assert seen[0] is not seen[3]
+    for peer in (seen[0], seen[3]):
+        assert peer.spiffe_id == FRONTEND_ID
+        assert int(peer.serial, 16) == cert.serial_number
+        assert peer.not_after == int(cert.not_valid_after_utc.timestamp())
+    print("✓ Peer SPIFFE ID, serial and expiry resolved once per connection (incl. resumed)")
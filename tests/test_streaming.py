@@ -0,0 +1,236 @@
+import asyncio
+import importlib
+import json
+import warnings
+
+import aiohttp
+from aiohttp import web
+
+from src.common.jws import SVIDSigner, verify_signature
+from src.common.server import AgentServer
+from src.common.spiffe import SpiffeHelper
+from src.common.store import ArticleStore
+from src.common.streaming import SignedStream, StreamVerifier, iter_sse, sse_event
+from tests.gemini_stub import StubGeminiServer
+from tests.spiffe_fixtures import RESEARCHER_ID, WRITER_ID, FakeX509Source
+
+warnings.simplefilter("ignore", DeprecationWarning)
+
+
+def _events(raw):
+    """Splits encoded SSE bytes back into (event, data) pairs."""
+    out = []
+    for block in raw.split(b"\n\n"):
+        if block:
+            event, data = block.split(b"\n")
+            out.append((event[len(b"event: "):].decode(), data[len(b"data: "):]))
+    return out
+
+
+def _rejects(events):
+    verifier = StreamVerifier()
+    try:
+        for event, data in events:
+            verifier.feed(event, data)
+        verifier.finish()
+    except ValueError:
+        return True
+    return False
+
+
+def test_signed_stream_chain():
+    stream = SignedStream(SVIDSigner(SpiffeHelper(source=FakeX509Source(WRITER_ID))))
+    events = _events(stream.chunk("Zero ") + stream.chunk("Trust ") + stream.chunk("wins.") + stream.end())
+
+    # 1. Incremental verification of an intact stream
+    verifier = StreamVerifier()
+    text = "".join(verifier.feed(e, d).get("text", "") for e, d in events)
+    verifier.finish()
+    assert text == "Zero Trust wins."
+    assert verifier.summary()[stream.stream_id] == {"kid": WRITER_ID, "chunks": 3, "complete": True}
+    print("✓ Every chunk verified on arrival")
+
+    # 2. Tampering, reordering, dropping and truncation are all detected
+    envelope = json.loads(events[1][1])
+    envelope["content"]["text"] = "Perimeter "
+    tampered = (events[1][0], json.dumps(envelope).encode())
+    assert _rejects([events[0], tampered] + events[2:])
+    assert _rejects([events[1], events[0]] + events[2:])
+    assert _rejects([events[0]] + events[2:])
+    assert _rejects(events[:-1])
+    print("✓ Tampered, reordered, dropped and truncated chunks rejected")
+
+    # 3. A chunk from another stream (same signer) cannot be spliced in
+    other = SignedStream(stream.signer)
+    assert _rejects(events[:1] + _events(other.chunk("injected")) + events[1:])
+    print("✓ Cross-stream splicing rejected")
+
+    # 4. A relay's attestation must match the upstream chain it relayed
+    relay = SignedStream(SVIDSigner(SpiffeHelper(source=FakeX509Source(RESEARCHER_ID))))
+    wrong = _events(relay.end(upstream={"stream": stream.stream_id, "digest": "0" * 64}))
+    assert _rejects(events + wrong)
+    print("✓ Mismatched upstream attestation rejected")
+
+
+def test_relayed_stream_end_to_end():
+    writer = AgentServer("writer", spiffe_helper=SpiffeHelper(source=FakeX509Source(WRITER_ID)))
+    researcher = AgentServer("researcher", spiffe_helper=SpiffeHelper(source=FakeX509Source(RESEARCHER_ID)))
+
+    async def scenario():
+        release = asyncio.Event()
+
+        async def write(request):
+            response, stream = await writer.open_signed_stream(request)
+            await response.write(stream.chunk("First chunk. "))
+            await release.wait()  # the rest is only "generated" after the client saw chunk 1
+            await response.write(stream.chunk("Second chunk."))
+            await response.write(stream.end())
+            return response
+
+        async def relay(request):
+            # Same shape as the researcher's /ask/stream: verify, forward verbatim, attest
+            response, stream = await researcher.open_signed_stream(request)
+            verifier, upstream = StreamVerifier(), None
+            async with aiohttp.ClientSession() as session:
+                async with session.post(f"{writer_url}/process/stream") as resp:
+                    async for event, data in iter_sse(resp.content):
+                        upstream = verifier.feed(event, data)["stream"]
+                        await response.write(sse_event(event, data))
+            verifier.finish()
+            await response.write(stream.end(verified_caller="frontend",
+                                            upstream={"stream": upstream, "digest": verifier.digest(upstream)}))
+            return response
+
+        runners = []
+        for path, handler in (("/process/stream", write), ("/ask/stream", relay)):
+            app = web.Application()  # bare app: no JWKS sync / peer warm-up on startup
+            app.router.add_post(path, handler)
+            runner = web.AppRunner(app)
+            await runner.setup()
+            site = web.TCPSite(runner, "127.0.0.1", 0)
+            await site.start()
+            runners.append((runner, f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}"))
+        writer_url, researcher_url = runners[0][1], runners[1][1]
+
+        verifier, seen = StreamVerifier(), []
+        try:
+            async with aiohttp.ClientSession() as session:
+                async with session.post(f"{researcher_url}/ask/stream") as resp:
+                    assert resp.headers["Content-Type"] == "text/event-stream"
+                    async for event, data in iter_sse(resp.content):
+                        content = verifier.feed(event, data)
+                        seen.append((event, content.get("text"), content.get("verified_caller")))
+                        if event == "chunk" and not release.is_set():
+                            release.set()
+            verifier.finish()
+        finally:
+            for runner, _ in runners:
+                await runner.cleanup()
+        return seen, verifier
+
+    seen, verifier = asyncio.run(scenario())
+    assert [e for e, _, _ in seen] == ["chunk", "chunk", "end", "end"]
+    assert "".join(t for e, t, _ in seen if e == "chunk") == "First chunk. Second chunk."
+    assert seen[-1][2] == "frontend"
+    assert sorted(s["kid"] for s in verifier.summary().values()) == [RESEARCHER_ID, WRITER_ID]
+    print("✓ Chunks reach the client before generation finishes; relay attests the writer chain")
+
+
+@web.middleware
+async def _authorized(request, handler):  # what the authorize middleware resolves
+    request["caller_id"], request["user_context"] = RESEARCHER_ID, {"sub": "user_alice"}
+    return await handler(request)
+
+
+def _writer_with_store(tmp_path, monkeypatch):
+    """The writer agent module with a fresh ArticleStore and an in-memory SVID."""
+    monkeypatch.setenv("ARTICLE_STORE_PATH", str(tmp_path / "import.db"))
+    writer = importlib.import_module("src.agents.writer")
+    store = ArticleStore(str(tmp_path / "articles.db"))
+    monkeypatch.setattr(writer, "article_store", store)
+    monkeypatch.setattr(writer, "GEMINI_API_KEY", "stub-key")
+    monkeypatch.setattr(writer.server.spiffe, "source", FakeX509Source(WRITER_ID))
+    return writer, store
+
+
+async def _serve(path, handler):
+    app = web.Application(middlewares=[_authorized])
+    app.router.add_post(path, handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    return runner, f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}{path}"
+
+
+def test_writer_stores_only_completed_streams(tmp_path, monkeypatch):
+    writer, store = _writer_with_store(tmp_path, monkeypatch)
+    gemini = StubGeminiServer(finish_reason="SAFETY")
+
+    async def scenario():
+        await gemini.start()
+        monkeypatch.setattr(writer, "GEMINI_STREAM_URL",
+                            f"{gemini.url}/v1beta/models/gemini-2.0-flash:streamGenerateContent?alt=sse")
+        runner, url = await _serve("/process/stream", writer.process_content_stream)
+
+        async def generate():
+            text, verifier = [], StreamVerifier()
+            async with aiohttp.ClientSession() as session:
+                async with session.post(url, json={"content": "notes"}) as resp:
+                    async for event, data in iter_sse(resp.content):
+                        text.append(verifier.feed(event, data).get("text", ""))
+            verifier.finish()
+            return "".join(text)
+
+        try:
+            cut_off = await generate()
+            stored_after_cut_off = store.stats()["entries"]
+            gemini.finish_reason = "STOP"
+            complete = await generate()
+            replayed = await generate()
+        finally:
+            await writer.server.pool.close()
+            await runner.cleanup()
+            await gemini.stop()
+        return cut_off, stored_after_cut_off, complete, replayed
+
+    cut_off, stored_after_cut_off, complete, replayed = asyncio.run(scenario())
+    assert cut_off.startswith("# Draft 1") and stored_after_cut_off == 0
+    assert complete.startswith("# Draft 2") and replayed == complete
+    assert len(gemini.prompts) == 2  # the completed article is served from the store
+    print("✓ Streams cut off by SAFETY are relayed but never stored; completed ones are replayed")
+
+
+def test_writer_stores_only_completed_articles(tmp_path, monkeypatch):
+    writer, store = _writer_with_store(tmp_path, monkeypatch)
+    gemini = StubGeminiServer(finish_reason="MAX_TOKENS")
+
+    async def scenario():
+        await gemini.start()
+        monkeypatch.setattr(writer, "GEMINI_URL", f"{gemini.url}/v1beta/models/gemini-2.0-flash:generateContent")
+        runner, url = await _serve("/process", writer.process_content)
+
+        async def generate():
+            async with aiohttp.ClientSession() as session:
+                async with session.post(url, json={"content": "notes"}) as resp:
+                    envelope = await resp.json()
+            verify_signature(envelope["signature"], envelope["content"])
+            return envelope["content"]["result"]
+
+        try:
+            cut_off = await generate()
+            stored_after_cut_off = store.stats()["entries"]
+            gemini.finish_reason = "STOP"
+            complete = await generate()
+            replayed = await generate()
+        finally:
+            await writer.server.pool.close()
+            await runner.cleanup()
+            await gemini.stop()
+        return cut_off, stored_after_cut_off, complete, replayed
+
+    cut_off, stored_after_cut_off, complete, replayed = asyncio.run(scenario())
+    assert cut_off.startswith("# Draft 1") and stored_after_cut_off == 0
+    assert complete.startswith("# Draft 2") and replayed == complete
+    assert len(gemini.prompts) == 2
+    print("✓ /process answers cut off by MAX_TOKENS are served signed but never stored")
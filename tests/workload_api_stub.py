@@ -0,0 +1,95 @@
+"""
+Local stand-in for the SPIRE Agent's SPIFFE Workload API (`FetchX509SVID`) on a unix socket.
+
+Unlike `FakeX509Source`, which replaces the client side, this serves the real gRPC stream,
+so a production `spiffe.X509Source` connects to it and its watcher thread delivers each
+rotation to SpiffeHelper exactly as it would from SPIRE. One stub serves one workload's
+SVID (SPIRE tells workloads apart by attesting the caller; in-process they share a PID).
+"""
+import os
+import queue
+import tempfile
+import threading
+from concurrent import futures
+
+os.environ.setdefault("GRPC_VERBOSITY", "ERROR")  # read when grpc is imported: no GOAWAY chatter on stop
+import grpc
+from cryptography.hazmat.primitives import serialization
+from spiffe._proto import workload_pb2, workload_pb2_grpc
+
+from tests.spiffe_fixtures import LocalCA
+
+
+class StubWorkloadAPI(workload_pb2_grpc.SpiffeWorkloadAPIServicer):
+    def __init__(self, spiffe_id, ca=None, directory=None):
+        self.spiffe_id = spiffe_id
+        self.ca = ca or LocalCA()
+        self.rotations = 0
+        self._own_directory = directory is None
+        self._directory = directory or tempfile.mkdtemp(prefix="workload-api-")
+        self._path = os.path.join(self._directory, f"agent-{id(self):x}.sock")
+        self._lock = threading.Lock()
+        self._response = self._issue()
+        self._streams = []  # one queue per open FetchX509SVID stream
+        self._stopped = threading.Event()
+        self._server = None
+
+    @property
+    def socket_path(self):
+        """SPIFFE_ENDPOINT_SOCKET-style address of the stub."""
+        return f"unix://{self._path}"
+
+    def start(self):
+        self._server = grpc.server(futures.ThreadPoolExecutor(max_workers=4))
+        workload_pb2_grpc.add_SpiffeWorkloadAPIServicer_to_server(self, self._server)
+        self._server.add_insecure_port(f"unix:{self._path}")
+        self._server.start()
+        return self
+
+    def stop(self):
+        self._stopped.set()
+        if self._server is not None:
+            self._server.stop(grace=None).wait()
+        if os.path.exists(self._path):
+            os.unlink(self._path)
+        if self._own_directory:
+            os.rmdir(self._directory)
+
+    def rotate(self, ca: LocalCA = None):
+        """Issues a fresh SVID (optionally from a new CA) and pushes it to every open stream."""
+        if ca is not None:
+            self.ca = ca
+        response = self._issue()
+        with self._lock:
+            self._response = response
+            self.rotations += 1
+            streams = list(self._streams)
+        for stream in streams:
+            stream.put(response)
+
+    def _issue(self):
+        svid = self.ca.issue_svid(self.spiffe_id)
+        return workload_pb2.X509SVIDResponse(svids=[workload_pb2.X509SVID(
+            spiffe_id=self.spiffe_id,
+            x509_svid=b"".join(cert.public_bytes(serialization.Encoding.DER) for cert in svid.cert_chain),
+            x509_svid_key=svid.private_key.private_bytes(
+                serialization.Encoding.DER, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()),
+            bundle=self.ca.cert.public_bytes(serialization.Encoding.DER),
+        )])
+
+    # --- gRPC service ---
+
+    def FetchX509SVID(self, request, context):
+        stream = queue.SimpleQueue()
+        with self._lock:
+            stream.put(self._response)
+            self._streams.append(stream)
+        try:
+            while context.is_active() and not self._stopped.is_set():
+                try:
+                    yield stream.get(timeout=0.2)
+                except queue.Empty:
+                    pass
+        finally:
+            with self._lock:
+                self._streams.remove(stream)